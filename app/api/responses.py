@@ -0,0 +1,23 @@
+"""Custom responses for the API."""
+
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+
+class RequestStreamingResponse(StreamingResponse):
+    """Streaming response whose body iterator reads the request body while it streams.
+
+    StreamingResponse listens for the client disconnect by reading the request messages itself,
+    which would take the body away from the iterator. This response leaves the request messages
+    to the iterator, reading the request body raises ClientDisconnect when the client is gone.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Stream the body iterator without listening for the client disconnect."""
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+        if self.background is not None:
+            await self.background()
@@ -0,0 +1,136 @@
+"""Fleet routes for the API."""
+
+import logging
+from typing import Dict, List, Optional, Union
+
+from fastapi import APIRouter, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+
+from app.api.routes.v1.productionplan import solve
+from app.core.executor import solver_executor
+from app.models.fleet import Fleet, fleet_registry
+from app.schemas.fleet import FleetIn, FleetOut
+from app.schemas.productionplan import ScenarioIn
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+VERSION_QUERY = Query(None, ge=1, description="The version of the fleet, defaults to the newest")
+
+
+def get_fleet(fleet_id: str, version: Optional[int] = None) -> Fleet:
+    """Return the registered fleet or raise a 404 error.
+
+    Args:
+        fleet_id: The id of the fleet
+        version: The version of the fleet, None for the newest one
+
+    Returns:
+        The registered fleet
+
+    Raises:
+        HTTPException: If the fleet or the version is not registered
+    """
+    fleet = fleet_registry.get(fleet_id, version)
+    if fleet is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Fleet not found")
+    return fleet
+
+
+@router.post("/", response_model=FleetOut, status_code=status.HTTP_201_CREATED)  # type: ignore
+async def register_fleet(fleet_input: FleetIn) -> FleetOut:
+    """Register a fleet of power plants for later production plans.
+
+    The power plants are validated once and stored as version 1 of the fleet. Production plan
+    requests can then refer to the fleet by its fleet_id instead of sending the power plants.
+
+    Args:
+        fleet_input: The power plants of the fleet
+
+    Returns:
+        The id, version and size of the registered fleet
+    """
+    fleet = fleet_registry.register(fleet_input.powerplants)
+    return FleetOut(fleet_id=fleet.fleet_id, version=fleet.version, size=len(fleet))
+
+
+@router.get("/{fleet_id}", response_model=FleetOut)  # type: ignore
+async def read_fleet(fleet_id: str, version: Optional[int] = VERSION_QUERY) -> FleetOut:
+    """Return the version and size of a registered fleet.
+
+    Args:
+        fleet_id: The id of the fleet
+        version: The version of the fleet, None for the newest one
+
+    Returns:
+        The id, version and size of the fleet
+    """
+    fleet = get_fleet(fleet_id, version)
+    return FleetOut(fleet_id=fleet.fleet_id, version=fleet.version, size=len(fleet))
+
+
+@router.put("/{fleet_id}", response_model=FleetOut)  # type: ignore
+async def update_fleet(fleet_id: str, fleet_input: FleetIn) -> FleetOut:
+    """Store new power plants as the next version of a registered fleet.
+
+    The earlier versions stay available, production plans that name no version use the newest.
+
+    Args:
+        fleet_id: The id of the fleet
+        fleet_input: The power plants of the new version
+
+    Returns:
+        The id, version and size of the new version
+    """
+    fleet = fleet_registry.update(fleet_id, fleet_input.powerplants)
+    if fleet is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Fleet not found")
+    return FleetOut(fleet_id=fleet.fleet_id, version=fleet.version, size=len(fleet))
+
+
+@router.delete("/{fleet_id}", status_code=status.HTTP_204_NO_CONTENT)  # type: ignore
+async def remove_fleet(fleet_id: str) -> None:
+    """Remove a registered fleet.
+
+    Args:
+        fleet_id: The id of the fleet
+    """
+    if not fleet_registry.remove(fleet_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Fleet not found")
+
+
+@router.post(
+    "/{fleet_id}/productionplan", response_model=List[Dict[str, Union[str, float]]]
+)  # type: ignore
+async def fleet_production_plan(
+    fleet_id: str,
+    scenario: ScenarioIn,
+    version: Optional[int] = VERSION_QUERY,
+) -> List[Dict[str, Union[str, float]]]:
+    """Calculate the production plan of a registered fleet for the given load and fuels.
+
+    Fleets from SOLVER_OFFLOAD_THRESHOLD power plants up are solved in a worker thread, so they
+    do not block the event loop.
+
+    Args:
+        fleet_id: The id of the fleet
+        scenario: The load and fuels for the production plan
+        version: The version of the fleet, None for the newest one
+
+    Returns:
+        A list of power plants with their power output
+    """
+    fleet = get_fleet(fleet_id, version)
+    if len(fleet) < solver_executor.threshold:
+        return _solve_fleet(fleet, scenario)
+    # the fleet and its lock live in this process, so a large fleet is solved in a thread and
+    # not in the process pool, the fleets below the threshold never wait on the lock
+    return await run_in_threadpool(_solve_fleet, fleet, scenario)
+
+
+def _solve_fleet(fleet: Fleet, scenario: ScenarioIn) -> List[Dict[str, Union[str, float]]]:
+    """Reprice a registered fleet for the fuels of a scenario and solve it, holding its lock."""
+    with fleet.lock:
+        power_plants = fleet.update_fuels(scenario.fuels)
+        return solve(power_plants, scenario.load, presorted=True)
@@ -1,37 +1,618 @@
 """Production plan routes for the API."""
 
+import asyncio
+import json
 import logging
-from typing import Dict, List, Union
+import time
+from typing import Any, AsyncGenerator, Callable, Dict, List, Optional, Tuple, Type, Union
 
-from fastapi import APIRouter
+import numpy as np
+import orjson
+from fastapi import APIRouter, HTTPException, Query, Request, status
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import ValidationError
 
-from app.models.meritorder import MeritOrder
-from app.models.powerplants import power_plant_factory
-from app.schemas.productionplan import ProductionPlanIn
+from app.api.responses import RequestStreamingResponse
+from app.core.cache import plan_cache
+from app.core.exceptions import FleetNotFoundError, InfeasibleLoadError, SearchLimitError
+from app.core.executor import solver_executor
+from app.core.metrics import (
+    CACHE_LOOKUPS,
+    COALESCED_REQUESTS,
+    STAGE_DURATION,
+    observe_solve,
+    solver_seconds,
+)
+from app.core.singleflight import plan_flights
+from app.models.fleetstore import fleet_store
+from app.models.horizon import plan_horizon
+from app.models.planner import (
+    NDJSON_ERRORS,
+    Solution,
+    ndjson_result_line,
+    plan_batch,
+    plan_input_size,
+    plan_load_curve,
+    timed_plan_production,
+    timed_solve_plan_data,
+    timed_solve_plan_input,
+)
+from app.models.powerplants import PowerPlant
+from app.models.registry import solver_registry
+from app.models.sweep import split, sweep_costs
+from app.schemas.fastpath import validate_production_plan
+from app.schemas.productionplan import (
+    HorizonIn,
+    HorizonOut,
+    LoadCurveIn,
+    LoadCurveOut,
+    ProductionPlanBatchIn,
+    ProductionPlanCostsOut,
+    ProductionPlanIn,
+)
+from app.schemas.sweep import SweepIn, SweepOut
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+ENGINE_QUERY = Query(
+    None,
+    description="Force a solver engine: greedy, exact, anytime or vectorized. By default it is "
+    "selected for the fleet size and the latency budget.",
+)
+DEADLINE_QUERY = Query(
+    None,
+    gt=0,
+    description="Latency budget of the solve in milliseconds, the anytime solver returns the best "
+    "production plan found within it. Defaults to the latency budget of the server.",
+)
+INCLUDE_COSTS_QUERY = Query(
+    False,
+    description="Return the production plan with the cost of every power plant, the total cost "
+    "and the marginal plant and price.",
+)
+# the production plan, or the production plan with its costs
+PlanContent = Union[List[Dict[str, Union[str, float]]], Dict[str, Any]]
 
-@router.post("/", response_model=List[Dict[str, Union[str, float]]])  # type: ignore
+
+def solve(
+    power_plants: List[PowerPlant],
+    load: float,
+    presorted: bool = False,
+    engine: Optional[str] = None,
+) -> List[Dict[str, Union[str, float]]]:
+    """Calculate the production plan of already created power plants.
+
+    Args:
+        power_plants: The power plants, they are sorted in place by cost per MW
+        load: The load that has to be generated
+        presorted: True if the power plants are already in merit order
+        engine: The name of a registered solver, None to select one for the power plants
+
+    Returns:
+        A list of power plants with their power output
+
+    Raises:
+        HTTPException: If the load can not be met by the power plants (422) or the exact search
+            gave up before it found a plan (503)
+    """
+    try:
+        solution = timed_plan_production(power_plants, load, presorted=presorted, engine=engine)
+    except (InfeasibleLoadError, SearchLimitError) as e:
+        raise solve_error(len(power_plants), e)
+    observe_solve(len(power_plants), solution.outcome, solution.timings, solution.engine)
+    return solution.plan
+
+
+def solve_error(size: int, error: Union[InfeasibleLoadError, SearchLimitError]) -> HTTPException:
+    """Record a failed solve in the metrics and return its HTTP error.
+
+    Args:
+        size: The number of power plants of the solve
+        error: The error the solve failed with
+
+    Returns:
+        A 422 if the load can not be met by the power plants or a 503 if the exact search gave up
+        before it found a plan
+    """
+    if isinstance(error, InfeasibleLoadError):
+        observe_solve(size, "infeasible")
+        return HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=error.message)
+    observe_solve(size, "gave_up")
+    return HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=error.message)
+
+
+def resolve_fleet(fleet_id: str, fleet_version: Optional[int]) -> Tuple[int, int]:
+    """Return the version and the size of a stored fleet.
+
+    Args:
+        fleet_id: The id of the fleet
+        fleet_version: The requested version, None for the newest one
+
+    Returns:
+        The version, so the cache key does not depend on which version is the newest, and the
+        number of power plants
+
+    Raises:
+        HTTPException: If the fleet or the version is not stored
+    """
+    stored = fleet_store.load(fleet_id, fleet_version)
+    if stored is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=FleetNotFoundError(fleet_id, fleet_version).message,
+        )
+    return stored.version, len(stored)
+
+
+def check_engine(engine: Optional[str]) -> str:
+    """Return the requested solver engine, "auto" when none was requested.
+
+    Args:
+        engine: The engine query parameter
+
+    Returns:
+        The name of a registered solver or "auto"
+
+    Raises:
+        HTTPException: If the engine is not registered
+    """
+    try:
+        return solver_registry.check(engine)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+
+
+@router.post(
+    "/", response_model=Union[List[Dict[str, Union[str, float]]], ProductionPlanCostsOut]
+)  # type: ignore
 async def production_plan(
     plan_input: ProductionPlanIn,
-) -> List[Dict[str, Union[str, float]]]:
+    engine: Optional[str] = ENGINE_QUERY,
+    deadline_ms: Optional[float] = DEADLINE_QUERY,
+    include_costs: bool = INCLUDE_COSTS_QUERY,
+) -> JSONResponse:
     """Calculate the production plan for the given input.
 
+    The power plants are part of the input or a stored fleet referred to by fleet_id and
+    fleet_version, whose power plants are not validated again. Identical inputs are served from
+    the plan cache, the X-Cache header tells whether the production plan was a cache HIT or MISS.
+    Large fleets are solved by the solver executor so they do not block the event loop. A solved
+    production plan reports the solver engine, the time it took and, for the exact and anytime
+    engines, the optimality gap in the X-Solver-Engine, X-Solver-Time-Ms and X-Optimality-Gap
+    headers. Identical requests that arrive while their production plan is solved share that
+    solve, their response has the X-Coalesced header. With include_costs the cost of every power
+    plant and of the plan are added up while the plan is built and the marginal plant is taken
+    from where the dispatch stopped.
+
     Args:
         plan_input: The input data for the production plan calculation
+        engine: The name of the solver engine, None to select one for the fleet
+        deadline_ms: The latency budget of the solve in milliseconds
+        include_costs: Return the production plan with its costs
 
     Returns:
-        A list of power plants with their power output
+        A list of power plants with their power output, or a ProductionPlanCostsOut
+    """
+    engine = check_engine(engine)
+    size = len(plan_input.powerplants or [])
+    if plan_input.fleet_id is not None:
+        version, size = resolve_fleet(plan_input.fleet_id, plan_input.fleet_version)
+        plan_input = plan_input.model_copy(update={"fleet_version": version})
+    cache_key = f"{plan_input.canonical_hash()}:{engine}:{deadline_ms}:{include_costs}"
+    plan = plan_cache.get(cache_key)
+    if plan is not None:
+        CACHE_LOOKUPS.inc(result="hit")
+        return _plan_response(plan, {"X-Cache": "HIT"})
+    CACHE_LOOKUPS.inc(result="miss")
+
+    content, headers = await _solve_once(
+        cache_key, timed_solve_plan_input, plan_input, engine, deadline_ms, include_costs, size
+    )
+    return _plan_response(content, headers)
+
+
+async def _solve_once(
+    cache_key: str,
+    func: Callable[..., Solution],
+    plan: Any,
+    engine: str,
+    deadline_ms: Optional[float],
+    include_costs: bool,
+    size: int,
+) -> Tuple[PlanContent, Dict[str, str]]:
+    """Solve a production plan that missed the plan cache once for all identical requests.
+
+    Requests with the same cache key that arrive while its plan is solved wait on that solve
+    instead of starting their own and get the X-Coalesced header. The solved plan is cached.
+
+    Args:
+        cache_key: The plan cache key of the request
+        func: timed_solve_plan_input or timed_solve_plan_data
+        plan: The input of func
+        engine: The name of the solver engine or "auto"
+        deadline_ms: The latency budget of the solve in milliseconds
+        include_costs: Return the production plan with its costs
+        size: The number of power plants
+
+    Returns:
+        The production plan, with its costs if requested, and the response headers
+
+    Raises:
+        HTTPException: If the load can not be met, the exact search gave up before it found a plan
+            or the fleet is not stored
+    """
+
+    async def calculate() -> Tuple[PlanContent, Dict[str, str]]:
+        try:
+            solution = await solver_executor.run(
+                func, plan, engine, deadline_ms, include_costs, size=size
+            )
+        except InfeasibleLoadError as e:
+            observe_solve(size, "infeasible")
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=e.message)
+        except SearchLimitError as e:
+            observe_solve(size, "gave_up")
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=e.message)
+        except FleetNotFoundError as e:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=e.message)
+        observe_solve(size, solution.outcome, solution.timings, solution.engine)
+        content = solution.costs() if include_costs else solution.plan
+        plan_cache.set(cache_key, content)
+        return content, {"X-Cache": "MISS", **_solver_headers(solution)}
+
+    # counted before the solve, so requests that share a failed solve are counted too
+    COALESCED_REQUESTS.inc(role="coalesced" if cache_key in plan_flights else "leader")
+    (content, headers), coalesced = await plan_flights.do(cache_key, calculate)
+    if coalesced:
+        headers = {**headers, "X-Coalesced": "true"}
+    return content, headers
+
+
+def _decode_json(body: bytes) -> Any:
+    """Decode a JSON request body with orjson, failing with the errors of the regular routes.
+
+    Args:
+        body: The raw request body
+
+    Returns:
+        The decoded body
+
+    Raises:
+        RequestValidationError: If the body is empty or not valid JSON
+    """
+    if not body:
+        error = {"type": "missing", "loc": ("body",), "msg": "Field required", "input": None}
+        raise RequestValidationError([error], body=body)
+    try:
+        return orjson.loads(body)
+    except orjson.JSONDecodeError:
+        pass
+    # decode again like FastAPI does, for its error message and the input only it accepts
+    try:
+        return json.loads(body)
+    except json.JSONDecodeError as e:
+        error = {
+            "type": "json_invalid",
+            "loc": ("body", e.pos),
+            "msg": "JSON decode error",
+            "input": {},
+            "ctx": {"error": e.msg},
+        }
+        raise RequestValidationError([error], body=body)
+
+
+def _solver_headers(solution: Solution) -> Dict[str, str]:
+    """Return the headers with the solver engine, the milliseconds it took and the gap."""
+    headers = {
+        "X-Solver-Engine": solution.engine,
+        "X-Solver-Time-Ms": f"{solver_seconds(solution.timings) * 1000:.3f}",
+    }
+    if solution.gap is not None:
+        headers["X-Optimality-Gap"] = f"{solution.gap:.6f}"
+    return headers
+
+
+def _plan_response(
+    plan: PlanContent,
+    headers: Dict[str, str],
+    response_class: Type[JSONResponse] = JSONResponse,
+) -> JSONResponse:
+    """Serialize a production plan and record the time it took as the "serialization" stage."""
+    start = time.perf_counter()
+    response = response_class(plan, headers=headers)
+    STAGE_DURATION.observe(time.perf_counter() - start, stage="serialization")
+    return response
+
+
+@router.post(
+    "/fast",
+    response_model=Union[List[Dict[str, Union[str, float]]], ProductionPlanCostsOut],
+    response_class=ORJSONResponse,
+    openapi_extra={
+        "requestBody": {
+            "content": {
+                "application/json": {"schema": {"$ref": "#/components/schemas/ProductionPlanIn"}}
+            },
+            "required": True,
+        }
+    },
+)  # type: ignore
+async def production_plan_fast(
+    request: Request,
+    engine: Optional[str] = ENGINE_QUERY,
+    deadline_ms: Optional[float] = DEADLINE_QUERY,
+    include_costs: bool = INCLUDE_COSTS_QUERY,
+) -> ORJSONResponse:
+    """Calculate the production plan for the given input on the fast path.
+
+    Takes the same input and gives the same production plans and errors as the regular route.
+    The body is decoded with orjson and validated without building a model per power plant, the
+    power plants are created straight from the validated values and the production plan is
+    serialized with orjson without validating it again.
+
+    Args:
+        request: The request with a ProductionPlanIn payload as body
+        engine: The name of the solver engine, None to select one for the fleet
+        deadline_ms: The latency budget of the solve in milliseconds
+        include_costs: Return the production plan with its costs
+
+    Returns:
+        A list of power plants with their power output, or a ProductionPlanCostsOut
+    """
+    engine = check_engine(engine)
+    body = await request.body()
+    start = time.perf_counter()
+    try:
+        plan_data = validate_production_plan(_decode_json(body))
+    except ValidationError as e:
+        errors = e.errors(include_url=False)
+        raise RequestValidationError(
+            [{**error, "loc": ("body", *error["loc"])} for error in errors], body=body
+        )
+    STAGE_DURATION.observe(time.perf_counter() - start, stage="validation")
+
+    size = len(plan_data.powerplants)
+    if plan_data.fleet_id is not None:
+        version, size = resolve_fleet(plan_data.fleet_id, plan_data.fleet_version)
+        plan_data = plan_data._replace(fleet_version=version)
+    cache_key = f"{plan_data.canonical_hash()}:{engine}:{deadline_ms}:{include_costs}"
+    plan = plan_cache.get(cache_key)
+    if plan is not None:
+        CACHE_LOOKUPS.inc(result="hit")
+        return _plan_response(plan, {"X-Cache": "HIT"}, ORJSONResponse)
+    CACHE_LOOKUPS.inc(result="miss")
+
+    content, headers = await _solve_once(
+        cache_key, timed_solve_plan_data, plan_data, engine, deadline_ms, include_costs, size
+    )
+    return _plan_response(content, headers, ORJSONResponse)
+
+
+@router.post("/batch", response_model=List[List[Dict[str, Union[str, float]]]])  # type: ignore
+async def production_plan_batch(
+    batch_input: ProductionPlanBatchIn,
+) -> List[List[Dict[str, Union[str, float]]]]:
+    """Calculate the production plans of many scenarios for one fleet of power plants.
+
+    The scenarios are solved one after the other by plan_batch, which creates the power plants
+    once and keeps them sorted between scenarios. Large fleets are solved by the solver executor.
+
+    Args:
+        batch_input: The power plants and the scenarios to calculate
+
+    Returns:
+        A production plan for every scenario, in the order of the scenarios
+
+    Raises:
+        HTTPException: If the load of a scenario can not be met (422) or the exact search gave up
+            before it found a plan (503)
+    """
+    size = len(batch_input.powerplants)
+    result = await solver_executor.run(plan_batch, batch_input, size=size)
+    for solution in result.solutions:
+        observe_solve(size, solution.outcome, solution.timings, solution.engine)
+    if result.error is not None:
+        error = solve_error(size, result.error)
+        error.detail = f"Scenario {len(result.solutions)}: {error.detail}"
+        raise error
+    logger.info("Calculated %d production plans for %d power plants", len(result.solutions), size)
+    return [solution.plan for solution in result.solutions]
+
+
+@router.post("/curve", response_model=LoadCurveOut)  # type: ignore
+async def production_plan_curve(curve_input: LoadCurveIn) -> LoadCurveOut:
+    """Calculate the production plans of a series of loads, e.g. the 96 quarter-hours of a day.
+
+    The intervals are solved one after the other by plan_load_curve, which keeps the power
+    plants in a Fleet so a change of fuels only resorts the affected groups of power plants.
+    Large fleets are solved by the solver executor.
+
+    Args:
+        curve_input: The loads, fuels and power plants
+
+    Returns:
+        The power of every power plant in every interval
+
+    Raises:
+        HTTPException: If the load of an interval can not be met (422) or the exact search gave up
+            before it found a plan (503)
     """
-    # Create a merit order object
-    power_plants = []
-    for pp in plan_input.powerplants:
-        power_plants.append(power_plant_factory(pp, plan_input.fuels))
+    size = len(curve_input.powerplants)
+    result = await solver_executor.run(plan_load_curve, curve_input, size=size)
+    for solution in result.solutions:
+        observe_solve(size, solution.outcome, solution.timings, solution.engine)
+    if result.error is not None:
+        error = solve_error(size, result.error)
+        error.detail = f"Interval {len(result.solutions)}: {error.detail}"
+        raise error
+    logger.info("Calculated %d intervals for %d power plants", len(result.solutions), size)
+    return LoadCurveOut(
+        names=[pp.name for pp in curve_input.powerplants],
+        loads=curve_input.loads,
+        p=[[solution.plan[plant]["p"] for solution in result.solutions] for plant in range(size)],
+    )
+
+
+@router.post("/horizon", response_model=HorizonOut)  # type: ignore
+async def production_plan_horizon(horizon_input: HorizonIn) -> HorizonOut:
+    """Calculate the production plans of consecutive intervals that can run one after the other.
 
-    merit_order = MeritOrder(power_plants, plan_input.load)
-    merit_order.set_loads()
+    Unlike the load curve every interval starts from the state the interval before left, so the
+    ramp rates and the minimum up and down times of the power plants hold across the intervals.
+    The intervals are planned one after the other without looking ahead, an interval that can not
+    be met changes decisions of the `window` intervals before it, see RollingHorizon. Large fleets
+    are planned by the solver executor.
+
+    Args:
+        horizon_input: The loads, fuels, power plants and initial state of the horizon
+
+    Returns:
+        The power of every power plant in every interval and the cost of every interval
 
-    # Return the production plan
-    return [pp.to_dict() for pp in merit_order.power_plants]
+    Raises:
+        HTTPException: If an interval can not be planned within the constraints
+    """
+    size = len(horizon_input.powerplants)
+    try:
+        plan = await solver_executor.run(plan_horizon, horizon_input, size=size)
+    except InfeasibleLoadError as e:
+        observe_solve(size, "infeasible")
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=e.message)
+    observe_solve(size, "success", plan.timings, "horizon")
+    return HorizonOut(
+        names=[pp.name for pp in horizon_input.powerplants],
+        loads=horizon_input.loads,
+        p=plan.p,
+        costs=plan.costs,
+        total_cost=sum(plan.costs),
+    )
+
+
+@router.post("/sweep", response_model=SweepOut, response_class=ORJSONResponse)  # type: ignore
+async def production_plan_sweep(sweep_input: SweepIn) -> ORJSONResponse:
+    """Calculate the merit order plan costs of a fleet over a grid of fuels and loads.
+
+    Every fuel field and the load is a single value or a range, the grid is every combination of
+    their values. The fuel points are split into contiguous chunks that are swept in parallel by
+    the solver executor, within a chunk consecutive points share the sorted merit order and only
+    resort the groups of power plants whose fuels changed. The costs are those of the greedy
+    merit order plan, see CostCurve.
+
+    Args:
+        sweep_input: The ranges of the fuels and the load and the power plants
+
+    Returns:
+        The swept axes, the cost at every point of the grid and the load above which every
+        power plant runs at every point of the fuel axes
+    """
+    fuel_points = sweep_input.fuel_points()
+    loads = sweep_input.loads()
+    size = len(sweep_input.powerplants) * len(fuel_points)
+    parts = 1
+    if solver_executor.mode != "inline" and size >= solver_executor.threshold:
+        parts = solver_executor.max_workers
+    results = await asyncio.gather(
+        *(
+            solver_executor.run(sweep_costs, sweep_input.powerplants, chunk, loads, size=size)
+            for chunk in split(fuel_points, parts)
+        )
+    )
+    costs = np.concatenate([result[0] for result in results])
+    switch_loads = np.concatenate([result[1] for result in results])
+    logger.info(
+        "Swept %d points in %d chunks for %d power plants",
+        costs.size,
+        len(results),
+        len(sweep_input.powerplants),
+    )
+    start = time.perf_counter()
+    response = ORJSONResponse(
+        {
+            "axes": [
+                {"name": name, "values": values}
+                for name, values in sweep_input.swept_axes().items()
+            ],
+            "cost": costs.ravel(),
+            "names": [pp.name for pp in sweep_input.powerplants],
+            "switch_loads": switch_loads.ravel(),
+        }
+    )
+    STAGE_DURATION.observe(time.perf_counter() - start, stage="serialization")
+    return response
+
+
+async def _plan_ndjson_line(line: bytes, line_number: int) -> str:
+    """Calculate the production plan of one line of newline-delimited JSON.
+
+    The line is validated on the event loop and solved by the solver executor, like the
+    production plan of a single request.
+
+    Args:
+        line: A ProductionPlanIn payload as JSON
+        line_number: The number of the line in the stream, starting at 1
+
+    Returns:
+        One line of JSON with either the "plan" or the "error" of the payload
+    """
+    size = 0
+    result: Union[Solution, Exception]
+    try:
+        plan_input = ProductionPlanIn.model_validate_json(line)
+        size = plan_input_size(plan_input)
+        result = await solver_executor.run(timed_solve_plan_input, plan_input, size=size)
+    except NDJSON_ERRORS as e:
+        result = e
+    return ndjson_result_line(line_number, size, result)
+
+
+async def _plan_ndjson_stream(request: Request) -> AsyncGenerator[str, None]:
+    """Yield a line of JSON with the production plan of every line of the request body.
+
+    The request body is only read when the client consumes the response, so a slow reader holds
+    back the upload and at most one line of the body is kept in memory.
+    Every line is solved by the solver executor, a line with a large fleet does not block the
+    event loop.
+
+    Args:
+        request: The request with newline-delimited ProductionPlanIn payloads as body
+    """
+    buffer = b""
+    line_number = 0
+    async for chunk in request.stream():
+        buffer += chunk
+        if b"\n" not in chunk:
+            continue
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                yield await _plan_ndjson_line(line, line_number)
+    if buffer.strip():
+        yield await _plan_ndjson_line(buffer, line_number + 1)
+
+
+@router.post(
+    "/stream",
+    response_class=RequestStreamingResponse,
+    openapi_extra={
+        "requestBody": {
+            "content": {"application/x-ndjson": {"schema": {"type": "string", "format": "binary"}}},
+            "required": True,
+        }
+    },
+)  # type: ignore
+async def production_plan_stream(request: Request) -> RequestStreamingResponse:
+    """Calculate the production plans of a stream of newline-delimited JSON payloads.
+
+    Every line of the body is a ProductionPlanIn payload. Every line of the response has the
+    "line" number of the payload and either its "plan" or the "error" it failed with.
+
+    Args:
+        request: The request with newline-delimited ProductionPlanIn payloads as body
+
+    Returns:
+        A streaming response with a line of JSON per payload
+    """
+    return RequestStreamingResponse(_plan_ndjson_stream(request), media_type="application/x-ndjson")
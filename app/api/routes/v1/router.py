@@ -3,10 +3,11 @@
 
 from fastapi import APIRouter, FastAPI
 
-from app.api.routes.v1 import productionplan
+from app.api.routes.v1 import fleets, productionplan
 
 api_router = APIRouter()
 api_router.include_router(productionplan.router, prefix="/productionplan", tags=["Production Plan"])
+api_router.include_router(fleets.router, prefix="/fleets", tags=["Fleets"])
 
 # from base router import api_router
 
@@ -0,0 +1,90 @@
+"""In-memory cache for calculated production plans."""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PlanCache:
+    """Least recently used cache whose entries expire after a time to live."""
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        """Initialize the cache.
+
+        Args:
+            max_size: Maximum number of entries, 0 disables the cache
+            ttl: Number of seconds an entry stays valid, 0 keeps entries until they are evicted
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[str, Tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return the number of entries in the cache."""
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for the key or None when it is missing or expired.
+
+        Args:
+            key: The cache key
+
+        Returns:
+            The cached value or None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl and time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                self.evictions += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a value and evict the least recently used entries above max_size.
+
+        Args:
+            key: The cache key
+            value: The value to store
+        """
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Remove all entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Return the size and the hit, miss and eviction counters of the cache."""
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+plan_cache = PlanCache(settings.PLAN_CACHE_MAX_SIZE, settings.PLAN_CACHE_TTL)
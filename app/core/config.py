@@ -1,6 +1,6 @@
 """Configuration settings for the application."""
 
-
+import os
 from typing import List
 
 
@@ -19,6 +19,42 @@ class Settings:
     PRECISION: float = 0.1  # Precision for calculations
 
     MIN_FUEL_PRICE: float = 0.0
+    GAS_CO2_EMISSION: float = 0.3  # Tons of CO2 per MWh generated by a gas fired plant
+    KEROSINE_CO2_EMISSION: float = 0.0  # Tons of CO2 per MWh generated by a turbo jet
+
+    # Solver Settings
+    MERIT_ORDER_ENGINE: str = "object"  # "object" or "numpy"
+    EXACT_SOLVER_MAX_NODES: int = 1000  # Search nodes before the best plan so far is returned
+    EXACT_SOLVER_NODE_COST_US: float = 0.4  # Microseconds per power plant per search node
+    SOLVER_LATENCY_BUDGET_MS: float = 50.0  # The exact solver is selected when its worst case fits
+    HORIZON_WINDOW: int = 16  # Latest intervals whose decisions a horizon may change to repair one
+    HORIZON_MAX_REPAIRS: int = 1000  # Earlier decisions a horizon may change before it gives up
+
+    # Executor Settings
+    SOLVER_EXECUTOR: str = "process"  # "inline", "thread" or "process"
+    SOLVER_WORKERS: int = os.cpu_count() or 1  # Number of worker threads or processes
+    SOLVER_OFFLOAD_THRESHOLD: int = 100  # Fleets with fewer power plants are solved inline
+    SOLVER_MAX_CONCURRENCY: int = 2 * (os.cpu_count() or 1)  # Offloaded solves at the same time
+
+    # Cache Settings
+    PLAN_CACHE_MAX_SIZE: int = 1024  # Number of cached production plans, 0 disables the cache
+    PLAN_CACHE_TTL: float = 60.0  # Seconds a cached production plan stays valid, 0 never expires
+
+    # Fleet Settings
+    FLEET_REGISTRY_MAX_SIZE: int = 1000  # Number of registered fleets kept in memory
+    FLEET_STORAGE_DIR: str = "./fleets"  # Directory of the stored fleet versions
+    SWEEP_MAX_POINTS: int = 1_000_000  # Maximum number of grid points of a sweep
+
+    # Server Settings
+    SERVER_BIND: str = "0.0.0.0:80"  # Address of the production server
+    SERVER_WORKERS: int = os.cpu_count() or 1  # Worker processes of the production server
+    SERVER_GRACEFUL_TIMEOUT: int = 30  # Seconds in-flight requests get to finish on shutdown
+
+    # Logging Settings
+    LOG_LEVEL: str = "INFO"  # Level of the root logger, DEBUG logs every power plant
+    LOG_QUEUE: bool = True  # Write log records from a background thread
+    LOG_FILE: str = "./logs/my_log.log"
+    LOG_SAMPLE_RATE: int = 1  # Log every Nth request, failed requests are always logged
 
     ALLOWED_HOSTS: List[str] = ["*"]
     DEBUG: bool = True
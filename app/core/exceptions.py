@@ -1,5 +1,7 @@
 """Custom exceptions used throughout the application."""
 
+from typing import Any, Tuple
+
 from app.core.config import settings
 
 
@@ -48,3 +50,92 @@ class PmaxLessThanPminError(ValueError):
         plant_info = f" for plant {plant_name}" if plant_name else ""
         self.message = f"pmax ({pmax}) must be greater than pmin ({pmin}){plant_info}"
         super().__init__(self.message)
+
+
+class InfeasibleLoadError(ValueError):
+    """Exception raised when no combination of power plants can produce the desired load."""
+
+    def __init__(self, load: float, reason: str | None = None) -> None:
+        """Initialize with the load that could not be met.
+
+        Args:
+            load: The desired load that could not be met
+            reason: Optional explanation of why the load is infeasible
+        """
+        self.load = load
+        self.reason = reason
+        reason_info = f": {reason}" if reason else ""
+        self.message = f"No feasible production plan for a load of {load}{reason_info}"
+        super().__init__(self.message)
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        """Pickle with the init arguments, so the error survives a worker process."""
+        return self.__class__, (self.load, self.reason)
+
+
+class CostOverflowError(ValueError):
+    """Exception raised when the cost of a production plan does not fit in a float."""
+
+    def __init__(self, plant_name: str) -> None:
+        """Initialize with the power plant whose cost per MWh is the highest.
+
+        Args:
+            plant_name: The name of the most expensive power plant
+        """
+        self.plant_name = plant_name
+        self.message = (
+            f"The cost of a production plan overflows, the fuel prices make the cost per MWh "
+            f"of plant {plant_name} too high"
+        )
+        super().__init__(self.message)
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        """Pickle with the init arguments, so the error survives a worker process."""
+        return self.__class__, (self.plant_name,)
+
+
+class SearchLimitError(ValueError):
+    """Exception raised when the search stopped at its limit before it found a production plan.
+
+    Unlike InfeasibleLoadError it does not tell that the load can not be met, a plan may exist.
+    """
+
+    def __init__(self, load: float, nodes: int) -> None:
+        """Initialize with the load and the size of the search that gave up.
+
+        Args:
+            load: The desired load the search was looking for a plan of
+            nodes: The number of search nodes that were explored
+        """
+        self.load = load
+        self.nodes = nodes
+        self.message = (
+            f"No production plan found for a load of {load} within the search limit of "
+            f"{nodes} nodes, the load may still be feasible"
+        )
+        super().__init__(self.message)
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        """Pickle with the init arguments, so the error survives a worker process."""
+        return self.__class__, (self.load, self.nodes)
+
+
+class FleetNotFoundError(ValueError):
+    """Exception raised when a production plan refers to a fleet or version that is not stored."""
+
+    def __init__(self, fleet_id: str, version: int | None = None) -> None:
+        """Initialize with the fleet that was not found.
+
+        Args:
+            fleet_id: The id of the fleet
+            version: The requested version, None for the newest one
+        """
+        self.fleet_id = fleet_id
+        self.version = version
+        version_info = f" version {version}" if version is not None else ""
+        self.message = f"Fleet {fleet_id}{version_info} not found"
+        super().__init__(self.message)
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        """Pickle with the init arguments, so the error survives a worker process."""
+        return self.__class__, (self.fleet_id, self.version)
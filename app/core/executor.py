@@ -0,0 +1,119 @@
+"""Executor that moves CPU bound solving off the event loop."""
+
+import asyncio
+import logging
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+MODES = ("inline", "thread", "process")
+
+
+def _warm_up_worker() -> None:
+    """Import the models in a new worker process before the first solve arrives."""
+    import app.models.planner  # noqa: F401
+
+    logger.debug("Solver worker process ready")
+
+
+class SolverExecutor:
+    """Run solves inline, in a thread pool or in a process pool depending on the fleet size.
+
+    Solves of fleets smaller than the offload threshold run inline on the event loop, larger ones
+    go to the pool. At most max_concurrency offloaded solves run at the same time, the others wait
+    in a queue whose depth is reported by stats().
+    """
+
+    def __init__(self, mode: str, max_workers: int, threshold: int, max_concurrency: int) -> None:
+        """Initialize the executor.
+
+        Args:
+            mode: "inline", "thread" or "process"
+            max_workers: Number of worker threads or processes
+            threshold: Minimum fleet size that is offloaded to the pool
+            max_concurrency: Maximum number of offloaded solves at the same time
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown solver executor mode: {mode}")
+        self.mode = mode
+        self.max_workers = max_workers
+        self.threshold = threshold
+        self.max_concurrency = max_concurrency
+        self.queued = 0
+        self.running = 0
+        self.inline = 0
+        self.offloaded = 0
+        self._pool: Optional[Executor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _get_pool(self) -> Executor:
+        """Return the pool, it is created on the first offloaded solve."""
+        if self._pool is None:
+            if self.mode == "process":
+                self._pool = ProcessPoolExecutor(self.max_workers, initializer=_warm_up_worker)
+            else:
+                self._pool = ThreadPoolExecutor(self.max_workers, thread_name_prefix="solver")
+            logger.info("Started solver %s pool with %d workers", self.mode, self.max_workers)
+        return self._pool
+
+    async def run(self, func: Callable[..., T], *args: Any, size: int) -> T:
+        """Run func(*args) inline or in the pool.
+
+        Args:
+            func: A picklable function when the mode is "process"
+            *args: The arguments of func
+            size: The size of the fleet that is solved
+
+        Returns:
+            The result of func
+        """
+        if self.mode == "inline" or size < self.threshold:
+            self.inline += 1
+            return func(*args)
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.queued += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+        self.running += 1
+        self.offloaded += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_pool(), partial(func, *args))
+        finally:
+            self.running -= 1
+            self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the mode and the queue depth and counters of the executor."""
+        return {
+            "mode": self.mode,
+            "workers": self.max_workers,
+            "queued": self.queued,
+            "running": self.running,
+            "inline": self.inline,
+            "offloaded": self.offloaded,
+        }
+
+    def shutdown(self) -> None:
+        """Stop the pool, waiting for the solves that are running."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+            logger.info("Stopped solver pool")
+
+
+solver_executor = SolverExecutor(
+    settings.SOLVER_EXECUTOR,
+    settings.SOLVER_WORKERS,
+    settings.SOLVER_OFFLOAD_THRESHOLD,
+    settings.SOLVER_MAX_CONCURRENCY,
+)
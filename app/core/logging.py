@@ -1,8 +1,15 @@
 """Logging configuration for the application."""
 
+import logging
+import os
 from logging import config
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
+from typing import Any, Dict, Optional
 
-LOGGING_CONFIG = {
+from app.core.config import settings
+
+LOGGING_CONFIG: Dict[str, Any] = {
     "version": 1,
     "disable_existing_loggers": False,
     "formatters": {
@@ -22,20 +29,49 @@ LOGGING_CONFIG = {
             "formatter": "default",
             "class": "logging.handlers.RotatingFileHandler",
             "level": "DEBUG",
-            "filename": "./logs/my_log.log",
+            "filename": settings.LOG_FILE,
             "mode": "a",
         },
     },
     "loggers": {
         "": {
             "handlers": ["file", "console"],
-            "level": "DEBUG",
+            "level": settings.LOG_LEVEL,
             "propagate": True,
         },
     },
 }
 
+_listener: Optional[QueueListener] = None
+
 
 def configure_logging() -> None:
-    """Initialize the logging configuration."""
+    """Initialize the logging configuration.
+
+    With settings.LOG_QUEUE the handlers of the root logger are moved behind a QueueListener,
+    the request threads only put records on a queue and the file and console I/O happens on the
+    thread of the listener.
+    """
+    global _listener
+    stop_logging()
+    os.makedirs(os.path.dirname(settings.LOG_FILE) or ".", exist_ok=True)
     config.dictConfig(LOGGING_CONFIG)
+    if not settings.LOG_QUEUE:
+        return
+
+    root = logging.getLogger()
+    handlers = list(root.handlers)
+    for handler in handlers:
+        root.removeHandler(handler)
+    queue: SimpleQueue = SimpleQueue()
+    root.addHandler(QueueHandler(queue))
+    _listener = QueueListener(queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_logging() -> None:
+    """Stop the queue listener after it wrote the queued records."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,254 @@
+"""In-process metrics in the Prometheus text exposition format."""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, TypeVar, Union
+
+# Upper bounds in seconds of the latency histograms
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+# Upper bounds of the fleet size histogram
+FLEET_SIZE_BUCKETS = (1, 3, 10, 30, 100, 300, 1000, 3000, 10000, 30000)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    """Return the label set of a sample, e.g. {stage="sort",le="0.1"}."""
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    """Return a sample value, whole numbers without a fraction."""
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    """A counter per label set that only goes up."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()) -> None:
+        """Initialize the counter.
+
+        Args:
+            name: The metric name
+            documentation: The help text of the metric
+            labels: The names of the labels
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """Increase the counter of the label set by amount."""
+        key = tuple(labels[name] for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        """Return the counter of the label set."""
+        return self._values.get(tuple(labels[name] for name in self.labels), 0.0)
+
+    def samples(self) -> List[str]:
+        """Return the exposition lines of every label set."""
+        with self._lock:
+            values = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+            for key, value in values
+        ]
+
+
+class Histogram:
+    """Cumulative bucket counts, a sum and a count per label set."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        """Initialize the histogram.
+
+        Args:
+            name: The metric name
+            documentation: The help text of the metric
+            labels: The names of the labels
+            buckets: The sorted upper bounds of the buckets, +Inf is added
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # per label set the counts of every bucket (not cumulative), the sum and the count
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Add an observation to the histogram of the label set."""
+        key = tuple(labels[name] for name in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = ([0] * (len(self.buckets) + 1), [0.0, 0.0])
+            entry[0][index] += 1
+            entry[1][0] += value
+            entry[1][1] += 1
+
+    def count(self, **labels: str) -> int:
+        """Return the number of observations of the label set."""
+        entry = self._values.get(tuple(labels[name] for name in self.labels))
+        return int(entry[1][1]) if entry else 0
+
+    def samples(self) -> List[str]:
+        """Return the bucket, sum and count lines of every label set."""
+        with self._lock:
+            values = sorted(
+                (key, (list(counts), list(sums))) for key, (counts, sums) in self._values.items()
+            )
+        bounds = [_format_value(bound) for bound in self.buckets] + ["+Inf"]
+        lines = []
+        for key, (counts, (total, count)) in values:
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                le = f'le="{bound}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}"
+                )
+            labels = _format_labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {_format_value(count)}")
+        return lines
+
+
+M = TypeVar("M", Counter, Histogram)
+
+
+class MetricsRegistry:
+    """The metrics of the application, rendered for a Prometheus scrape."""
+
+    def __init__(self) -> None:
+        """Initialize an empty registry."""
+        self._metrics: Dict[str, Union[Counter, Histogram]] = {}
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        """Create and register a counter."""
+        return self._register(Counter(name, documentation, labels))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        """Create and register a histogram."""
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def _register(self, metric: M) -> M:
+        """Add a metric to the registry, names have to be unique."""
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Return all metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+@contextmanager
+def span(timings: Dict[str, float], stage: str) -> Iterator[None]:
+    """Add the seconds spent in the block to timings[stage], measured on the monotonic clock.
+
+    Args:
+        timings: The stage timings to add to
+        stage: The name of the stage
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - start
+
+
+metrics = MetricsRegistry()
+
+REQUEST_DURATION = metrics.histogram(
+    "http_request_duration_seconds",
+    "Duration of the HTTP requests by route",
+    labels=("method", "route", "status"),
+)
+STAGE_DURATION = metrics.histogram(
+    "productionplan_stage_duration_seconds",
+    "Duration of the stages of a production plan calculation",
+    labels=("stage",),
+)
+FLEET_SIZE = metrics.histogram(
+    "productionplan_fleet_size",
+    "Number of power plants of the solved fleets",
+    buckets=FLEET_SIZE_BUCKETS,
+)
+SOLVER_OUTCOMES = metrics.counter(
+    "productionplan_solver_outcomes_total",
+    "Solves by outcome: success, fallback (node limit or deadline, best plan so far), gave_up "
+    "(node limit without a plan) or infeasible",
+    labels=("outcome",),
+)
+SOLVER_DURATION = metrics.histogram(
+    "productionplan_solver_duration_seconds",
+    "Duration of the sort and dispatch stages by solver engine",
+    labels=("engine",),
+)
+CACHE_LOOKUPS = metrics.counter(
+    "productionplan_cache_lookups_total",
+    "Plan cache lookups by result",
+    labels=("result",),
+)
+COALESCED_REQUESTS = metrics.counter(
+    "productionplan_coalesced_requests_total",
+    "Plan cache misses by role: leader (calculated the plan) or coalesced (shared a calculation)",
+    labels=("role",),
+)
+
+
+def solver_seconds(timings: Dict[str, float]) -> float:
+    """Return the seconds a solve spent in the solver, its "sort" and "dispatch" stages."""
+    return timings.get("sort", 0.0) + timings.get("dispatch", 0.0)
+
+
+def observe_solve(
+    size: int,
+    outcome: str,
+    timings: Optional[Dict[str, float]] = None,
+    engine: Optional[str] = None,
+) -> None:
+    """Record a solve of a fleet.
+
+    Args:
+        size: The number of power plants of the fleet
+        outcome: "success", "fallback", "gave_up" or "infeasible"
+        timings: The seconds spent in every stage of the solve
+        engine: The name of the solver engine that solved the fleet
+    """
+    FLEET_SIZE.observe(size)
+    SOLVER_OUTCOMES.inc(outcome=outcome)
+    for stage, seconds in (timings or {}).items():
+        STAGE_DURATION.observe(seconds, stage=stage)
+    if engine is not None and timings is not None:
+        SOLVER_DURATION.observe(solver_seconds(timings), engine=engine)
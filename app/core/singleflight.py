@@ -0,0 +1,63 @@
+"""Coalescing of identical in-flight calculations."""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Run one calculation per key at a time and share its result with every concurrent caller.
+
+    The first caller of a key starts the calculation as a task, callers that arrive while it runs
+    wait on the same task instead of starting their own. The task is shielded, so a caller that
+    is cancelled, e.g. by a client that disconnects, does not cancel the calculation of the
+    others. A failed calculation raises its exception in every caller. Once the task is done the
+    key is free again, later callers start a new calculation.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the single flight group."""
+        self.leaders = 0
+        self.coalesced = 0
+        self._calls: Dict[str, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        """Return the number of calculations in flight."""
+        return len(self._calls)
+
+    def __contains__(self, key: object) -> bool:
+        """Return whether a calculation of the key is in flight."""
+        return key in self._calls
+
+    async def do(self, key: str, func: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """Return the result of func() or of the calculation of the key that is in flight.
+
+        Args:
+            key: The key of the calculation, equal keys must give equal results
+            func: Starts the calculation
+
+        Returns:
+            The result and whether it was shared from a calculation that was already in flight
+        """
+        call = self._calls.get(key)
+        shared = call is not None
+        if call is None:
+            self.leaders += 1
+            call = asyncio.ensure_future(func())
+            self._calls[key] = call
+            call.add_done_callback(lambda _: self._calls.pop(key, None))
+        else:
+            self.coalesced += 1
+            logger.debug("Coalesced a request with the calculation of %s", key)
+        return await asyncio.shield(call), shared
+
+    def stats(self) -> Dict[str, int]:
+        """Return the number of calculations in flight and the leader and coalesced counters."""
+        return {"in_flight": len(self._calls), "leaders": self.leaders, "coalesced": self.coalesced}
+
+
+plan_flights = SingleFlight()
@@ -0,0 +1,57 @@
+"""Fixed-point power units.
+
+The dispatch engine works on integer multiples of settings.PRECISION, called units, e.g. 4531
+units of 0.1 MW for 453.1 MW. Power values are converted at the schema boundary and when the
+production plan is written back, in between all sums and comparisons are exact.
+"""
+
+import math
+
+from app.core.config import settings
+
+# Number of units in one MW
+UNITS_PER_MW: int = round(1 / settings.PRECISION)
+# Values this close to a whole unit count as that unit, it absorbs the error of float input
+TOLERANCE = 1e-9
+
+
+def to_units(value: float, rounding: str = "nearest") -> int:
+    """Convert a power value in MW to an integer number of units.
+
+    Args:
+        value: The power value in MW
+        rounding: "nearest", "floor" or "ceil"
+
+    Returns:
+        The number of units
+
+    Raises:
+        ValueError: If the value is not a finite number
+    """
+    steps = value * UNITS_PER_MW
+    if not math.isfinite(steps):
+        raise ValueError(f"Power must be a finite number, got {value}")
+    if rounding == "floor":
+        return math.floor(steps + TOLERANCE)
+    if rounding == "ceil":
+        return math.ceil(steps - TOLERANCE)
+    return round(steps)
+
+
+def from_units(units: int) -> float:
+    """Convert a number of units to MW.
+
+    The division of two integers is correctly rounded, so 4531 units give exactly the float 453.1.
+
+    Args:
+        units: The number of units
+
+    Returns:
+        The power value in MW
+    """
+    return units / UNITS_PER_MW
+
+
+def is_multiple(value: float) -> bool:
+    """Return True if the power value is a whole number of units."""
+    return from_units(to_units(value)) == value
@@ -1,17 +1,26 @@
 """Main application entry point."""
 
 import logging
+import math
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator, Dict
+from typing import Any, AsyncGenerator, Dict
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse
 from starlette.middleware.cors import CORSMiddleware
-from starlette.responses import RedirectResponse
+from starlette.responses import PlainTextResponse, RedirectResponse
 
 from app.api.routes.v1.router import api_router
 from app.core.config import settings
-from app.core.logging import configure_logging
+from app.core.exceptions import CostOverflowError
+from app.core.executor import solver_executor
+from app.core.logging import configure_logging, stop_logging
+from app.core.metrics import metrics
+from app.core.singleflight import plan_flights
 from app.middleware import RequestLoggingMiddleware
+from app.models.fleet import fleet_registry
 
 # Get logger for this module
 logger = logging.getLogger(__name__)
@@ -19,11 +28,45 @@ logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
-    """Lifespan for the FastAPI application."""
+    """Lifespan for the FastAPI application.
+
+    The server stops accepting requests and lets the in-flight requests finish before the
+    shutdown runs, then the solver pool finishes its running solves and the queued log records
+    are written.
+    """
     configure_logging()
-    logger.info(f"Starting {settings.PROJECT_NAME}")
+    logger.info("Starting %s", settings.PROJECT_NAME)
     yield
-    logger.info(f"Shutting down {settings.PROJECT_NAME}")
+    logger.info("Shutting down %s", settings.PROJECT_NAME)
+    solver_executor.shutdown()
+    stop_logging()
+
+
+async def validation_exception_handler(
+    request: Request, exc: RequestValidationError
+) -> JSONResponse:
+    """Return the validation errors of a request with the status code 422.
+
+    The errors repeat the rejected input, JSON has no Infinity and NaN so non-finite numbers are
+    returned as strings, the default handler fails on them with a 500.
+    """
+    errors = jsonable_encoder(
+        exc.errors(), custom_encoder={float: lambda v: v if math.isfinite(v) else str(v)}
+    )
+    return JSONResponse(
+        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, content={"detail": errors}
+    )
+
+
+async def cost_overflow_exception_handler(request: Request, exc: CostOverflowError) -> JSONResponse:
+    """Return the error of a fleet whose costs overflow with the status code 422.
+
+    Every route that prices power plants can raise it, whether it solves one plan, a batch, a
+    load curve, a horizon or a sweep, so it is handled once for the whole application.
+    """
+    return JSONResponse(
+        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, content={"detail": exc.message}
+    )
 
 
 def get_application() -> FastAPI:
@@ -36,6 +79,7 @@ def get_application() -> FastAPI:
         title=settings.PROJECT_NAME,
         description=settings.PROJECT_DESCRIPTION,
         debug=settings.DEBUG,
+        lifespan=lifespan,
     )
     application.add_middleware(
         CORSMiddleware,
@@ -45,6 +89,8 @@ def get_application() -> FastAPI:
         allow_headers=["*"],
     )
     application.add_middleware(RequestLoggingMiddleware)
+    application.add_exception_handler(RequestValidationError, validation_exception_handler)
+    application.add_exception_handler(CostOverflowError, cost_overflow_exception_handler)
     application.include_router(api_router, prefix=settings.API_V1_STR)
     return application
 
@@ -52,6 +98,18 @@ def get_application() -> FastAPI:
 app = get_application()
 
 
+def warm_up() -> None:
+    """Build the state of the app that is otherwise built by the first request.
+
+    The production server calls it before forking its workers, so they share it copy-on-write
+    instead of building it each. That includes the stored fleets, whose column files stay
+    memory-mapped in every worker.
+    """
+    app.openapi()
+    app.middleware_stack = app.build_middleware_stack()
+    fleet_registry.warm_up()
+
+
 @app.get("/", tags=["Root"])  # type: ignore
 def root() -> RedirectResponse:
     """Redirect to API documentation."""
@@ -62,3 +120,21 @@ def root() -> RedirectResponse:
 def health_check() -> Dict[str, str]:
     """Health check endpoint."""
     return {"status": "ok"}
+
+
+@app.get("/health/executor", tags=["Health"])  # type: ignore
+def executor_health() -> Dict[str, Any]:
+    """Queue depth and counters of the solver executor."""
+    return solver_executor.stats()
+
+
+@app.get("/health/singleflight", tags=["Health"])  # type: ignore
+def singleflight_health() -> Dict[str, int]:
+    """Production plan calculations in flight and the requests that led or shared one."""
+    return plan_flights.stats()
+
+
+@app.get("/metrics", tags=["Health"], response_class=PlainTextResponse)  # type: ignore
+def prometheus_metrics() -> PlainTextResponse:
+    """Request latencies, solver stage timings, fleet sizes, solver outcomes and cache lookups."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
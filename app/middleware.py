@@ -2,53 +2,123 @@
 
 import logging
 import time
-from typing import Callable
+from typing import Any, Dict, Optional
 from uuid import uuid4
 
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import REQUEST_DURATION
 
 logger = logging.getLogger(__name__)
 
+REQUEST_ID_HEADER = b"x-request-id"
 
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
-    """Middleware for logging HTTP requests and responses."""
 
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        """Dispatch the request."""
-        request_id = str(uuid4())
-        request.state.request_id = request_id
+def route_template(scope: Scope) -> str:
+    """Return the path template of the matched route, e.g. /api/v1/fleets/{fleet_id}.
 
-        # Log the request
-        logger.info(f"Request {request_id} started: {request.method} {request.url.path}")
+    Unmatched paths share one label so the metrics do not grow with every path that is probed.
+    """
+    route = scope.get("route")
+    return getattr(route, "path", "unmatched")
 
-        # Log request headers in debug level
-        headers = dict(request.headers.items())
-        # Remove sensitive information
-        if "authorization" in headers:
-            headers["authorization"] = "***"
-        logger.debug(f"Request {request_id} headers: {headers}")
 
-        # Process the request and measure time
-        start_time = time.time()
+class RequestLoggingMiddleware:
+    """ASGI middleware for logging HTTP requests and responses.
 
-        try:
-            response = await call_next(request)
+    Every request gets a request id, taken from the X-Request-ID header of the request when the
+    client sent one. It is stored in request.state.request_id and returned in the X-Request-ID
+    header of the response. Only every sample_rate-th request is logged, failed requests are
+    always logged and the duration of every request is recorded in the metrics.
+    """
 
-            # Log the response
-            process_time = time.time() - start_time
-            logger.info(
-                f"Request {request_id} completed: {request.method} {request.url.path} "
-                f"- Status: {response.status_code} - Duration: {process_time:.3f}s"
-            )
+    def __init__(self, app: ASGIApp, sample_rate: Optional[int] = None) -> None:
+        """Initialize the middleware.
+
+        Args:
+            app: The wrapped ASGI application
+            sample_rate: Log every sample_rate-th request, defaults to settings.LOG_SAMPLE_RATE
+        """
+        self.app = app
+        self.sample_rate = max(1, sample_rate or settings.LOG_SAMPLE_RATE)
+        self.requests = 0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Handle a request."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = self._request_id(scope)
+        scope.setdefault("state", {})["request_id"] = request_id
+        self.requests += 1
+        sampled = self.requests % self.sample_rate == 0
+        method, path = scope["method"], scope["path"]
+        if sampled:
+            logger.info("Request %s started: %s %s", request_id, method, path)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Request %s headers: %s", request_id, self._headers(scope))
+
+        status_code = 500
+        response_id = request_id.encode("latin-1")
 
-            return response
+        async def send_with_request_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = [*message.get("headers", []), (REQUEST_ID_HEADER, response_id)]
+            await send(message)
 
+        start_time = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_request_id)
         except Exception as e:
-            # Log any exceptions that occur during request handling
-            process_time = time.time() - start_time
+            process_time = time.perf_counter() - start_time
+            self._observe(scope, method, 500, process_time)
             logger.error(
-                f"Request {request_id} failed: {request.method} {request.url.path} "
-                f"- Duration: {process_time:.3f}s - Error: {str(e)}"
+                "Request %s failed: %s %s - Duration: %.3fs - Error: %s",
+                request_id,
+                method,
+                path,
+                process_time,
+                e,
             )
             raise
+
+        process_time = time.perf_counter() - start_time
+        self._observe(scope, method, status_code, process_time)
+        if sampled:
+            logger.info(
+                "Request %s completed: %s %s - Status: %d - Duration: %.3fs",
+                request_id,
+                method,
+                path,
+                status_code,
+                process_time,
+            )
+
+    @staticmethod
+    def _request_id(scope: Scope) -> str:
+        """Return the X-Request-ID header of the request or a new request id."""
+        for name, value in scope["headers"]:
+            if name == REQUEST_ID_HEADER and 0 < len(value) <= 128:
+                return value.decode("latin-1")
+        return str(uuid4())
+
+    @staticmethod
+    def _headers(scope: Scope) -> Dict[str, Any]:
+        """Return the request headers without sensitive information."""
+        headers = {
+            name.decode("latin-1"): value.decode("latin-1") for name, value in scope["headers"]
+        }
+        if "authorization" in headers:
+            headers["authorization"] = "***"
+        return headers
+
+    @staticmethod
+    def _observe(scope: Scope, method: str, status_code: int, process_time: float) -> None:
+        """Record the duration of the request in the metrics."""
+        REQUEST_DURATION.observe(
+            process_time, method=method, route=route_template(scope), status=str(status_code)
+        )
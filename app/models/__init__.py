@@ -1,13 +1,37 @@
 """Models for the application."""
 
-from app.models.meritorder import MeritOrder
-from app.models.powerplants import GasFired, PowerPlant, TurboJet, WindTurbine, power_plant_factory
+from app.models.costcurve import CostCurve
+from app.models.fleet import Fleet, FleetRegistry
+from app.models.fleetstore import FleetStore, StoredFleet
+from app.models.meritorder import MeritOrder, merit_order_key
+from app.models.powerplants import (
+    GasFired,
+    PowerPlant,
+    TurboJet,
+    WindTurbine,
+    create_power_plant,
+    power_plant_factory,
+)
+from app.models.registry import SolverRegistry, solver_registry
+from app.models.unitcommitment import UnitCommitment
+from app.models.vectorized import FleetArrays
 
 __all__ = [
+    "CostCurve",
+    "Fleet",
+    "FleetRegistry",
+    "FleetStore",
+    "StoredFleet",
     "MeritOrder",
+    "merit_order_key",
     "PowerPlant",
     "WindTurbine",
     "TurboJet",
     "GasFired",
     "power_plant_factory",
+    "create_power_plant",
+    "SolverRegistry",
+    "solver_registry",
+    "UnitCommitment",
+    "FleetArrays",
 ]
@@ -0,0 +1,160 @@
+"""Cost curve models for the application."""
+
+import logging
+from bisect import bisect_right
+from itertools import accumulate
+from typing import List, Tuple
+
+import numpy as np
+
+from app.core.exceptions import InfeasibleLoadError
+from app.core.units import UNITS_PER_MW, from_units, to_units
+from app.models.powerplants import PowerPlant
+
+logger = logging.getLogger(__name__)
+
+
+class CostCurve:
+    """This class indexes the merit order plan of a fleet as a piecewise linear function of load.
+
+    The breakpoints are the cumulative real_pmax of the power plants in merit order. A load is
+    located with a binary search over the breakpoints, the plants before it run at real_pmax and
+    the marginal plant covers the rest. When the rest is below the pmin of the marginal plant the
+    previous plant is backed off, exactly like MeritOrder.set_loads. Power values are indexed in
+    integer units of settings.PRECISION, loads are converted when they are located. The index is
+    only valid for the fuels the power plants were priced with.
+    """
+
+    def __init__(self, power_plants: List[PowerPlant]) -> None:
+        """
+        Initialize the CostCurve object.
+
+        :param power_plants: List of power plants, sorted in merit order
+        """
+        self.names = [pp.name for pp in power_plants]
+        self.pmins = [pp.pmin_units for pp in power_plants]
+        self.pmaxs = [pp.pmax_units for pp in power_plants]
+        self.costs = [pp.cost_per_mw for pp in power_plants]
+        self.breakpoints = list(accumulate(self.pmaxs))
+        # cost in euros of the plants up to every breakpoint
+        self.cumulative_costs = list(
+            accumulate(c * p / UNITS_PER_MW for c, p in zip(self.costs, self.pmaxs))
+        )
+        self._breakpoints = np.array(self.breakpoints, dtype=np.int64)
+        self._cumulative_costs = np.array(self.cumulative_costs, dtype=np.float64)
+        logger.debug("Built cost curve with %d breakpoints", len(self.breakpoints))
+
+    def __len__(self) -> int:
+        """Return the number of power plants in the index."""
+        return len(self.names)
+
+    @property
+    def capacity(self) -> float:
+        """Return the total real_pmax of the fleet in MW."""
+        return from_units(self.breakpoints[-1]) if self.breakpoints else 0.0
+
+    def _locate(self, load: float) -> Tuple[int, int, int]:
+        """Find the marginal plant of a load.
+
+        :param load: The load to locate in MW
+        :return: The number of plants at real_pmax, the remaining units for the marginal plant
+            and how many units the previous plant has to be backed off
+        :raises InfeasibleLoadError: If the merit order plan can not meet the load
+        """
+        units = to_units(load)
+        full = bisect_right(self.breakpoints, units)
+        remaining = units - (self.breakpoints[full - 1] if full else 0)
+        if full == len(self):
+            if remaining > 0:
+                raise InfeasibleLoadError(
+                    load, f"Total available capacity ({self.capacity}) is too low"
+                )
+            return full, 0, 0
+        shortfall = self.pmins[full] - remaining if remaining > 0 else 0
+        if shortfall > 0:
+            if full < 1:
+                raise InfeasibleLoadError(load, "There is no previous powerplant to reduce")
+            if self.pmaxs[full - 1] - shortfall < self.pmins[full - 1]:
+                raise InfeasibleLoadError(
+                    load, "The previous powerplant needs to be reduced too much"
+                )
+        return full, remaining, max(shortfall, 0)
+
+    def plan(self, load: float) -> List[float]:
+        """Return the power output of every plant in merit order for a load.
+
+        :param load: The load to dispatch
+        :return: The power outputs in merit order
+        """
+        full, remaining, shortfall = self._locate(load)
+        outputs = self.pmaxs[:full] + [0] * (len(self) - full)
+        if remaining > 0:
+            outputs[full] = remaining
+        if shortfall > 0:
+            outputs[full - 1] = self.pmaxs[full - 1] - shortfall
+            outputs[full] = self.pmins[full]
+        return [from_units(units) for units in outputs]
+
+    def set_loads(self, power_plants: List[PowerPlant], load: float) -> None:
+        """Set the power output of the indexed power plants for a load.
+
+        :param power_plants: The power plants the index was built from, in the same order
+        :param load: The load to dispatch
+        """
+        for pp, p in zip(power_plants, self.plan(load)):
+            pp.p = p
+
+    def total_cost(self, load: float) -> float:
+        """Return the cost of the merit order plan of a load in euros."""
+        full, remaining, shortfall = self._locate(load)
+        cost = self.cumulative_costs[full - 1] if full else 0.0
+        if remaining > 0:
+            cost += self.costs[full] * remaining / UNITS_PER_MW
+        if shortfall > 0:
+            cost += (self.costs[full] - self.costs[full - 1]) * shortfall / UNITS_PER_MW
+        return cost
+
+    def marginal_cost(self, load: float) -> float:
+        """Return the cost per MW of the marginal plant of a load in euros/MWh.
+
+        At a breakpoint the marginal plant is the last plant running at real_pmax, without load
+        there is no marginal plant and the marginal cost is 0.
+        """
+        full, remaining, _ = self._locate(load)
+        if remaining > 0:
+            return self.costs[full]
+        return self.costs[full - 1] if full else 0.0
+
+    def evaluate(self, loads: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return the total and marginal cost of many loads at once.
+
+        :param loads: 1-D array with the loads in MW
+        :return: The total costs, the marginal costs and a boolean array that is False for the
+            loads the merit order plan can not meet, the costs of those loads are NaN
+        """
+        loads = np.rint(np.asarray(loads, dtype=np.float64) * UNITS_PER_MW).astype(np.int64)
+        count = len(self)
+        if count == 0:
+            zeros = np.zeros(len(loads))
+            return zeros, zeros.copy(), loads <= 0
+        pmins = np.array(self.pmins, dtype=np.int64)
+        pmaxs = np.array(self.pmaxs, dtype=np.int64)
+        costs = np.array(self.costs, dtype=np.float64)
+
+        full = np.searchsorted(self._breakpoints, loads, side="right")
+        previous = np.maximum(full - 1, 0)
+        index = np.minimum(full, count - 1)
+        remaining = loads - np.where(full > 0, self._breakpoints[previous], 0)
+        marginal = (full < count) & (remaining > 0)
+        shortfall = np.where(marginal, pmins[index] - remaining, 0)
+        backoff = shortfall > 0
+        feasible = np.where(full < count, True, remaining <= 0)
+        feasible &= ~backoff | ((full >= 1) & (pmaxs[previous] - shortfall >= pmins[previous]))
+
+        total = np.where(full > 0, self._cumulative_costs[previous], 0.0)
+        total += np.where(marginal, costs[index] * remaining / UNITS_PER_MW, 0.0)
+        total += np.where(backoff, (costs[index] - costs[previous]) * shortfall / UNITS_PER_MW, 0.0)
+        marginal_costs = np.where(marginal, costs[index], np.where(full > 0, costs[previous], 0.0))
+        total[~feasible] = np.nan
+        marginal_costs[~feasible] = np.nan
+        return total, marginal_costs, feasible
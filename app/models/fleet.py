@@ -0,0 +1,180 @@
+"""Fleet models for repeated production planning of the same power plants."""
+
+import heapq
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from uuid import uuid4
+
+from app.core.config import settings
+from app.models.fleetstore import FleetStore, fleet_store
+from app.models.meritorder import merit_order_key
+from app.models.powerplants import PowerPlant, check_costs, fuel_prices, power_plant_factory
+from app.schemas import FuelsIn, PowerPlantIn
+
+logger = logging.getLogger(__name__)
+
+
+class Fleet:
+    """This class keeps the power plants of a fleet sorted between production plans.
+
+    The power plants are grouped by type, every group depends on its own fuels. When the fuels
+    change only the groups whose fuels changed are repriced and resorted, after which the sorted
+    groups are merged into the merit order of the whole fleet.
+    """
+
+    def __init__(self, fleet_id: str, powerplants: List[PowerPlantIn], version: int = 1) -> None:
+        """
+        Initialize the Fleet object.
+
+        :param fleet_id: Identifier of the fleet
+        :param powerplants: The power plants of the fleet
+        :param version: Version of the fleet in the fleet store
+        """
+        self.fleet_id = fleet_id
+        self.version = version
+        self.powerplants = powerplants
+        self.fuels: Optional[FuelsIn] = None
+        self.groups: Dict[PowerPlantIn.Type, List[PowerPlant]] = {}
+        # the power plants in the order of the input
+        self.power_plants: List[PowerPlant] = []
+        self.merit_order: List[PowerPlant] = []
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return the number of power plants in the fleet."""
+        return len(self.powerplants)
+
+    def update_fuels(self, fuels: FuelsIn) -> List[PowerPlant]:
+        """Reprice the power plants for the fuels and return them in merit order.
+
+        :param fuels: Fuels input schema
+        :return: The power plants sorted by merit_order_key
+        :raises CostOverflowError: If the cost of the power plants at their pmax is not finite
+        """
+        prices = fuel_prices(fuels)
+        if self.fuels is None:
+            logger.info("Creating %d power plants for fleet %s", len(self), self.fleet_id)
+            self.power_plants = [
+                power_plant_factory(pp, fuels, prices.get(pp.type)) for pp in self.powerplants
+            ]
+            for pp_in, pp in zip(self.powerplants, self.power_plants):
+                self.groups.setdefault(pp_in.type, []).append(pp)
+            changed = list(self.groups.values())
+        else:
+            changed = []
+            for plant_type, group in self.groups.items():
+                if any(
+                    getattr(fuels, field) != getattr(self.fuels, field)
+                    for field in group[0].fuel_fields
+                ):
+                    changed.append(group)
+                    for pp in group:
+                        pp.update_fuels(fuels, prices.get(plant_type))
+        logger.debug(
+            "Repricing %d of %d groups of %s", len(changed), len(self.groups), self.fleet_id
+        )
+        if changed or not self.merit_order:
+            for group in changed:
+                group.sort(key=merit_order_key)
+            self.merit_order = list(heapq.merge(*self.groups.values(), key=merit_order_key))
+        self.fuels = fuels
+        check_costs(self.merit_order)
+        return self.merit_order
+
+
+class FleetRegistry:
+    """Registry of fleets that are stored in a FleetStore and kept in memory.
+
+    Every registration or update stores a new version of the fleet, so a fleet registered by one
+    worker is loaded from the store by the other workers and after a restart. The newest version
+    of at most max_size fleets is kept in memory, the least recently used one is dropped above it.
+    """
+
+    def __init__(self, max_size: int, store: FleetStore) -> None:
+        """
+        Initialize the FleetRegistry object.
+
+        :param max_size: Maximum number of fleets kept in memory
+        :param store: The store of the fleet versions
+        """
+        self.max_size = max_size
+        self.store = store
+        self._fleets: OrderedDict[str, Fleet] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return the number of fleets kept in memory."""
+        return len(self._fleets)
+
+    def _keep(self, fleet: Fleet) -> None:
+        """Keep a fleet in memory and drop the least recently used fleets above the maximum size."""
+        with self._lock:
+            self._fleets[fleet.fleet_id] = fleet
+            self._fleets.move_to_end(fleet.fleet_id)
+            while len(self._fleets) > self.max_size:
+                dropped, _ = self._fleets.popitem(last=False)
+                logger.info("Dropped fleet %s from memory", dropped)
+
+    def register(self, powerplants: List[PowerPlantIn]) -> Fleet:
+        """Register the power plants as a new fleet.
+
+        :param powerplants: The power plants of the fleet
+        :return: The registered fleet
+        """
+        fleet_id = uuid4().hex
+        fleet = Fleet(fleet_id, powerplants, self.store.save(fleet_id, powerplants))
+        self._keep(fleet)
+        logger.info("Registered fleet %s with %d power plants", fleet.fleet_id, len(fleet))
+        return fleet
+
+    def update(self, fleet_id: str, powerplants: List[PowerPlantIn]) -> Optional[Fleet]:
+        """Store the power plants as the next version of a registered fleet.
+
+        :param fleet_id: The id of the fleet
+        :param powerplants: The power plants of the new version
+        :return: The new version of the fleet or None if the fleet is not registered
+        """
+        if not self.store.versions(fleet_id):
+            return None
+        fleet = Fleet(fleet_id, powerplants, self.store.save(fleet_id, powerplants))
+        self._keep(fleet)
+        logger.info("Updated fleet %s to version %d", fleet_id, fleet.version)
+        return fleet
+
+    def get(self, fleet_id: str, version: Optional[int] = None) -> Optional[Fleet]:
+        """Return a version of a fleet, from memory or from the store.
+
+        :param fleet_id: The id of the fleet
+        :param version: The version, None for the newest one
+        :return: The fleet or None if the fleet or the version is not registered
+        """
+        newest = self.store.latest_version(fleet_id)
+        if newest is None:
+            return None
+        fleet = self._fleets.get(fleet_id)
+        if fleet is not None and fleet.version == (version or newest):
+            return fleet
+        stored = self.store.load(fleet_id, version or newest)
+        if stored is None:
+            return None
+        fleet = Fleet(fleet_id, stored.powerplants(), stored.version)
+        if fleet.version == newest:
+            self._keep(fleet)
+        return fleet
+
+    def remove(self, fleet_id: str) -> bool:
+        """Remove all versions of a fleet and return whether it was registered."""
+        with self._lock:
+            self._fleets.pop(fleet_id, None)
+        return self.store.delete(fleet_id)
+
+    def warm_up(self) -> None:
+        """Load the newest version of up to max_size stored fleets into memory."""
+        for fleet_id in self.store.fleet_ids()[: self.max_size]:
+            self.get(fleet_id)
+        logger.info("Loaded %d stored fleets", len(self))
+
+
+fleet_registry = FleetRegistry(settings.FLEET_REGISTRY_MAX_SIZE, fleet_store)
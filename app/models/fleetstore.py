@@ -0,0 +1,260 @@
+"""Persistent storage of fleets as memory-mapped column files."""
+
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.models.powerplants import PowerPlant, create_power_plant, fuel_prices
+from app.schemas import FuelsIn, PowerPlantIn
+from app.schemas.fastpath import PlantValues
+
+logger = logging.getLogger(__name__)
+
+# the plant types by their code in the type column
+PLANT_TYPES = tuple(plant_type.value for plant_type in PowerPlantIn.Type)
+FLEET_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+# a directory modified less than this many nanoseconds ago can change again without a new
+# modification time, its listing is not cached
+RACY_NS = 1_000_000_000
+
+
+class StoredFleet:
+    """This class gives read only access to a version of a stored fleet.
+
+    Every column is a .npy file that is memory-mapped, the pages are loaded on first use and
+    shared by all processes that map the same file. Names are stored as UTF-8 bytes and types as
+    codes into PLANT_TYPES, pmin and pmax are stored after the rounding of PowerPlantIn. The
+    columns are decoded into plant values once, on first use, and reused for every production
+    plan of the version.
+    """
+
+    COLUMNS = ("name", "type", "efficiency", "pmin", "pmax")
+
+    def __init__(self, fleet_id: str, version: int, path: str) -> None:
+        """
+        Initialize the StoredFleet object.
+
+        :param fleet_id: Identifier of the fleet
+        :param version: Version of the fleet
+        :param path: Directory with the column files of the version
+        """
+        self.fleet_id = fleet_id
+        self.version = version
+        self.names, self.types, self.efficiency, self.pmin, self.pmax = (
+            np.load(os.path.join(path, f"{column}.npy"), mmap_mode="r") for column in self.COLUMNS
+        )
+        self._values: Optional[List[PlantValues]] = None
+
+    def __len__(self) -> int:
+        """Return the number of power plants in the fleet."""
+        return len(self.types)
+
+    @staticmethod
+    def write(path: str, powerplants: List[PowerPlantIn]) -> None:
+        """Write the column files of validated power plants to a directory.
+
+        :param path: The directory, it must exist
+        :param powerplants: The validated power plants
+        """
+        columns = {
+            "name": np.array([pp.name.encode() for pp in powerplants], dtype=np.bytes_),
+            "type": np.array(
+                [PLANT_TYPES.index(pp.type.value) for pp in powerplants], dtype=np.uint8
+            ),
+            "efficiency": np.array([pp.efficiency for pp in powerplants], dtype=np.float64),
+            "pmin": np.array([pp.pmin for pp in powerplants], dtype=np.float64),
+            "pmax": np.array([pp.pmax for pp in powerplants], dtype=np.float64),
+        }
+        for column, values in columns.items():
+            np.save(os.path.join(path, f"{column}.npy"), values)
+
+    def plant_values(self) -> List[PlantValues]:
+        """Return the name, type, efficiency, pmin and pmax of every power plant.
+
+        The values are decoded from the columns on the first call, the version never changes.
+        """
+        if self._values is None:
+            self._values = list(
+                zip(
+                    [name.decode() for name in self.names.tolist()],
+                    [PLANT_TYPES[code] for code in self.types.tolist()],
+                    self.efficiency.tolist(),
+                    self.pmin.tolist(),
+                    self.pmax.tolist(),
+                )
+            )
+        return self._values
+
+    def create_power_plants(self, fuels: FuelsIn) -> List[PowerPlant]:
+        """Create the power plant objects straight from the columns, without validating them again.
+
+        :param fuels: Fuels input schema
+        :return: The power plants in the order of the fleet
+        """
+        prices = fuel_prices(fuels)
+        return [
+            create_power_plant(
+                plant_type, name, efficiency, pmin, pmax, fuels, prices.get(plant_type)
+            )
+            for name, plant_type, efficiency, pmin, pmax in self.plant_values()
+        ]
+
+    def powerplants(self) -> List[PowerPlantIn]:
+        """Return the power plants as input schemas, they were validated when they were stored."""
+        return [
+            PowerPlantIn.model_construct(
+                name=name,
+                type=PowerPlantIn.Type(plant_type),
+                efficiency=efficiency,
+                pmin=pmin,
+                pmax=pmax,
+            )
+            for name, plant_type, efficiency, pmin, pmax in self.plant_values()
+        ]
+
+
+class FleetStore:
+    """Versions of fleets stored in a directory, every version is written once and never changed.
+
+    A version is written to a temporary directory and renamed into place, so processes that read
+    the store never see a partly written version. When two processes store a version of the same
+    fleet at the same time the rename of the second fails and it takes the next version.
+
+    The versions of a fleet are listed again only when the modification time of its directory
+    changed, a version stored by another process adds an entry and so changes it.
+    """
+
+    def __init__(self, directory: str, max_open: int) -> None:
+        """
+        Initialize the FleetStore object.
+
+        :param directory: Directory of the stored fleets, it is created on the first save
+        :param max_open: Maximum number of memory-mapped versions kept open
+        """
+        self.directory = directory
+        self.max_open = max_open
+        self._open: OrderedDict[Tuple[str, int], StoredFleet] = OrderedDict()
+        # the modification time of the directory of a fleet and its versions at that time
+        self._versions: Dict[str, Tuple[int, List[int]]] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, fleet_id: str, version: Optional[int] = None) -> str:
+        """Return the directory of a fleet or of a version of it."""
+        if version is None:
+            return os.path.join(self.directory, fleet_id)
+        return os.path.join(self.directory, fleet_id, str(version))
+
+    def versions(self, fleet_id: str) -> List[int]:
+        """Return the stored versions of a fleet, oldest first, empty for an unknown fleet."""
+        if not FLEET_ID_PATTERN.match(fleet_id):
+            return []
+        try:
+            mtime = os.stat(self._path(fleet_id)).st_mtime_ns
+            cached = self._versions.get(fleet_id)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+            entries = os.listdir(self._path(fleet_id))
+        except FileNotFoundError:
+            self._versions.pop(fleet_id, None)
+            return []
+        versions = sorted(int(entry) for entry in entries if entry.isdigit())
+        if time.time_ns() - mtime > RACY_NS:
+            self._versions[fleet_id] = (mtime, versions)
+        return versions
+
+    def latest_version(self, fleet_id: str) -> Optional[int]:
+        """Return the newest version of a fleet or None if it is not stored."""
+        versions = self.versions(fleet_id)
+        return versions[-1] if versions else None
+
+    def fleet_ids(self) -> List[str]:
+        """Return the ids of the stored fleets."""
+        try:
+            entries = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return [entry for entry in entries if FLEET_ID_PATTERN.match(entry)]
+
+    def save(self, fleet_id: str, powerplants: List[PowerPlantIn]) -> int:
+        """Store the power plants as the next version of a fleet.
+
+        :param fleet_id: Identifier of the fleet, 32 lowercase hex digits
+        :param powerplants: The validated power plants
+        :return: The version the power plants were stored as
+        """
+        if not FLEET_ID_PATTERN.match(fleet_id):
+            raise ValueError(f"Invalid fleet id: {fleet_id}")
+        os.makedirs(self._path(fleet_id), exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=".staging-", dir=self._path(fleet_id))
+        try:
+            StoredFleet.write(staging, powerplants)
+            while True:
+                version = (self.latest_version(fleet_id) or 0) + 1
+                try:
+                    os.rename(staging, self._path(fleet_id, version))
+                    break
+                except OSError:
+                    if not os.path.isdir(self._path(fleet_id, version)):
+                        raise
+                    logger.debug("Version %d of fleet %s was taken, retrying", version, fleet_id)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        logger.info(
+            "Stored version %d of fleet %s with %d power plants",
+            version,
+            fleet_id,
+            len(powerplants),
+        )
+        return version
+
+    def load(self, fleet_id: str, version: Optional[int] = None) -> Optional[StoredFleet]:
+        """Return a version of a stored fleet, memory-mapped.
+
+        :param fleet_id: Identifier of the fleet
+        :param version: The version, None for the newest one
+        :return: The stored fleet or None if the fleet or the version is not stored
+        """
+        if version is None:
+            version = self.latest_version(fleet_id)
+            if version is None:
+                return None
+        key = (fleet_id, version)
+        with self._lock:
+            stored = self._open.get(key)
+            if stored is not None:
+                self._open.move_to_end(key)
+                return stored
+        if version not in self.versions(fleet_id):
+            return None
+        stored = StoredFleet(fleet_id, version, self._path(fleet_id, version))
+        with self._lock:
+            self._open[key] = stored
+            while len(self._open) > self.max_open:
+                self._open.popitem(last=False)
+        logger.debug("Opened version %d of fleet %s", version, fleet_id)
+        return stored
+
+    def delete(self, fleet_id: str) -> bool:
+        """Delete all versions of a fleet and return whether it was stored."""
+        if not self.versions(fleet_id):
+            return False
+        with self._lock:
+            for key in [key for key in self._open if key[0] == fleet_id]:
+                del self._open[key]
+        self._versions.pop(fleet_id, None)
+        shutil.rmtree(self._path(fleet_id), ignore_errors=True)
+        logger.info("Deleted fleet %s", fleet_id)
+        return True
+
+
+fleet_store = FleetStore(settings.FLEET_STORAGE_DIR, settings.FLEET_REGISTRY_MAX_SIZE)
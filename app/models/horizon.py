@@ -0,0 +1,507 @@
+"""Rolling-horizon planning of intervals with ramp rates and minimum up and down times."""
+
+import logging
+import math
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from app.core.config import settings
+from app.core.exceptions import InfeasibleLoadError
+from app.core.metrics import span
+from app.core.units import UNITS_PER_MW, from_units, to_units
+from app.models.fleet import Fleet
+from app.models.unitcommitment import FREE, OFF, ON
+from app.schemas import FuelsIn, HorizonIn, PowerPlantIn, PowerPlantStateIn
+
+logger = logging.getLogger(__name__)
+
+# intervals in its state of a power plant whose history is not known, its minimum times are served
+LONG_AGO = 1 << 30
+# kinds of failures of an interval
+SHORTAGE = "shortage"
+EXCESS = "excess"
+# kinds of overrides: switch a plant on or off, run it at least or at most a power
+RUN = "run"
+FLOOR = "floor"
+CAP = "cap"
+
+
+class PlantStates(NamedTuple):
+    """The state of every power plant after an interval, in the order of the input."""
+
+    # True when switched on, None when not known before the first interval
+    on: List[Optional[bool]]
+    # power in units of settings.PRECISION
+    p: List[int]
+    # number of intervals the power plant has been in its state
+    since: List[int]
+
+
+class Failure(NamedTuple):
+    """An interval that could not be dispatched."""
+
+    interval: int
+    # SHORTAGE when the power plants can not reach the load, EXCESS when they can not go below it
+    kind: str
+    # the units the power plants are short of or in excess of the load
+    amount: int
+    # the power plant whose override at the interval could not be honored, None for the load
+    plant: Optional[int] = None
+
+
+class HorizonPlan(NamedTuple):
+    """The production plans of the intervals of a horizon."""
+
+    # the power of every power plant (rows) in every interval (columns) in MW
+    p: List[List[float]]
+    # the cost of every interval in euros
+    costs: List[float]
+    # number of earlier decisions that were changed to make later intervals feasible
+    repairs: int
+    # seconds spent in the "sort" and "dispatch" stages
+    timings: Dict[str, float]
+
+
+class RollingHorizon:
+    """This class plans consecutive intervals that respect ramp rates and minimum up and down times.
+
+    Every interval is dispatched from the state the one before it left: the plants that have to
+    stay on or off are fixed, the others are switched on in merit order until they can cover the
+    load, like the greedy plan of UnitCommitment, and the load is filled in merit order within the
+    ramp limits. All power values are handled as integer multiples of settings.PRECISION.
+
+    The dispatch does not look ahead, `window` is how far back a failed interval may reach. When
+    an interval fails, e.g. because a plant that was switched off is still in its minimum down
+    time or could not ramp up in time, an override is added at one of the `window` intervals up
+    to it (keep the plant on, do not start it, run it above a floor or below a cap) and the
+    intervals are replanned from there. When no override helps, the latest one is undone and the
+    failure that needed it tries another. Intervals before the window of the newest interval are
+    final.
+    """
+
+    def __init__(
+        self,
+        powerplants: List[PowerPlantIn],
+        loads: List[float],
+        fuels: List[FuelsIn],
+        initial_state: Optional[List[PowerPlantStateIn]] = None,
+        window: Optional[int] = None,
+    ) -> None:
+        """
+        Initialize the RollingHorizon object.
+
+        :param powerplants: The power plants with their ramp rates and minimum up and down times
+        :param loads: The load of every interval
+        :param fuels: The fuels of every interval
+        :param initial_state: The state of the power plants before the first interval, the
+            power plants that are not in it are free in the first interval
+        :param window: Latest intervals whose decisions may be changed to repair a failed
+            interval, defaults to settings.HORIZON_WINDOW
+        """
+        self.powerplants = powerplants
+        self.loads = loads
+        self.fuels = fuels
+        self.window = window or settings.HORIZON_WINDOW
+        self.max_repairs = settings.HORIZON_MAX_REPAIRS
+        self.repairs = 0
+        # seconds spent in the "sort" and "dispatch" stages
+        self.timings: Dict[str, float] = {}
+        self.fleet = Fleet("horizon", powerplants)
+        self.targets = [to_units(load) for load in loads]
+        # the constraints of every power plant in units of settings.PRECISION and intervals
+        self.wind = [pp.type == PowerPlantIn.Type.windturbine for pp in powerplants]
+        self.pmins = [to_units(pp.pmin, "ceil") for pp in powerplants]
+        self.ramp_ups = [
+            math.inf if pp.ramp_up is None else to_units(pp.ramp_up) for pp in powerplants
+        ]
+        self.ramp_downs = [
+            math.inf if pp.ramp_down is None else to_units(pp.ramp_down) for pp in powerplants
+        ]
+        self.min_ups = [pp.min_up or 1 for pp in powerplants]
+        self.min_downs = [pp.min_down or 1 for pp in powerplants]
+        # the index in the input of every power plant of the fleet by its id
+        self.index: Dict[int, int] = {}
+        # the merit order, costs per MW and pmax in units of every interval, filled as it is reached
+        self.orders: List[List[int]] = []
+        self.costs: List[List[float]] = []
+        self.pmaxs: List[List[int]] = []
+        # the power in units and the state after every planned interval
+        self.outputs: List[List[int]] = []
+        self.states: List[PlantStates] = []
+        self.initial = self._initial_state(initial_state or [])
+        # the overrides of (interval, plant) by kind added by the repairs, and the undone ones
+        # by the number of overrides before them
+        self.overrides: Dict[Tuple[int, int], Dict[str, Any]] = {}
+        self.rejected: Dict[Tuple[int, int, str], int] = {}
+        # the (interval, plant, kind, previous value) of every override in the order it was added
+        self.history: List[Tuple[int, int, str, Any]] = []
+        # intervals before it left the window and are final
+        self.final = 0
+
+    def _initial_state(self, initial_state: List[PowerPlantStateIn]) -> PlantStates:
+        """Return the state before the first interval, unknown for plants without initial state."""
+        states = {state.name: state for state in initial_state}
+        on: List[Optional[bool]] = []
+        p, since = [], []
+        for pp in self.powerplants:
+            state = states.get(pp.name)
+            on.append(None if state is None else state.running)
+            p.append(0 if state is None else to_units(state.p))
+            since.append(LONG_AGO if state is None or state.intervals is None else state.intervals)
+        return PlantStates(on, p, since)
+
+    def _reach(self, interval: int) -> None:
+        """Reprice the fleet for the fuels of the intervals up to interval.
+
+        The fleet only resorts the groups of power plants whose fuels changed since the interval
+        before, and every interval is repriced once however often it is replanned.
+        """
+        with span(self.timings, "sort"):
+            while len(self.orders) <= interval:
+                merit_order = self.fleet.update_fuels(self.fuels[len(self.orders)])
+                if not self.index:
+                    self.index = {id(pp): i for i, pp in enumerate(self.fleet.power_plants)}
+                self.orders.append([self.index[id(pp)] for pp in merit_order])
+                self.costs.append([pp.cost_per_mw for pp in self.fleet.power_plants])
+                self.pmaxs.append([pp.pmax_units for pp in self.fleet.power_plants])
+
+    def _range(self, prev: PlantStates, interval: int, plant: int) -> Tuple[int, int, int]:
+        """Return the state and the power range of a power plant in an interval, without overrides.
+
+        :param prev: The state after the interval before
+        :param interval: The interval
+        :param plant: The index of the power plant
+        :return: ON, OFF or FREE and the lowest and highest power in units when it runs
+        """
+        pmin, pmax = self.pmins[plant], self.pmaxs[interval][plant]
+        was_on, p, since = prev.on[plant], prev.p[plant], prev.since[plant]
+        if self.wind[plant]:
+            return ON, 0, pmax
+        if pmax < pmin:
+            return OFF, 0, 0
+        if was_on is None:
+            return FREE, pmin, pmax
+        if was_on:
+            ramp_down = self.ramp_downs[plant]
+            can_stop = since >= self.min_ups[plant] and p <= max(pmin, ramp_down)
+            low, high = max(pmin, p - ramp_down), min(pmax, p + self.ramp_ups[plant])
+            return (FREE if can_stop else ON), low, high
+        can_start = since >= self.min_downs[plant]
+        return (FREE if can_start else OFF), pmin, min(pmax, max(pmin, self.ramp_ups[plant]))
+
+    def _bounds(
+        self, interval: int, prev: PlantStates
+    ) -> Union[Tuple[List[int], List[int], List[int]], Failure]:
+        """Return the state and the power range of every power plant in an interval.
+
+        :param interval: The interval
+        :param prev: The state after the interval before
+        :return: ON, OFF or FREE and the lowest and highest power in units of every power plant
+            when it runs, or the failure when an override can not be honored
+        """
+        status, lows, highs = [], [], []
+        for i in range(len(self.powerplants)):
+            state, lo, hi = self._range(prev, interval, i)
+            override = self.overrides.get((interval, i))
+            if override is not None:
+                cap = override.get(CAP)
+                if cap is not None:
+                    if cap < lo:
+                        if state == ON:
+                            return Failure(interval, EXCESS, lo - cap, i)
+                        state = OFF
+                    hi = min(hi, cap)
+                floor = override.get(FLOOR)
+                if floor is not None:
+                    if state == OFF or floor > hi:
+                        return Failure(interval, SHORTAGE, floor - (0 if state == OFF else hi), i)
+                    state, lo = ON, max(lo, floor)
+                run = override.get(RUN)
+                if run is not None:
+                    if state == (OFF if run else ON):
+                        return Failure(interval, SHORTAGE if run else EXCESS, lo, i)
+                    state = ON if run else OFF
+            status.append(state)
+            lows.append(lo)
+            highs.append(hi)
+        return status, lows, highs
+
+    def _dispatch(
+        self, interval: int, prev: PlantStates
+    ) -> Union[Tuple[List[int], PlantStates], Failure]:
+        """Dispatch an interval from the state the interval before left.
+
+        :param interval: The interval
+        :param prev: The state after the interval before
+        :return: The power in units of every power plant and the state after the interval, or
+            the failure when the load can not be met
+        """
+        bounds = self._bounds(interval, prev)
+        if isinstance(bounds, Failure):
+            return bounds
+        status, lows, highs = bounds
+        target = self.targets[interval]
+        order = self.orders[interval]
+        committed = [state == ON for state in status]
+        low = sum(lo for lo, on in zip(lows, committed) if on)
+        high = sum(hi for hi, on in zip(highs, committed) if on)
+        if low > target:
+            return Failure(interval, EXCESS, low - target)
+        # switch on the free power plants in merit order, skipping those whose pmin overshoots
+        for i in order:
+            if high >= target:
+                break
+            if status[i] != FREE or low + lows[i] > target:
+                continue
+            committed[i] = True
+            low += lows[i]
+            high += highs[i]
+        if high < target:
+            return Failure(interval, SHORTAGE, target - high)
+
+        outputs = [lo if on else 0 for lo, on in zip(lows, committed)]
+        remaining = target - low
+        for i in order:
+            if remaining == 0:
+                break
+            if committed[i]:
+                take = min(highs[i] - outputs[i], remaining)
+                outputs[i] += take
+                remaining -= take
+
+        # a plant without history that starts in the first interval starts its minimum up time,
+        # one that stays off keeps its unknown, served minimum down time
+        since = [
+            (1 if on else LONG_AGO) if was_on is None else (count + 1 if was_on == on else 1)
+            for was_on, on, count in zip(prev.on, committed, prev.since)
+        ]
+        return outputs, PlantStates(list(committed), outputs, since)
+
+    def _state(self, interval: int) -> PlantStates:
+        """Return the state after an interval, the initial state for interval -1."""
+        return self.states[interval] if interval >= 0 else self.initial
+
+    def _candidates(self, failure: Failure, plant: int) -> List[Tuple[int, str, Any, bool]]:
+        """Return the overrides of a power plant that remove a cause of a failure.
+
+        :param failure: The failure of the interval
+        :param plant: The index of the power plant
+        :return: The interval, kind and value of every override and whether the plant can honor
+            it from the state before that interval, else it needs overrides before it as well
+        """
+        interval, last = failure.interval, failure.interval - 1
+        prev = self._state(last)
+        pmin, pmax = self.pmins[plant], self.pmaxs[interval][plant]
+        p, since = prev.p[plant], prev.since[plant]
+        state, low, high = self._range(self._state(last - 1), last, plant)
+        candidates = []
+        if failure.kind == SHORTAGE and not prev.on[plant]:
+            if since < self.min_downs[plant]:
+                # keep it on in the interval it was switched off
+                candidates.append((interval - since, RUN, True, True))
+            elif min(pmax, max(pmin, self.ramp_ups[plant])) < pmax:
+                # start it an interval earlier to ramp up from there
+                candidates.append((last, RUN, True, state != OFF))
+        elif failure.kind == SHORTAGE:
+            # run it higher an interval earlier to ramp up from there
+            ceiling = min(pmax, p + self.ramp_ups[plant])
+            if ceiling < pmax:
+                floor = p + min(failure.amount, pmax - ceiling)
+                if min(floor, high) > p:
+                    candidates.append((last, FLOOR, min(floor, high), True))
+                candidates.append((last, FLOOR, floor, False))
+        elif prev.on[plant]:
+            stop = max(pmin, self.ramp_downs[plant])
+            bottom = max(pmin, p - self.ramp_downs[plant])
+            if since < self.min_ups[plant]:
+                # do not start it in the interval it was switched on
+                candidates.append((interval - since, RUN, False, True))
+            elif p > stop or bottom > pmin:
+                # run it lower an interval earlier to ramp down or switch off from there
+                cap = stop if failure.amount >= bottom else max(p - failure.amount, stop)
+                if max(cap, low) < p:
+                    candidates.append((last, CAP, max(cap, low), True))
+                candidates.append((last, CAP, cap, False))
+        return candidates
+
+    def _repair(self, failure: Failure) -> Optional[int]:
+        """Add an override at an earlier interval of the window that removes a cause of a failure.
+
+        A shortage keeps a plant on that is still in its minimum down time, starts a plant that
+        could not ramp up in time an interval earlier or runs a plant that could not ramp up
+        higher an interval earlier. An excess does not start a plant that is still in its minimum
+        up time or runs a plant that could not ramp down lower an interval earlier. Overrides the
+        plants can honor are tried before those that need more overrides, the cheapest plants are
+        kept on first and the most expensive ones are held back first.
+
+        :param failure: The failure of the interval
+        :return: The interval to replan from, None when no override can be added
+        """
+        if failure.interval == 0:
+            return None
+        prev = self._state(failure.interval - 1)
+        if failure.plant is not None:
+            plants = [failure.plant]
+        elif failure.kind == SHORTAGE:
+            plants = self.orders[failure.interval]
+        else:
+            plants = self.orders[failure.interval][::-1]
+        candidates = [
+            (direct, i, candidate)
+            for i in plants
+            if not self.wind[i] and prev.on[i] is not None
+            for *candidate, direct in self._candidates(failure, i)
+        ]
+        for direct in (True, False):
+            for is_direct, i, (interval, kind, value) in candidates:
+                if is_direct == direct and self._override(interval, i, kind, value):
+                    self.repairs += 1
+                    logger.debug(
+                        "Repaired the %s of interval %d with a %s override of %s at interval %d",
+                        failure.kind,
+                        failure.interval,
+                        kind,
+                        self.powerplants[i].name,
+                        interval,
+                    )
+                    return interval
+        return None
+
+    def _override(self, interval: int, plant: int, kind: str, value: Any) -> bool:
+        """Add an override unless it is final, rejected or the plant has it or a stricter one.
+
+        :return: True if the override was added
+        """
+        if interval < self.final or (interval, plant, kind) in self.rejected:
+            return False
+        override = self.overrides.setdefault((interval, plant), {})
+        old = override.get(kind)
+        # a plant is never switched the other way, the backtracking undoes overrides instead
+        if old is not None and (
+            kind == RUN
+            or old == value
+            or (kind == FLOOR and old > value)
+            or (kind == CAP and old < value)
+        ):
+            return False
+        override[kind] = value
+        self.history.append((interval, plant, kind, old))
+        return True
+
+    def _backtrack(self) -> Optional[int]:
+        """Undo the latest override, the failure that needed it tries another override.
+
+        The override stays rejected until an override added before it is undone as well.
+
+        :return: The interval to replan from, None when there is no override left to undo
+        """
+        if not self.history or self.history[-1][0] < self.final:
+            return None
+        interval, plant, kind, old = self.history.pop()
+        override = self.overrides[(interval, plant)]
+        if old is None:
+            del override[kind]
+        else:
+            override[kind] = old
+        depth = len(self.history)
+        self.rejected = {key: at for key, at in self.rejected.items() if at <= depth}
+        self.rejected[(interval, plant, kind)] = depth
+        logger.debug("Undid the %s override of %s at interval %d", kind, plant, interval)
+        return interval
+
+    def _infeasible(self, failure: Failure) -> InfeasibleLoadError:
+        """Return the error of a failure that could not be repaired."""
+        if failure.plant is not None:
+            reason = (
+                f"interval {failure.interval}: the ramp rates and minimum up and down times of "
+                f"{self.powerplants[failure.plant].name} leave no plan"
+            )
+        elif failure.kind == SHORTAGE:
+            reason = (
+                f"interval {failure.interval}: the power plants can reach at most "
+                f"{from_units(self.targets[failure.interval] - failure.amount)}"
+            )
+        else:
+            reason = (
+                f"interval {failure.interval}: the power plants that can not switch off generate "
+                f"at least {from_units(self.targets[failure.interval] + failure.amount)}"
+            )
+        return InfeasibleLoadError(self.loads[failure.interval], reason)
+
+    def solve(self) -> None:
+        """Plan every interval of the horizon.
+
+        Raises:
+            InfeasibleLoadError: If an interval can not be planned within the constraints
+        """
+        logger.info(
+            "Planning %d intervals for %d power plants with a window of %d intervals",
+            len(self.targets),
+            len(self.powerplants),
+            self.window,
+        )
+        interval = 0
+        latest: Optional[Failure] = None
+        while interval < len(self.targets):
+            self._reach(interval)
+            self.final = max(self.final, interval - self.window + 1)
+            prev = self.states[interval - 1] if interval else self.initial
+            with span(self.timings, "dispatch"):
+                result = self._dispatch(interval, prev)
+                if isinstance(result, Failure):
+                    if result.plant is None and (
+                        latest is None or result.interval >= latest.interval
+                    ):
+                        latest = result
+                    replan = None
+                    if self.repairs < self.max_repairs:
+                        replan = self._repair(result)
+                        if replan is None:
+                            replan = self._backtrack()
+                    if replan is None:
+                        logger.error("Horizon planning failed after %d repairs", self.repairs)
+                        raise self._infeasible(latest or result)
+                    # an undone override may lie after the failure, the failure is planned again
+                    interval = min(replan, interval)
+                    del self.outputs[interval:]
+                    del self.states[interval:]
+                    continue
+            outputs, state = result
+            self.outputs.append(outputs)
+            self.states.append(state)
+            interval += 1
+        logger.info("Planned %d intervals with %d repairs", len(self.targets), self.repairs)
+
+    def plan(self) -> HorizonPlan:
+        """Return the planned power and cost of every interval."""
+        costs = [
+            sum(cost * units for cost, units in zip(self.costs[interval], outputs)) / UNITS_PER_MW
+            for interval, outputs in enumerate(self.outputs)
+        ]
+        p = [
+            [from_units(outputs[i]) for outputs in self.outputs]
+            for i in range(len(self.powerplants))
+        ]
+        return HorizonPlan(p, costs, self.repairs, self.timings)
+
+
+def plan_horizon(horizon_input: HorizonIn) -> HorizonPlan:
+    """Plan the intervals of a horizon with a rolling horizon.
+
+    Args:
+        horizon_input: The loads, fuels, power plants and initial state of the horizon
+
+    Returns:
+        The power of every power plant in every interval and the cost of every interval
+
+    Raises:
+        InfeasibleLoadError: If an interval can not be planned within the constraints
+    """
+    horizon = RollingHorizon(
+        horizon_input.powerplants,
+        horizon_input.loads,
+        [horizon_input.fuels_of_interval(interval) for interval in range(len(horizon_input.loads))],
+        horizon_input.initial_state,
+        horizon_input.window,
+    )
+    horizon.solve()
+    return horizon.plan()
@@ -1,77 +1,203 @@
 """Merit order models for the application."""
 
 import logging
-from typing import List
+from typing import Dict, List, Optional, Tuple
 
-from app.models.powerplants import PowerPlant
+import numpy as np
+
+from app.core.config import settings
+from app.core.exceptions import InfeasibleLoadError
+from app.core.metrics import span
+from app.core.units import from_units, to_units
+from app.models.costcurve import CostCurve
+from app.models.powerplants import PowerPlant, check_costs
+from app.models.vectorized import FleetArrays
 
 logger = logging.getLogger(__name__)
 
 
+def merit_order_key(pp: PowerPlant) -> Tuple[float, str]:
+    """Return the sort key of a power plant in the merit order, ties are sorted by name."""
+    return pp.cost_per_mw, pp.name
+
+
 class MeritOrder:
     """This class is used to calculate the merit order of a list of power plants."""
 
-    def __init__(self, power_plants: List[PowerPlant], desired_load: float) -> None:
+    ENGINES = ("object", "numpy")
+
+    def __init__(
+        self,
+        power_plants: List[PowerPlant],
+        desired_load: float,
+        engine: Optional[str] = None,
+        presorted: bool = False,
+    ) -> None:
         """
         Initialize the MeritOrder object.
 
         :param power_plants: List of power plants
         :param desired_load: The amount of energy (MWh) that need to be generated
+        :param engine: "object" to walk the power plants one by one or "numpy" to dispatch on
+            arrays, both give the same result. Defaults to settings.MERIT_ORDER_ENGINE
+        :param presorted: True if the power plants are already sorted by merit_order_key
+        :raises CostOverflowError: If the cost of the power plants at their pmax is not finite
         """
+        self.engine = engine or settings.MERIT_ORDER_ENGINE
+        if self.engine not in self.ENGINES:
+            raise ValueError(f"Unknown merit order engine: {self.engine}")
         self.power_plants = power_plants
+        # seconds spent in the "sort" and "dispatch" stages
+        self.timings: Dict[str, float] = {}
         logger.info(
-            f"Initializing MeritOrder with {len(power_plants)} power plants and desired load of {desired_load} MWh"
+            "Initializing MeritOrder with %d power plants and desired load of %s MWh",
+            len(power_plants),
+            desired_load,
         )
-        self.__sort_plants_by_cost_per_mw()
+        check_costs(power_plants)
+        if not presorted:
+            self.__sort_plants_by_cost_per_mw()
         self.desired_load = desired_load
         self.load = 0.0
+        # number of leading power plants in merit order that the dispatch may have switched on
+        self.running = len(power_plants)
 
     def __sort_plants_by_cost_per_mw(self) -> None:
-        """Sort the power plants by cost per MW."""
+        """Sort the power plants by cost per MW, ties are sorted by name."""
         logger.debug("Sorting power plants by cost per MW")
-        self.power_plants.sort(key=lambda x: x.cost_per_mw)
-        logger.debug(f"Sorted order: {[pp.name for pp in self.power_plants]}")
+        with span(self.timings, "sort"):
+            self.power_plants.sort(key=merit_order_key)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Sorted order: %s", [pp.name for pp in self.power_plants])
+
+    def fleet_arrays(self) -> FleetArrays:
+        """Return the sorted power plants as arrays for the vectorized engine."""
+        return FleetArrays(self.power_plants)
+
+    def cost_curve(self) -> CostCurve:
+        """Return the breakpoint index of the merit order plan for the current fuels."""
+        return CostCurve(self.power_plants)
+
+    def solve_many(self, loads: List[float]) -> Tuple[np.ndarray, np.ndarray]:
+        """Dispatch many loads at once with the vectorized engine.
+
+        :param loads: The loads to dispatch
+        :return: A (loads × plants) array with the power outputs in merit order and a boolean
+            array that is False for the loads that could not be met
+        """
+        return self.fleet_arrays().dispatch(np.asarray(loads, dtype=np.float64))
+
+    @property
+    def marginal_plant(self) -> Optional[PowerPlant]:
+        """Return the most expensive power plant that runs, None when no power plant runs.
+
+        Only the plants the dispatch stopped at are checked, so it costs nothing during the
+        dispatch and next to nothing afterwards.
+        """
+        for index in range(self.running - 1, -1, -1):
+            if self.power_plants[index].p > 0:
+                return self.power_plants[index]
+        return None
 
     def set_loads(self) -> None:
-        """Set the loads of the power plants for the most efficient production."""
+        """Set the loads of the power plants and record the time spent in self.timings.
+
+        Raises:
+            InfeasibleLoadError: If the desired load can not be met
+        """
+        with span(self.timings, "dispatch"):
+            self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Set the loads of the power plants for the most efficient production.
+
+        Raises:
+            InfeasibleLoadError: If the greedy pass cannot match the desired load
+        """
+        self._greedy_dispatch()
+
+    def _greedy_dispatch(self, quiet: bool = False) -> None:
+        """Set the loads of the power plants in merit order.
+
+        :param quiet: Log the back-offs and failures at debug level, for a solver that only uses
+            the greedy plan as a starting point and often solves the loads it fails on
+        :raises InfeasibleLoadError: If the greedy pass cannot match the desired load
+        """
+        if self.engine == "numpy":
+            self.fleet_arrays().set_loads(self.power_plants, self.desired_load)
+            self.load = self.desired_load
+            return
         logger.info(
-            f"Setting loads for power plants to meet desired load of {self.desired_load} MWh"
+            "Setting loads for power plants to meet desired load of %s MWh", self.desired_load
         )
+        # checked once, the loop below runs for every power plant
+        debug = logger.isEnabledFor(logging.DEBUG)
+        warning = logging.DEBUG if quiet else logging.WARNING
+        error = logging.DEBUG if quiet else logging.ERROR
+        # the dispatch adds and compares integer units of settings.PRECISION
+        target = to_units(self.desired_load)
+        load = 0
+        self.running = len(self.power_plants)
+        for pp in self.power_plants:
+            pp.p = 0.0
         for index, pp in enumerate(self.power_plants):
-            logger.debug(f"Processing plant {pp.name} (min: {pp.real_pmin}, max: {pp.real_pmax})")
-            if self.load + pp.real_pmax <= self.desired_load:
-                # use real_pmax of powerplant
-                self.load += pp.real_pmax
-                self.power_plants[index].p = pp.real_pmax
+            if debug:
                 logger.debug(
-                    f"Set {pp.name} to max output {pp.real_pmax}, total load now {self.load}"
+                    "Processing plant %s (min: %s, max: %s)", pp.name, pp.real_pmin, pp.real_pmax
                 )
+            if load + pp.pmax_units <= target:
+                # use real_pmax of powerplant
+                load += pp.pmax_units
+                pp.p = from_units(pp.pmax_units)
+                if debug:
+                    logger.debug(
+                        "Set %s to max output %s, total load now %s",
+                        pp.name,
+                        pp.p,
+                        from_units(load),
+                    )
                 continue
-            if self.load + pp.real_pmin > self.desired_load:
+            remaining = target - load
+            if remaining <= 0:
+                self.running = index
+                break
+            if pp.pmin_units > remaining:
                 # minimum of pp is too much, go back and reduce
-                logger.warning(
-                    f"Minimum output of {pp.name} ({pp.real_pmin}) is too much, current load: {self.load}, desired: {self.desired_load}"
+                shortfall = pp.pmin_units - remaining
+                logger.log(
+                    warning,
+                    "Minimum output of %s (%s) is too much, current load: %s, desired: %s",
+                    pp.name,
+                    pp.real_pmin,
+                    from_units(load),
+                    self.desired_load,
                 )
-                if index >= 1:
+                if index < 1:
                     error_msg = "There is no previous powerplant to reduce"
-                    logger.error(error_msg)
-                    raise Exception(error_msg)
-                if (
-                    self.power_plants[index - 1].p - pp.real_pmin
-                    > self.power_plants[index - 1].real_pmin
-                ):
-                    error_msg = "The previous powerplant needs to be reduced too much"
-                    logger.error(error_msg)
-                    raise Exception(error_msg)
+                    logger.log(error, error_msg)
+                    raise InfeasibleLoadError(self.desired_load, error_msg)
                 prev_pp = self.power_plants[index - 1]
-                new_output = prev_pp.p - pp.real_pmin
-                logger.info(f"Reducing output of {prev_pp.name} from {prev_pp.p} to {new_output}")
-                self.power_plants[index - 1].p = new_output
-                self.load -= pp.real_pmin
-
-            remaining_load = self.desired_load - self.load
-            logger.info(f"Setting {pp.name} to {remaining_load} to meet remaining load")
-            self.power_plants[index].p = remaining_load
-            self.load = self.desired_load
-            logger.info(f"Desired load of {self.desired_load} reached")
+                if prev_pp.pmax_units - shortfall < prev_pp.pmin_units:
+                    error_msg = "The previous powerplant needs to be reduced too much"
+                    logger.log(error, error_msg)
+                    raise InfeasibleLoadError(self.desired_load, error_msg)
+                new_output = from_units(prev_pp.pmax_units - shortfall)
+                logger.info(
+                    "Reducing output of %s from %s to %s", prev_pp.name, prev_pp.p, new_output
+                )
+                prev_pp.p = new_output
+                load -= shortfall
+                remaining = pp.pmin_units
+
+            pp.p = from_units(remaining)
+            logger.info("Setting %s to %s to meet remaining load", pp.name, pp.p)
+            load = target
+            self.running = index + 1
+            logger.info("Desired load of %s reached", self.desired_load)
             break
+
+        self.load = from_units(load)
+        if load < target:
+            error_msg = f"Total available capacity ({self.load}) is too low"
+            logger.log(error, error_msg)
+            raise InfeasibleLoadError(self.desired_load, error_msg)
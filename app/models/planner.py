@@ -0,0 +1,422 @@
+"""Production planning functions shared by the API routes and the scripts."""
+
+import json
+import logging
+import math
+from typing import Any, Dict, List, NamedTuple, Optional, Union
+
+from pydantic import ValidationError
+
+from app.core.exceptions import (
+    CostOverflowError,
+    FleetNotFoundError,
+    InfeasibleLoadError,
+    SearchLimitError,
+)
+from app.core.metrics import observe_solve, span
+from app.models.fleet import Fleet
+from app.models.fleetstore import fleet_store
+from app.models.powerplants import PowerPlant, create_power_plant, fuel_prices, power_plant_factory
+from app.models.registry import solver_registry
+from app.models.unitcommitment import UnitCommitment
+from app.schemas import FuelsIn, LoadCurveIn, PowerPlantIn, ProductionPlanBatchIn, ProductionPlanIn
+from app.schemas.fastpath import ProductionPlanData
+
+logger = logging.getLogger(__name__)
+
+Plan = List[Dict[str, Union[str, float]]]
+
+
+def create_power_plants(powerplants: List[PowerPlantIn], fuels: FuelsIn) -> List[PowerPlant]:
+    """Create the power plant objects of the input schemas.
+
+    Args:
+        powerplants: Power plant input schemas
+        fuels: Fuels input schema
+
+    Returns:
+        The power plants in the order of the input
+    """
+    prices = fuel_prices(fuels)
+    return [power_plant_factory(pp, fuels, prices.get(pp.type)) for pp in powerplants]
+
+
+def create_fleet_power_plants(
+    fleet_id: str, fleet_version: Optional[int], fuels: FuelsIn
+) -> List[PowerPlant]:
+    """Create the power plant objects of a stored fleet, without validating them again.
+
+    Args:
+        fleet_id: The id of the fleet
+        fleet_version: The version of the fleet, None for the newest one
+        fuels: Fuels input schema
+
+    Returns:
+        The power plants in the order of the fleet
+
+    Raises:
+        FleetNotFoundError: If the fleet or the version is not stored
+    """
+    stored = fleet_store.load(fleet_id, fleet_version)
+    if stored is None:
+        raise FleetNotFoundError(fleet_id, fleet_version)
+    return stored.create_power_plants(fuels)
+
+
+class Solution(NamedTuple):
+    """A production plan with the data of the solve that calculated it."""
+
+    plan: Plan
+    # seconds spent in the stages of the solve
+    timings: Dict[str, float]
+    # "success", or "fallback" when the search stopped at the node limit or the deadline
+    outcome: str
+    # name of the solver engine
+    engine: str
+    # relative optimality gap of the plan, None when the engine does not estimate it
+    gap: Optional[float] = None
+    # cost of the plan in euros and the most expensive running plant and its cost per MWh, only
+    # with include_costs, the marginal plant and price are None when no plant runs
+    total_cost: float = 0.0
+    marginal_plant: Optional[str] = None
+    marginal_price: Optional[float] = None
+
+    def costs(self) -> Dict[str, Any]:
+        """Return the plan with its total cost and the marginal plant and price."""
+        return {
+            "plan": self.plan,
+            "total_cost": self.total_cost,
+            "marginal_plant": self.marginal_plant,
+            "marginal_price": self.marginal_price,
+        }
+
+
+def timed_plan_production(
+    power_plants: List[PowerPlant],
+    load: float,
+    presorted: bool = False,
+    engine: Optional[str] = None,
+    deadline_ms: Optional[float] = None,
+    include_costs: bool = False,
+) -> Solution:
+    """Calculate the production plan of already created power plants and time its stages.
+
+    Args:
+        power_plants: The power plants, they are sorted in place by cost per MW
+        load: The load that has to be generated
+        presorted: True if the power plants are already in merit order
+        engine: The name of a registered solver, None to select one for the power plants
+        deadline_ms: The latency budget of the solve, None for settings.SOLVER_LATENCY_BUDGET_MS
+        include_costs: Add the cost of every power plant to the production plan
+
+    Returns:
+        The production plan with the seconds spent in the "sort" and "dispatch" stages
+
+    Raises:
+        InfeasibleLoadError: If the load can not be met by the power plants
+        SearchLimitError: If the exact search gave up before it found a plan
+        CostOverflowError: If the cost of the power plants at their pmax is not finite
+    """
+    engine, solver = solver_registry.solve(
+        power_plants, load, engine=engine, presorted=presorted, deadline_ms=deadline_ms
+    )
+    outcome, gap = "success", None
+    if isinstance(solver, UnitCommitment):
+        outcome, gap = ("success" if solver.optimal else "fallback"), solver.gap
+    if not include_costs:
+        plan = [pp.to_dict() for pp in solver.power_plants]
+        return Solution(plan, solver.timings, outcome, engine, gap)
+    # the costs are added up while the plan is built, not in a pass of their own
+    plan = []
+    total_cost = 0.0
+    for pp in solver.power_plants:
+        entry = pp.to_dict(include_cost=True)
+        total_cost += entry["cost"]
+        plan.append(entry)
+    marginal = solver.marginal_plant
+    # MeritOrder rejects the fleets whose costs overflow, JSON has no Infinity to return
+    if marginal is not None and not math.isfinite(total_cost):
+        raise CostOverflowError(marginal.name)
+    return Solution(
+        plan,
+        solver.timings,
+        outcome,
+        engine,
+        gap,
+        total_cost,
+        marginal.name if marginal else None,
+        marginal.cost_per_mw if marginal else None,
+    )
+
+
+def plan_production(
+    power_plants: List[PowerPlant], load: float, presorted: bool = False
+) -> List[Dict[str, Union[str, float]]]:
+    """Calculate the production plan of already created power plants.
+
+    Args:
+        power_plants: The power plants, they are sorted in place by cost per MW
+        load: The load that has to be generated
+        presorted: True if the power plants are already in merit order
+
+    Returns:
+        A list of power plants with their power output
+
+    Raises:
+        InfeasibleLoadError: If the load can not be met by the power plants
+        SearchLimitError: If the exact search gave up before it found a plan
+    """
+    return timed_plan_production(power_plants, load, presorted=presorted).plan
+
+
+def timed_solve_plan_input(
+    plan_input: ProductionPlanIn,
+    engine: Optional[str] = None,
+    deadline_ms: Optional[float] = None,
+    include_costs: bool = False,
+) -> Solution:
+    """Create the power plants of the input, calculate their production plan and time it.
+
+    The result is plain data, so the timings of a solve in a worker process can be recorded in
+    the metrics of the process that serves the request.
+
+    Args:
+        plan_input: The input data for the production plan calculation
+        engine: The name of a registered solver, None to select one for the power plants
+        deadline_ms: The latency budget of the solve, None for settings.SOLVER_LATENCY_BUDGET_MS
+        include_costs: Add the cost of every power plant to the production plan
+
+    Returns:
+        The production plan with the seconds spent in the "factory", "sort" and "dispatch" stages
+
+    Raises:
+        InfeasibleLoadError: If the load can not be met by the power plants
+        SearchLimitError: If the exact search gave up before it found a plan
+        FleetNotFoundError: If the input refers to a fleet that is not stored
+    """
+    timings: Dict[str, float] = {}
+    with span(timings, "factory"):
+        if plan_input.fleet_id is not None:
+            power_plants = create_fleet_power_plants(
+                plan_input.fleet_id, plan_input.fleet_version, plan_input.fuels
+            )
+        else:
+            power_plants = create_power_plants(plan_input.powerplants or [], plan_input.fuels)
+    solution = timed_plan_production(
+        power_plants,
+        plan_input.load,
+        engine=engine,
+        deadline_ms=deadline_ms,
+        include_costs=include_costs,
+    )
+    timings.update(solution.timings)
+    return solution._replace(timings=timings)
+
+
+def timed_solve_plan_data(
+    plan_data: ProductionPlanData,
+    engine: Optional[str] = None,
+    deadline_ms: Optional[float] = None,
+    include_costs: bool = False,
+) -> Solution:
+    """Create the power plants of fast path input, calculate their production plan and time it.
+
+    The power plants are created straight from the validated values, without PowerPlantIn models.
+
+    Args:
+        plan_data: The validated input of the fast path
+        engine: The name of a registered solver, None to select one for the power plants
+        deadline_ms: The latency budget of the solve, None for settings.SOLVER_LATENCY_BUDGET_MS
+        include_costs: Add the cost of every power plant to the production plan
+
+    Returns:
+        The production plan with the seconds spent in the "factory", "sort" and "dispatch" stages
+
+    Raises:
+        InfeasibleLoadError: If the load can not be met by the power plants
+        SearchLimitError: If the exact search gave up before it found a plan
+        FleetNotFoundError: If the input refers to a fleet that is not stored
+    """
+    timings: Dict[str, float] = {}
+    fuels = plan_data.fuels
+    with span(timings, "factory"):
+        if plan_data.fleet_id is not None:
+            power_plants = create_fleet_power_plants(
+                plan_data.fleet_id, plan_data.fleet_version, fuels
+            )
+        else:
+            prices = fuel_prices(fuels)
+            power_plants = [
+                create_power_plant(
+                    plant_type, name, efficiency, pmin, pmax, fuels, prices.get(plant_type)
+                )
+                for name, plant_type, efficiency, pmin, pmax in plan_data.powerplants
+            ]
+    solution = timed_plan_production(
+        power_plants,
+        plan_data.load,
+        engine=engine,
+        deadline_ms=deadline_ms,
+        include_costs=include_costs,
+    )
+    timings.update(solution.timings)
+    return solution._replace(timings=timings)
+
+
+def solve_plan_input(plan_input: ProductionPlanIn) -> List[Dict[str, Union[str, float]]]:
+    """Create the power plants of the input and calculate their production plan.
+
+    Args:
+        plan_input: The input data for the production plan calculation
+
+    Returns:
+        A list of power plants with their power output
+
+    Raises:
+        InfeasibleLoadError: If the load can not be met by the power plants
+        SearchLimitError: If the exact search gave up before it found a plan
+    """
+    return timed_solve_plan_input(plan_input).plan
+
+
+class Solutions(NamedTuple):
+    """The solutions of the scenarios of a batch or of the intervals of a load curve."""
+
+    solutions: List[Solution]
+    # the error of the first scenario or interval that failed, the ones after it are not solved
+    error: Optional[Union[InfeasibleLoadError, SearchLimitError]] = None
+
+
+def plan_batch(batch_input: ProductionPlanBatchIn) -> Solutions:
+    """Calculate the production plans of the scenarios of a batch, one after the other.
+
+    The power plants are created once and only repriced when the fuels of a scenario differ
+    from the previous one. The plants stay sorted between scenarios, so the merit order sort
+    of the next scenario only has to fix what changed. The result is plain data, so a batch can
+    be solved in a worker process.
+
+    Args:
+        batch_input: The power plants and the scenarios to calculate
+
+    Returns:
+        The solution of every scenario up to the first one that failed, and its error
+    """
+    fuels = batch_input.scenarios[0].fuels
+    plants = create_power_plants(batch_input.powerplants, fuels)
+    # the solves sort power_plants in place, plants keeps the order of the input
+    power_plants = list(plants)
+    solutions: List[Solution] = []
+    for scenario in batch_input.scenarios:
+        if scenario.fuels != fuels:
+            fuels = scenario.fuels
+            prices = fuel_prices(fuels)
+            for pp_in, pp in zip(batch_input.powerplants, plants):
+                pp.update_fuels(fuels, prices.get(pp_in.type))
+        try:
+            solutions.append(timed_plan_production(power_plants, scenario.load))
+        except (InfeasibleLoadError, SearchLimitError) as e:
+            return Solutions(solutions, e)
+    return Solutions(solutions)
+
+
+def plan_load_curve(curve_input: LoadCurveIn) -> Solutions:
+    """Calculate the production plans of the intervals of a load curve, one after the other.
+
+    The power plants are kept in a Fleet, consecutive intervals with the same fuels reuse its
+    merit order and a change of fuels only resorts the affected groups of power plants. The
+    result is plain data, so a load curve can be solved in a worker process.
+
+    Args:
+        curve_input: The loads, fuels and power plants
+
+    Returns:
+        The solution of every interval up to the first one that failed, and its error. The
+        plans list the power plants in the order of the input
+    """
+    fleet = Fleet("load-curve", curve_input.powerplants)
+    solutions: List[Solution] = []
+    for interval, load in enumerate(curve_input.loads):
+        power_plants = fleet.update_fuels(curve_input.fuels_of_interval(interval))
+        try:
+            solution = timed_plan_production(power_plants, load, presorted=True)
+        except (InfeasibleLoadError, SearchLimitError) as e:
+            return Solutions(solutions, e)
+        solutions.append(solution._replace(plan=[pp.to_dict() for pp in fleet.power_plants]))
+    return Solutions(solutions)
+
+
+# errors of a line of newline-delimited JSON that are reported in its line of the response
+NDJSON_ERRORS = (
+    ValidationError,
+    InfeasibleLoadError,
+    SearchLimitError,
+    FleetNotFoundError,
+    CostOverflowError,
+)
+
+
+def plan_input_size(plan_input: ProductionPlanIn) -> int:
+    """Return the number of power plants of the input, 0 for a fleet that is not stored.
+
+    Args:
+        plan_input: The input data for the production plan calculation
+
+    Returns:
+        The number of power plants in the input or in its stored fleet
+    """
+    if plan_input.fleet_id is None:
+        return len(plan_input.powerplants or [])
+    stored = fleet_store.load(plan_input.fleet_id, plan_input.fleet_version)
+    return 0 if stored is None else len(stored)
+
+
+def ndjson_result_line(line_number: int, size: int, result: Union[Solution, Exception]) -> str:
+    """Record the solve of one line of newline-delimited JSON and return its line of the response.
+
+    The metrics are recorded here and not where the line is solved, so a solve in a worker
+    process is counted by the process that serves the request.
+
+    Args:
+        line_number: The number of the line in the stream, starting at 1
+        size: The number of power plants of the line
+        result: The solution of the line or one of the NDJSON_ERRORS it failed with
+
+    Returns:
+        One line of JSON with either the "plan" or the "error" of the payload
+    """
+    response: Dict[str, Any] = {"line": line_number}
+    if isinstance(result, Solution):
+        observe_solve(size, result.outcome, result.timings, result.engine)
+        response["plan"] = result.plan
+    elif isinstance(result, ValidationError):
+        response["error"] = result.errors(
+            include_url=False, include_context=False, include_input=False
+        )
+    else:
+        if isinstance(result, InfeasibleLoadError):
+            observe_solve(size, "infeasible")
+        elif isinstance(result, SearchLimitError):
+            observe_solve(size, "gave_up")
+        response["error"] = getattr(result, "message", str(result))
+    return json.dumps(response) + "\n"
+
+
+def plan_ndjson_line(line: Union[str, bytes], line_number: int) -> str:
+    """Calculate the production plan of one line of newline-delimited JSON.
+
+    Args:
+        line: A ProductionPlanIn payload as JSON
+        line_number: The number of the line in the stream, starting at 1
+
+    Returns:
+        One line of JSON with either the "plan" or the "error" of the payload
+    """
+    size = 0
+    result: Union[Solution, Exception]
+    try:
+        plan_input = ProductionPlanIn.model_validate_json(line)
+        size = plan_input_size(plan_input)
+        result = timed_solve_plan_input(plan_input)
+    except NDJSON_ERRORS as e:
+        result = e
+    return ndjson_result_line(line_number, size, result)
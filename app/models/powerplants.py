@@ -1,19 +1,63 @@
 """Power plant models for production planning."""
 
 import logging
-from typing import Any, Dict
+import math
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Type
 
-from app.core.exceptions import InvalidPowerPlantTypeError
+from app.core.config import settings
+from app.core.exceptions import CostOverflowError, InvalidPowerPlantTypeError
+from app.core.units import to_units
 from app.schemas import FuelsIn, PowerPlantIn
 
 logger = logging.getLogger(__name__)
 
 
+class FuelPrices(NamedTuple):
+    """The fuel and emission costs of a type of power plant, shared by all its power plants."""
+
+    # cost of fuel per MWh
+    fuelcost: float
+    # cost of the emission allowances per MWh generated
+    emission_cost: float
+
+
+NO_FUEL = FuelPrices(0.0, 0.0)
+
+
 class PowerPlant:
-    """Abstract class for power plants."""
+    """Abstract class for power plants.
+
+    Power plants use __slots__ instead of an instance __dict__, large fleets create thousands of
+    them per request. The fuel and emission costs only depend on the type and the fuels, so the
+    code that creates or reprices a fleet calculates one FuelPrices per type with fuel_prices and
+    passes it to all power plants of the type, which only keep their own data.
+    """
+
+    __slots__ = (
+        "name",
+        "energy_effciency",
+        "prices",
+        "cost_per_mw",
+        "pmin",
+        "pmax",
+        "real_pmax",
+        "pmin_units",
+        "pmax_units",
+        "p",
+    )
+
+    # FuelsIn fields that update_fuels depends on
+    fuel_fields: Tuple[str, ...] = ()
+    # tons of CO2 emitted per MWh generated
+    co2_emission: float = 0.0
 
     def __init__(
-        self, name: str, energy_effciency: float, pmin: float, pmax: float, fuelcost: float
+        self,
+        name: str,
+        energy_effciency: float,
+        pmin: float,
+        pmax: float,
+        prices: FuelPrices = NO_FUEL,
     ) -> None:
         """Initialize a power plant.
 
@@ -22,23 +66,49 @@ class PowerPlant:
             energy_effciency: Efficiency at which the plant converts fuel to energy
             pmin: Minimum power output
             pmax: Maximum power output
-            fuelcost: Cost of fuel per MWh
+            prices: The fuel and emission costs of the type, see fuel_prices
         """
         self.name = name
         self.energy_effciency = energy_effciency  # Mw out / Mw in
-        self.fuelcost = fuelcost  # euro / Mw
+        self.prices = prices
         # calculate the cost per Mw
-        self.cost_per_mw = fuelcost / energy_effciency  # euro / Mw
+        self.cost_per_mw = prices.fuelcost / energy_effciency + prices.emission_cost  # euro / Mw
         self.pmin = pmin
         self.pmax = pmax
-        # real_pmin and real_pmax are used to calculate the real minimum and maximum power output of a power plant
-        self.real_pmin = pmin
+        # real_pmax is the maximum power output the plant can reach with the current fuels
         self.real_pmax = pmax
+        # real_pmin and real_pmax in units of settings.PRECISION, the dispatch works on these
+        self.pmin_units = to_units(pmin, "ceil")
+        self.pmax_units = to_units(pmax, "floor")
         # set the power output to 0 by default
         self.p = 0.0
-        logger.debug(
-            f"Created {self.__class__.__name__} '{name}' with efficiency {energy_effciency}, pmin {pmin}, pmax {pmax}"
-        )
+
+    @classmethod
+    def prices_of(cls, fuels: FuelsIn) -> FuelPrices:
+        """Return the fuel and emission costs of the type for the fuels.
+
+        Args:
+            fuels: Fuels input schema
+
+        Returns:
+            The fuel and emission costs per MWh
+        """
+        return FuelPrices(getattr(fuels, cls.fuel_fields[0]), cls.co2_emission * fuels.co2_price)
+
+    @property
+    def fuelcost(self) -> float:
+        """Return the cost of fuel per MWh."""
+        return self.prices.fuelcost
+
+    @property
+    def emission_cost(self) -> float:
+        """Return the cost of the emission allowances per MWh generated."""
+        return self.prices.emission_cost
+
+    @property
+    def real_pmin(self) -> float:
+        """Return the minimum power output, it does not depend on the fuels."""
+        return self.pmin
 
     def __repr__(self) -> str:
         """Return string representation of the power plant.
@@ -56,12 +126,17 @@ class PowerPlant:
         """
         return self.__repr__()
 
-    def to_dict(self) -> Dict[str, Any]:
+    def to_dict(self, include_cost: bool = False) -> Dict[str, Any]:
         """Return dictionary representation of the power plant.
 
+        Args:
+            include_cost: Add the cost of the power output
+
         Returns:
-            Dictionary with name and power output
+            Dictionary with name and power output, and its cost in euros if requested
         """
+        if include_cost:
+            return {"name": self.name, "p": self.p, "cost": self.cost(self.p)}
         return {"name": self.name, "p": self.p}
 
     def cost(self, load: float) -> float:
@@ -75,10 +150,29 @@ class PowerPlant:
         """
         raise NotImplementedError("Subclasses must implement this method")
 
+    def update_fuels(self, fuels: FuelsIn, prices: Optional[FuelPrices] = None) -> None:
+        """Update the power plant for new fuel prices and wind availability.
+
+        Args:
+            fuels: Fuels input schema
+            prices: The fuel and emission costs of the type for the fuels, see fuel_prices.
+                Calculated for this power plant alone when None
+        """
+        raise NotImplementedError("Subclasses must implement this method")
+
 
 class WindTurbine(PowerPlant):
     """Wind turbine power plant."""
 
+    __slots__ = ()
+
+    fuel_fields = ("wind_percentage",)
+
+    @classmethod
+    def prices_of(cls, fuels: FuelsIn) -> FuelPrices:
+        """Return the fuel and emission costs of a wind turbine, it has none."""
+        return NO_FUEL
+
     def __init__(self, name: str, pmax: float, wind_percentage: float) -> None:
         """Initialize a wind turbine power plant.
 
@@ -88,9 +182,20 @@ class WindTurbine(PowerPlant):
             wind_percentage: Percentage of wind availability (0-100)
         """
         # Wind turbines have 100% efficiency, 0 fuel cost, and pmin of 0
-        super().__init__(name, 1.0, 0.0, pmax, 0.0)
+        super().__init__(name, 1.0, 0.0, pmax)
         # Adjust real_pmax based on wind availability
         self.real_pmax = pmax * (wind_percentage / 100.0)
+        self.pmax_units = to_units(self.real_pmax, "floor")
+
+    def update_fuels(self, fuels: FuelsIn, prices: Optional[FuelPrices] = None) -> None:
+        """Adjust real_pmax to the new wind availability.
+
+        Args:
+            fuels: Fuels input schema
+            prices: Unused, a wind turbine has no fuel and emission costs
+        """
+        self.real_pmax = self.pmax * (fuels.wind_percentage / 100.0)
+        self.pmax_units = to_units(self.real_pmax, "floor")
 
     def cost(self, load: float) -> float:
         """Cost calculation for a wind turbine.
@@ -103,13 +208,28 @@ class WindTurbine(PowerPlant):
         Returns:
             Always 0 as wind turbines have no fuel cost
         """
-        logger.debug(f"Calculating cost for wind turbine '{self.name}' with load {load}: 0")
-        return 0
+        logger.debug("Calculating cost for wind turbine '%s' with load %s: 0", self.name, load)
+        return 0.0
 
 
 class TurboJet(PowerPlant):
     """Turbo jet power plant."""
 
+    __slots__ = ()
+
+    fuel_fields = ("kerosine_price", "co2_price")
+    co2_emission = settings.KEROSINE_CO2_EMISSION
+
+    def update_fuels(self, fuels: FuelsIn, prices: Optional[FuelPrices] = None) -> None:
+        """Reprice the turbo jet with the new kerosine and CO2 price.
+
+        Args:
+            fuels: Fuels input schema
+            prices: The prices of turbo jets for the fuels, see fuel_prices. Calculated when None
+        """
+        prices = self.prices = prices or self.prices_of(fuels)
+        self.cost_per_mw = prices.fuelcost / self.energy_effciency + prices.emission_cost
+
     def cost(self, load: float) -> float:
         """Cost calculation for a turbo jet power plant.
 
@@ -119,15 +239,32 @@ class TurboJet(PowerPlant):
         Returns:
             The cost in euros
         """
+        cost = load * self.cost_per_mw
         logger.debug(
-            f"Calculating cost for turbo jet plant '{self.name}' with load {load}: {load * self.fuelcost}"
+            "Calculating cost for turbo jet plant '%s' with load %s: %s", self.name, load, cost
         )
-        return load * self.fuelcost
+        return cost
 
 
 class GasFired(PowerPlant):
     """Gas fired power plant."""
 
+    __slots__ = ()
+
+    fuel_fields = ("gas_price", "co2_price")
+    co2_emission = settings.GAS_CO2_EMISSION
+
+    def update_fuels(self, fuels: FuelsIn, prices: Optional[FuelPrices] = None) -> None:
+        """Reprice the gas fired plant with the new gas and CO2 price.
+
+        Args:
+            fuels: Fuels input schema
+            prices: The prices of gas fired plants for the fuels, see fuel_prices. Calculated when
+                None
+        """
+        prices = self.prices = prices or self.prices_of(fuels)
+        self.cost_per_mw = prices.fuelcost / self.energy_effciency + prices.emission_cost
+
     def cost(self, load: float) -> float:
         """Cost calculation for a gas fired power plant.
 
@@ -137,18 +274,62 @@ class GasFired(PowerPlant):
         Returns:
             The cost in euros
         """
+        cost = load * self.cost_per_mw
         logger.debug(
-            f"Calculating cost for gas fired plant '{self.name}' with load {load}: {load * self.fuelcost}"
+            "Calculating cost for gas fired plant '%s' with load %s: %s", self.name, load, cost
         )
-        return load * self.fuelcost
+        return cost
+
+
+def check_costs(power_plants: List[PowerPlant]) -> None:
+    """Make sure that the cost of running every power plant at its pmax is a finite number.
+
+    High fuel prices and low efficiencies can make a cost per MWh, or the sum of the costs of a
+    plan, overflow to infinity. The solvers can not compare infinite costs, so the fleet is
+    rejected before it is dispatched.
+
+    Args:
+        power_plants: The priced power plants
+
+    Raises:
+        CostOverflowError: If the cost of the whole fleet at its pmax is not finite
+    """
+    if not math.isfinite(sum(pp.cost_per_mw * pp.pmax_units for pp in power_plants)):
+        raise CostOverflowError(max(power_plants, key=lambda pp: pp.cost_per_mw).name)
+
+
+# the power plant class of every PowerPlantIn.Type value
+PLANT_CLASSES: Dict[str, Type[PowerPlant]] = {
+    PowerPlantIn.Type.gasfired.value: GasFired,
+    PowerPlantIn.Type.turbojet.value: TurboJet,
+    PowerPlantIn.Type.windturbine.value: WindTurbine,
+}
+
+
+def fuel_prices(fuels: FuelsIn) -> Dict[str, FuelPrices]:
+    """Return the fuel and emission costs of every type of power plant for the fuels.
 
+    They are calculated once per fuels and passed to every power plant of a type, so the power
+    plants of a fleet share them instead of keeping a copy each.
 
-def power_plant_factory(pp: PowerPlantIn, fuels: FuelsIn) -> PowerPlant:
+    Args:
+        fuels: Fuels input schema
+
+    Returns:
+        The prices by PowerPlantIn.Type value
+    """
+    return {plant_type: cls.prices_of(fuels) for plant_type, cls in PLANT_CLASSES.items()}
+
+
+def power_plant_factory(
+    pp: PowerPlantIn, fuels: FuelsIn, prices: Optional[FuelPrices] = None
+) -> PowerPlant:
     """Create a power plant object based on the input parameters.
 
     Args:
         pp: Power plant input schema
         fuels: Fuels input schema
+        prices: The prices of the type for the fuels, see fuel_prices. Calculated when None
 
     Returns:
         A PowerPlant instance of the appropriate type
@@ -156,20 +337,44 @@ def power_plant_factory(pp: PowerPlantIn, fuels: FuelsIn) -> PowerPlant:
     Raises:
         InvalidPowerPlantTypeError: If the power plant type is unknown
     """
-    logger.debug(f"Creating power plant of type {pp.type}: {pp.name}")
+    return create_power_plant(pp.type, pp.name, pp.efficiency, pp.pmin, pp.pmax, fuels, prices)
+
+
+def create_power_plant(
+    plant_type: str,
+    name: str,
+    efficiency: float,
+    pmin: float,
+    pmax: float,
+    fuels: FuelsIn,
+    prices: Optional[FuelPrices] = None,
+) -> PowerPlant:
+    """Create a power plant object from already validated values.
 
-    if pp.type == PowerPlantIn.Type.gasfired:
-        logger.debug(f"Creating GasFired plant with gas price: {fuels.gas_price}")
-        return GasFired(pp.name, pp.efficiency, pp.pmin, pp.pmax, fuels.gas_price)
+    Args:
+        plant_type: The type of the power plant, a PowerPlantIn.Type value
+        name: Name of the power plant
+        efficiency: Efficiency at which the plant converts fuel to energy
+        pmin: Minimum power output
+        pmax: Maximum power output
+        fuels: Fuels input schema
+        prices: The prices of the type for the fuels, see fuel_prices. Calculated when None
+
+    Returns:
+        A PowerPlant instance of the appropriate type
+
+    Raises:
+        InvalidPowerPlantTypeError: If the power plant type is unknown
+    """
+    if plant_type == PowerPlantIn.Type.gasfired:
+        return GasFired(name, efficiency, pmin, pmax, prices or GasFired.prices_of(fuels))
 
-    if pp.type == PowerPlantIn.Type.turbojet:
-        logger.debug(f"Creating Turbojet plant with kerosine price: {fuels.kerosine_price}")
-        return TurboJet(pp.name, pp.efficiency, pp.pmin, pp.pmax, fuels.kerosine_price)
+    if plant_type == PowerPlantIn.Type.turbojet:
+        return TurboJet(name, efficiency, pmin, pmax, prices or TurboJet.prices_of(fuels))
 
-    if pp.type == PowerPlantIn.Type.windturbine:
-        logger.debug(f"Creating WindTurbine with wind rate: {fuels.wind_percentage}")
-        return WindTurbine(pp.name, pp.pmax, fuels.wind_percentage)
+    if plant_type == PowerPlantIn.Type.windturbine:
+        return WindTurbine(name, pmax, fuels.wind_percentage)
 
-    error_msg = f"Unknown powerplant type: {pp.type}"
+    error_msg = f"Unknown powerplant type: {plant_type}"
     logger.error(error_msg)
-    raise InvalidPowerPlantTypeError(pp.type)
+    raise InvalidPowerPlantTypeError(plant_type)
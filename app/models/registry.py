@@ -0,0 +1,195 @@
+"""Registry of the solvers that calculate production plans."""
+
+import logging
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.models.meritorder import MeritOrder
+from app.models.powerplants import PowerPlant
+from app.models.unitcommitment import UnitCommitment
+
+logger = logging.getLogger(__name__)
+
+# Creates a solver for power plants, a desired load, whether the power plants are presorted and
+# the seconds the solver may take (None for no deadline)
+SolverFactory = Callable[[List[PowerPlant], float, bool, Optional[float]], MeritOrder]
+
+AUTO = "auto"
+
+
+class SolverRegistry:
+    """Solvers by name and the automatic selection of a solver per request.
+
+    Every solver is a MeritOrder: set_loads() sets the power of the power plants and records the
+    seconds spent in the "sort" and "dispatch" stages in its timings.
+
+    The automatic selection runs the exact solver when its worst case time fits the latency
+    budget and the anytime solver, the exact search with the latency budget as deadline, otherwise.
+    The worst case of the exact solver is a search of max_nodes nodes that each walk the whole
+    fleet, but only plants with a pmin can make it branch, a fleet with few of them needs at most
+    2 ** count nodes and a fleet without any is solved optimally by the greedy merit order.
+    """
+
+    def __init__(self, latency_budget_ms: float, node_cost_us: float, max_nodes: int) -> None:
+        """Initialize the registry.
+
+        Args:
+            latency_budget_ms: Worst case time of the exact solver for it to be selected
+            node_cost_us: Microseconds the exact solver spends per power plant per search node
+            max_nodes: Node limit of the exact solver
+        """
+        self.latency_budget_ms = latency_budget_ms
+        self.node_cost_us = node_cost_us
+        self.max_nodes = max_nodes
+        self._factories: Dict[str, SolverFactory] = {}
+
+    def register(self, name: str, factory: SolverFactory) -> None:
+        """Register a solver.
+
+        Args:
+            name: The name of the solver, e.g. for the engine query parameter
+            factory: Creates the solver
+        """
+        if name == AUTO:
+            raise ValueError(f"The solver name {AUTO} is reserved")
+        self._factories[name] = factory
+
+    def names(self) -> List[str]:
+        """Return the names of the registered solvers."""
+        return list(self._factories)
+
+    def check(self, engine: Optional[str]) -> str:
+        """Return the requested engine, AUTO when none was requested.
+
+        Raises:
+            ValueError: If the engine is not registered
+        """
+        if engine is None or engine == AUTO:
+            return AUTO
+        if engine not in self._factories:
+            raise ValueError(
+                f"Unknown solver engine: {engine}, choose from {', '.join([AUTO, *self.names()])}"
+            )
+        return engine
+
+    def estimate_exact_ms(self, power_plants: List[PowerPlant]) -> float:
+        """Return the worst case time of the exact solver in milliseconds."""
+        branching = sum(1 for pp in power_plants if 0 < pp.pmin_units <= pp.pmax_units)
+        if branching == 0:
+            return 0.0
+        nodes = self.max_nodes if branching >= self.max_nodes.bit_length() else 2**branching
+        return len(power_plants) * (nodes + 1) * self.node_cost_us / 1000
+
+    def select(
+        self,
+        power_plants: List[PowerPlant],
+        desired_load: float,
+        deadline_ms: Optional[float] = None,
+    ) -> str:
+        """Return the name of the solver for the power plants and the desired load.
+
+        Args:
+            power_plants: The power plants
+            desired_load: The load that has to be generated
+            deadline_ms: The latency budget of the request, None for the budget of the registry
+
+        Returns:
+            The name of the solver
+        """
+        if desired_load == 0 or not any(pp.pmin_units for pp in power_plants):
+            # nothing to commit, the greedy merit order is optimal
+            return "greedy"
+        budget = self.latency_budget_ms if deadline_ms is None else deadline_ms
+        if self.estimate_exact_ms(power_plants) <= budget:
+            return "exact"
+        return "anytime"
+
+    def create(
+        self,
+        engine: str,
+        power_plants: List[PowerPlant],
+        desired_load: float,
+        presorted: bool = False,
+        deadline_ms: Optional[float] = None,
+    ) -> MeritOrder:
+        """Create a registered solver.
+
+        Args:
+            engine: The name of the solver
+            power_plants: The power plants, they are sorted in place by cost per MW
+            desired_load: The load that has to be generated
+            presorted: True if the power plants are already in merit order
+            deadline_ms: The milliseconds the solver may take, None for no deadline
+
+        Returns:
+            The solver, set_loads() has not been called yet
+        """
+        deadline = None if deadline_ms is None else deadline_ms / 1000
+        return self._factories[engine](power_plants, desired_load, presorted, deadline)
+
+    def solve(
+        self,
+        power_plants: List[PowerPlant],
+        desired_load: float,
+        engine: Optional[str] = None,
+        presorted: bool = False,
+        deadline_ms: Optional[float] = None,
+    ) -> Tuple[str, MeritOrder]:
+        """Set the loads of the power plants with the requested or the selected solver.
+
+        Args:
+            power_plants: The power plants, they are sorted in place by cost per MW
+            desired_load: The load that has to be generated
+            engine: The name of the solver, None or AUTO to select one
+            presorted: True if the power plants are already in merit order
+            deadline_ms: The latency budget of the request, None for the budget of the registry
+
+        Returns:
+            The name of the solver that set the loads and the solver
+
+        Raises:
+            InfeasibleLoadError: If the load can not be met by the power plants
+            SearchLimitError: If the exact search gave up before it found a plan
+            CostOverflowError: If the cost of the power plants at their pmax is not finite
+            ValueError: If the engine is not registered
+        """
+        engine = self.check(engine)
+        if engine == AUTO:
+            engine = self.select(power_plants, desired_load, deadline_ms)
+        if engine == "anytime" and deadline_ms is None:
+            deadline_ms = self.latency_budget_ms
+        logger.debug("Solving %d power plants with the %s solver", len(power_plants), engine)
+        solver = self.create(engine, power_plants, desired_load, presorted, deadline_ms)
+        solver.set_loads()
+        return engine, solver
+
+
+solver_registry = SolverRegistry(
+    settings.SOLVER_LATENCY_BUDGET_MS,
+    settings.EXACT_SOLVER_NODE_COST_US,
+    settings.EXACT_SOLVER_MAX_NODES,
+)
+solver_registry.register(
+    "greedy",
+    lambda power_plants, load, presorted, deadline: MeritOrder(
+        power_plants, load, engine="object", presorted=presorted
+    ),
+)
+solver_registry.register(
+    "exact",
+    lambda power_plants, load, presorted, deadline: UnitCommitment(
+        power_plants, load, presorted=presorted
+    ),
+)
+solver_registry.register(
+    "anytime",
+    lambda power_plants, load, presorted, deadline: UnitCommitment(
+        power_plants, load, presorted=presorted, deadline=deadline
+    ),
+)
+solver_registry.register(
+    "vectorized",
+    lambda power_plants, load, presorted, deadline: MeritOrder(
+        power_plants, load, engine="numpy", presorted=presorted
+    ),
+)
@@ -0,0 +1,82 @@
+"""Sweeps of the merit order plan costs of a fleet over grids of fuels and loads."""
+
+import logging
+from typing import Dict, List, Sequence, Tuple, TypeVar
+
+import numpy as np
+
+from app.core.units import UNITS_PER_MW
+from app.models.costcurve import CostCurve
+from app.models.fleet import Fleet
+from app.schemas import FuelsIn, PowerPlantIn
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def sweep_costs(
+    powerplants: List[PowerPlantIn], fuel_points: List[FuelsIn], loads: List[float]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Calculate the merit order plan cost of every load for every fuel point.
+
+    The fuel points are visited in order with one Fleet, so a point only reprices and resorts the
+    groups of power plants whose fuels differ from the previous point. When the last axis of the
+    grid is e.g. the wind percentage, only the wind turbines are resorted between most points.
+    The costs of all loads of a point are evaluated at once on its CostCurve.
+
+    Args:
+        powerplants: The power plants
+        fuel_points: The fuels of every point, consecutive points should differ in few fields
+        loads: The loads in MW, multiples of settings.PRECISION
+
+    Returns:
+        The costs in euros with a row per fuel point and a column per load, NaN where the load
+        can not be met, and the switch loads with a row per fuel point and a column per power
+        plant in the order of the input: the load above which the plant runs, NaN if it never
+        runs
+    """
+    fleet = Fleet("sweep", powerplants)
+    loads_array = np.asarray(loads, dtype=np.float64)
+    costs = np.empty((len(fuel_points), len(loads)))
+    switch_loads = np.full((len(fuel_points), len(powerplants)), np.nan)
+    positions: Dict[int, int] = {}
+    for row, fuels in enumerate(fuel_points):
+        merit_order = fleet.update_fuels(fuels)
+        if not positions:
+            positions = {id(pp): index for index, pp in enumerate(fleet.power_plants)}
+        curve = CostCurve(merit_order)
+        total, _, feasible = curve.evaluate(loads_array)
+        costs[row] = np.where(feasible, total, np.nan)
+        # a plant starts running once the load exceeds the capacity of the plants before it
+        starts = np.array([0, *curve.breakpoints][:-1]) / UNITS_PER_MW
+        columns = [positions[id(pp)] for pp in merit_order]
+        switch_loads[row, columns] = np.where(np.array(curve.pmaxs) > 0, starts, np.nan)
+    logger.debug(
+        "Swept %d fuel points and %d loads for %d power plants",
+        len(fuel_points),
+        len(loads),
+        len(powerplants),
+    )
+    return costs, switch_loads
+
+
+def split(items: Sequence[T], parts: int) -> List[Sequence[T]]:
+    """Split items into at most parts contiguous chunks of almost the same size.
+
+    Args:
+        items: The items to split
+        parts: The number of chunks
+
+    Returns:
+        The non-empty chunks in order
+    """
+    parts = max(1, min(parts, len(items)))
+    size, rest = divmod(len(items), parts)
+    chunks = []
+    start = 0
+    for part in range(parts):
+        stop = start + size + (part < rest)
+        chunks.append(items[start:stop])
+        start = stop
+    return chunks
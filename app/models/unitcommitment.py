@@ -0,0 +1,236 @@
+"""Exact unit commitment models for the application."""
+
+import logging
+import math
+import time
+from typing import List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.exceptions import InfeasibleLoadError, SearchLimitError
+from app.core.units import UNITS_PER_MW, from_units, to_units
+from app.models.meritorder import MeritOrder
+from app.models.powerplants import PowerPlant
+
+logger = logging.getLogger(__name__)
+
+# Plant states used while branching
+OFF = 0
+ON = 1
+FREE = -1
+
+
+class UnitCommitment(MeritOrder):
+    """This class calculates the cheapest feasible production plan with a branch-and-bound search.
+
+    All power values are handled as integer multiples of settings.PRECISION. Each node of the
+    search fixes some plants on or off; its lower bound is the merit order fill in which the free
+    plants may run anywhere between 0 and their pmax. When that fill leaves a free plant below its
+    pmin the node branches on that plant.
+
+    The search starts from the cheapest greedy plan. With a deadline it is an anytime solver: it
+    improves that plan until the deadline and then returns the best plan found. The gap between its cost
+    and the lowest bound of the unexplored nodes estimates how far it is from the optimum.
+    """
+
+    def __init__(
+        self,
+        power_plants: List[PowerPlant],
+        desired_load: float,
+        presorted: bool = False,
+        deadline: Optional[float] = None,
+    ) -> None:
+        """
+        Initialize the UnitCommitment object.
+
+        :param power_plants: List of power plants
+        :param desired_load: The amount of energy (MWh) that need to be generated
+        :param presorted: True if the power plants are already sorted by merit_order_key
+        :param deadline: Seconds the search may take once it has found a plan, the node limit
+            only applies while it has none. None to search until the node limit
+        """
+        super().__init__(power_plants, desired_load, presorted=presorted)
+        self.deadline = deadline
+        self.max_nodes = settings.EXACT_SOLVER_MAX_NODES
+        self.nodes = 0
+        self.optimal = False
+        # relative difference between the cost of the plan and the lower bound of the optimum
+        self.gap = 0.0
+        self.total_cost = 0.0
+        # merit order data in units of settings.PRECISION
+        self.target = to_units(desired_load)
+        self.costs = [pp.cost_per_mw for pp in self.power_plants]
+        self.pmins = [pp.pmin_units for pp in self.power_plants]
+        self.pmaxs = [pp.pmax_units for pp in self.power_plants]
+        self.signatures = list(zip(self.costs, self.pmins, self.pmaxs))
+
+    def _relax(self, state: List[int]) -> Tuple[float, List[int], int]:
+        """Solve the relaxation of a search node.
+
+        :param state: ON, OFF or FREE for every plant in merit order
+        :return: The lower bound, the outputs in units and the index of a free plant that runs
+            below its pmin (-1 if the outputs are a feasible plan). The bound is math.inf when the
+            node cannot meet the desired load.
+        """
+        remaining = self.target
+        cost = 0.0
+        outputs = [0] * len(state)
+        for index, status in enumerate(state):
+            if status == ON:
+                outputs[index] = self.pmins[index]
+                remaining -= self.pmins[index]
+                cost += self.costs[index] * self.pmins[index]
+        if remaining < 0:
+            return math.inf, outputs, -1
+
+        fractional = -1
+        for index, status in enumerate(state):
+            if remaining == 0:
+                break
+            if status == OFF:
+                continue
+            room = self.pmaxs[index] - outputs[index]
+            take = room if room < remaining else remaining
+            outputs[index] += take
+            remaining -= take
+            cost += self.costs[index] * take
+            if status == FREE and 0 < outputs[index] < self.pmins[index]:
+                fractional = index
+        if remaining > 0:
+            return math.inf, outputs, -1
+        return cost, outputs, fractional
+
+    def _branch(self, state: List[int], index: int, status: int) -> List[int]:
+        """Return a copy of the node state with the plant at index switched on or off.
+
+        Switching a plant off also switches off the identical plants after it that are still
+        free, any plan using one of those is mirrored by a plan in the sibling branch.
+        """
+        child = list(state)
+        child[index] = status
+        if status == OFF:
+            for other in range(index + 1, len(state)):
+                if child[other] == FREE and self.signatures[other] == self.signatures[index]:
+                    child[other] = OFF
+        return child
+
+    def _greedy_incumbent(self) -> Tuple[float, List[int]]:
+        """Return the cost and the outputs in units of the cheaper of two greedy plans.
+
+        The first is the plan of the greedy merit order. The second switches on the plants in merit
+        order, skipping those whose pmin would overshoot the load, until their pmax covers the load,
+        then runs them at their pmin and fills the rest in merit order. It often finds a plan when
+        the greedy merit order can not back off the previous plant far enough.
+
+        :return: The cost is math.inf and the outputs are empty when neither finds a plan
+        """
+        best_cost, best_outputs = math.inf, []
+        try:
+            self._greedy_dispatch(quiet=True)
+        except InfeasibleLoadError:
+            pass
+        else:
+            best_outputs = [to_units(pp.p) for pp in self.power_plants]
+            best_cost = sum(cost * units for cost, units in zip(self.costs, best_outputs))
+
+        committed = []
+        low = high = 0
+        for index, (pmin, pmax) in enumerate(zip(self.pmins, self.pmaxs)):
+            if high >= self.target:
+                break
+            if pmax < pmin or low + pmin > self.target:
+                continue
+            committed.append(index)
+            low += pmin
+            high += pmax
+        if high < self.target:
+            return best_cost, best_outputs
+        outputs = [0] * len(self.power_plants)
+        remaining = self.target - low
+        for index in committed:
+            take = min(self.pmaxs[index] - self.pmins[index], remaining)
+            outputs[index] = self.pmins[index] + take
+            remaining -= take
+        cost = sum(cost * units for cost, units in zip(self.costs, outputs))
+        if cost < best_cost:
+            return cost, outputs
+        return best_cost, best_outputs
+
+    def _dispatch(self) -> None:
+        """Set the loads of the power plants for the cheapest feasible production.
+
+        The search stops after settings.EXACT_SOLVER_MAX_NODES nodes, or at the deadline when it
+        has a plan, in that case the best plan found so far is used and self.optimal is False.
+
+        Raises:
+            InfeasibleLoadError: If the search proved that no production plan meets the load
+            SearchLimitError: If the search stopped at the node limit before it found a plan
+        """
+        logger.info(
+            "Solving unit commitment for %d power plants and desired load of %s MWh",
+            len(self.power_plants),
+            self.desired_load,
+        )
+        # plants that can not reach their pmin can never be switched on
+        root = [OFF if pmax < pmin else FREE for pmin, pmax in zip(self.pmins, self.pmaxs)]
+
+        stop_at = None if self.deadline is None else time.perf_counter() + self.deadline
+        best_cost = math.inf
+        best_outputs: List[int] = []
+        self.nodes = 0
+        self.optimal = True
+        self.gap = 0.0
+        stack = [(root, *self._relax(root))]
+        if stack[0][3] >= 0:
+            # the root needs a search, start it from a greedy plan to prune from the first node
+            best_cost, best_outputs = self._greedy_incumbent()
+        while stack:
+            state, bound, outputs, fractional = stack.pop()
+            if bound >= best_cost - 1e-9:
+                continue
+            if fractional < 0:
+                logger.debug("New incumbent with cost %s after %d nodes", bound, self.nodes)
+                best_cost, best_outputs = bound, outputs
+                continue
+            if stop_at is not None and best_outputs:
+                stop = time.perf_counter() >= stop_at
+            else:
+                stop = self.nodes >= self.max_nodes
+            if stop:
+                logger.warning("Unit commitment stopped after %d nodes", self.nodes)
+                self.optimal = False
+                lower = min([bound, *(node[1] for node in stack)])
+                if best_cost < math.inf:
+                    self.gap = (best_cost - lower) / best_cost if best_cost > 0 else 0.0
+                break
+            children = []
+            for status in (ON, OFF):
+                child = self._branch(state, fractional, status)
+                self.nodes += 1
+                child_bound, child_outputs, child_fractional = self._relax(child)
+                if child_bound < best_cost - 1e-9:
+                    children.append((child, child_bound, child_outputs, child_fractional))
+            # explore the child with the lowest bound first
+            children.sort(key=lambda node: node[1], reverse=True)
+            stack.extend(children)
+
+        if not best_outputs and self.target > 0:
+            if not self.optimal:
+                logger.error("Unit commitment gave up after %d nodes without a plan", self.nodes)
+                raise SearchLimitError(self.desired_load, self.nodes)
+            logger.error("Unit commitment failed: no combination of power plants fits")
+            raise InfeasibleLoadError(self.desired_load, "no combination of power plants fits")
+
+        self.total_cost = best_cost / UNITS_PER_MW if best_outputs else 0.0
+        self.load = self.desired_load
+        # the greedy incumbent may have narrowed it, any plant of the search can run
+        self.running = len(self.power_plants)
+        for pp, units in zip(self.power_plants, best_outputs or [0] * len(self.power_plants)):
+            pp.p = from_units(units)
+        logger.info(
+            "Desired load of %s reached with cost %s after %d nodes (optimal: %s, gap: %s)",
+            self.desired_load,
+            self.total_cost,
+            self.nodes,
+            self.optimal,
+            self.gap,
+        )
@@ -0,0 +1,102 @@
+"""Vectorized merit order models for the application."""
+
+import logging
+from typing import List, Tuple
+
+import numpy as np
+
+from app.core.exceptions import InfeasibleLoadError
+from app.core.units import UNITS_PER_MW
+from app.models.powerplants import PowerPlant
+
+logger = logging.getLogger(__name__)
+
+
+class FleetArrays:
+    """This class stores a fleet of power plants as arrays to dispatch many loads at once.
+
+    The dispatch gives the same result as the greedy MeritOrder.set_loads: every plant in merit
+    order runs at its real_pmax until the next one would overshoot the load, that marginal plant
+    covers the rest and, when the rest is below its pmin, the previous plant is backed off. Like
+    MeritOrder.set_loads it works on integer units of settings.PRECISION.
+    """
+
+    def __init__(self, power_plants: List[PowerPlant]) -> None:
+        """
+        Initialize the FleetArrays object.
+
+        :param power_plants: List of power plants
+        """
+        self.names = [pp.name for pp in power_plants]
+        self.pmin_units = np.array([pp.pmin_units for pp in power_plants], dtype=np.int64)
+        self.pmax_units = np.array([pp.pmax_units for pp in power_plants], dtype=np.int64)
+        self.pmin = self.pmin_units / UNITS_PER_MW
+        self.pmax = self.pmax_units / UNITS_PER_MW
+        self.cost_per_mw = np.array([pp.cost_per_mw for pp in power_plants], dtype=np.float64)
+        # share of the installed pmax that is available, wind turbines depend on the wind
+        installed = np.array([pp.pmax for pp in power_plants], dtype=np.float64)
+        self.availability = np.divide(
+            self.pmax, installed, out=np.zeros_like(self.pmax), where=installed > 0
+        )
+        # merit order, a stable sort keeps ties in the order of the power plants like list.sort
+        self.order = np.argsort(self.cost_per_mw, kind="stable")
+        self.cumulative_units = np.cumsum(self.pmax_units[self.order])
+
+    def __len__(self) -> int:
+        """Return the number of power plants in the fleet."""
+        return len(self.names)
+
+    def dispatch(self, loads: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Calculate the power output of every plant for many loads at once.
+
+        :param loads: 1-D array with the loads to dispatch
+        :return: A (loads × plants) array with the power outputs in the order of the power plants
+            and a boolean array that is False for the loads that could not be met, the outputs of
+            those rows are meaningless
+        """
+        loads = np.rint(np.asarray(loads, dtype=np.float64) * UNITS_PER_MW).astype(np.int64)
+        count = len(self)
+        if count == 0:
+            return np.zeros((len(loads), 0)), loads <= 0
+        rows = np.arange(len(loads))
+        pmin = self.pmin_units[self.order]
+        pmax = self.pmax_units[self.order]
+        cumulative = self.cumulative_units
+
+        # plants that fit completely run at pmax
+        full = np.searchsorted(cumulative, loads, side="right")
+        outputs = np.where(np.arange(count)[None, :] < full[:, None], pmax[None, :], 0)
+        reached = np.where(full > 0, cumulative[np.maximum(full - 1, 0)], 0)
+        remaining = loads - reached
+        feasible = (full < count) | (remaining <= 0)
+
+        # the marginal plant covers the rest of the load
+        marginal = (full < count) & (remaining > 0)
+        index = np.minimum(full, count - 1)
+        shortfall = np.where(marginal, pmin[index] - remaining, 0)
+        backoff = marginal & (shortfall > 0)
+        previous = np.maximum(index - 1, 0)
+        reduced = pmax[previous] - shortfall
+        feasible &= ~backoff | ((full >= 1) & (reduced >= pmin[previous]))
+        backoff &= feasible
+        outputs[rows[backoff], previous[backoff]] = reduced[backoff]
+        marginal_outputs = np.where(backoff, pmin[index], remaining)
+        outputs[rows[marginal], index[marginal]] = marginal_outputs[marginal]
+
+        plans = np.empty(outputs.shape, dtype=np.float64)
+        plans[:, self.order] = outputs / UNITS_PER_MW
+        return plans, feasible
+
+    def set_loads(self, power_plants: List[PowerPlant], desired_load: float) -> None:
+        """Set the power output of the given plants for a single load.
+
+        :param power_plants: The power plants the arrays were created from, in the same order
+        :param desired_load: The amount of energy (MWh) that need to be generated
+        :raises InfeasibleLoadError: If the greedy dispatch can not match the desired load
+        """
+        plans, feasible = self.dispatch(np.array([desired_load]))
+        if not feasible[0]:
+            logger.error("Vectorized dispatch can not meet desired load of %s MWh", desired_load)
+            raise InfeasibleLoadError(desired_load, "the greedy merit order does not fit")
+        for pp, p in zip(power_plants, plans[0].tolist()):
+            pp.p = p
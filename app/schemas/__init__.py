@@ -1,8 +1,37 @@
 """Schemas for the application."""
 
+from app.schemas.fleet import FleetIn, FleetOut
 from app.schemas.fuels import FuelsIn
-from app.schemas.powerplant import PowerPlantIn, PowerPlantOut
+from app.schemas.powerplant import PowerPlantIn, PowerPlantOut, PowerPlantStateIn
 
-__all__ = ["PowerPlantIn", "PowerPlantOut", "ProductionPlanIn", "FuelsIn"]
+__all__ = [
+    "PowerPlantIn",
+    "PowerPlantOut",
+    "PowerPlantStateIn",
+    "ProductionPlanIn",
+    "ProductionPlanBatchIn",
+    "ProductionPlanCostsOut",
+    "ScenarioIn",
+    "LoadCurveIn",
+    "LoadCurveOut",
+    "HorizonIn",
+    "HorizonOut",
+    "FuelsIn",
+    "FleetIn",
+    "FleetOut",
+    "RangeIn",
+    "SweepIn",
+    "SweepOut",
+]
 
-from app.schemas.productionplan import ProductionPlanIn
+from app.schemas.productionplan import (
+    HorizonIn,
+    HorizonOut,
+    LoadCurveIn,
+    LoadCurveOut,
+    ProductionPlanBatchIn,
+    ProductionPlanCostsOut,
+    ProductionPlanIn,
+    ScenarioIn,
+)
+from app.schemas.sweep import RangeIn, SweepIn, SweepOut
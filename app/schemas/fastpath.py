@@ -0,0 +1,156 @@
+"""Fast path parsing of production plan requests.
+
+The decoded request body is checked against the rules of ProductionPlanIn on the plain values,
+without building a model per power plant. Anything the fast path does not accept is
+validated again by ProductionPlanIn, so invalid input gets exactly the errors of the regular route
+and input that only the lax schema accepts (e.g. numbers as strings) still works.
+"""
+
+import math
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from app.core.config import settings
+from app.core.units import from_units, is_multiple, to_units
+from app.schemas.fuels import FuelsIn
+from app.schemas.powerplant import PowerPlantIn
+from app.schemas.productionplan import ProductionPlanIn, canonical_hash
+
+PLANT_TYPES = frozenset(plant_type.value for plant_type in PowerPlantIn.Type)
+PLANT_KEYS = ("name", "type", "efficiency", "pmin", "pmax")
+# lower and upper bound of every FuelsIn field
+FUEL_BOUNDS = {
+    "gas_price": (settings.MIN_FUEL_PRICE, math.inf),
+    "kerosine_price": (settings.MIN_FUEL_PRICE, math.inf),
+    "co2_price": (settings.MIN_FUEL_PRICE, math.inf),
+    "wind_percentage": (settings.MIN_WIND_PERCENTAGE, settings.MAX_WIND_PERCENTAGE),
+}
+
+# name, type, efficiency, pmin and pmax of a validated power plant
+PlantValues = Tuple[str, str, float, float, float]
+
+
+class ProductionPlanData(NamedTuple):
+    """Validated production plan input as plain values."""
+
+    load: float
+    fuels: FuelsIn
+    # empty when the input refers to a registered fleet
+    powerplants: List[PlantValues]
+    fleet_id: Optional[str] = None
+    fleet_version: Optional[int] = None
+
+    @classmethod
+    def from_model(cls, plan_input: ProductionPlanIn) -> "ProductionPlanData":
+        """Return the values of a validated ProductionPlanIn."""
+        powerplants = [
+            (pp.name, pp.type.value, pp.efficiency, pp.pmin, pp.pmax)
+            for pp in plan_input.powerplants or []
+        ]
+        return cls(
+            plan_input.load,
+            plan_input.fuels,
+            powerplants,
+            plan_input.fleet_id,
+            plan_input.fleet_version,
+        )
+
+    def canonical_hash(self) -> str:
+        """Return the same hash as ProductionPlanIn.canonical_hash for the same input."""
+        data: Dict[str, Any] = {"load": self.load, "fuels": self.fuels.model_dump(mode="json")}
+        if self.fleet_id is None:
+            data["powerplants"] = [dict(zip(PLANT_KEYS, values)) for values in self.powerplants]
+        else:
+            data["fleet_id"] = self.fleet_id
+            if self.fleet_version is not None:
+                data["fleet_version"] = self.fleet_version
+        return canonical_hash(data)
+
+
+def _number(value: Any) -> Optional[float]:
+    """Return a finite JSON number as a float and None for anything else, including booleans.
+
+    The fallback decoder of the route accepts Infinity and NaN, they pass every comparison the
+    fast path makes and are left to ProductionPlanIn to reject.
+    """
+    if type(value) is float or type(value) is int:
+        try:
+            number = float(value)
+        except OverflowError:
+            return None
+        if math.isfinite(number):
+            return number
+    return None
+
+
+def _validate(data: Any) -> Optional[ProductionPlanData]:
+    """Check decoded JSON against the rules of ProductionPlanIn.
+
+    Args:
+        data: The decoded request body
+
+    Returns:
+        The validated values, or None when the input has to be validated by ProductionPlanIn
+    """
+    if type(data) is not dict or "fleet_id" in data or "fleet_version" in data:
+        return None
+    load = _number(data.get("load"))
+    if load is None or load < 0 or not is_multiple(load):
+        return None
+
+    fuels_data = data.get("fuels")
+    if type(fuels_data) is not dict:
+        return None
+    fuels = {}
+    for field, (lower, upper) in FUEL_BOUNDS.items():
+        value = _number(fuels_data.get(field))
+        if value is None or not lower <= value <= upper:
+            return None
+        fuels[field] = value
+
+    powerplants = data.get("powerplants")
+    if type(powerplants) is not list:
+        return None
+    plants = []
+    for pp in powerplants:
+        # other keys, e.g. the horizon fields, are left to PowerPlantIn
+        if type(pp) is not dict or len(pp) > len(PLANT_KEYS):
+            return None
+        name, plant_type = pp.get("name"), pp.get("type")
+        efficiency = _number(pp.get("efficiency"))
+        pmin = _number(pp.get("pmin"))
+        pmax = _number(pp.get("pmax"))
+        if type(name) is not str or type(plant_type) is not str or plant_type not in PLANT_TYPES:
+            return None
+        if efficiency is None or pmin is None or pmax is None:
+            return None
+        if not 0 <= efficiency <= 1 or pmin < 0 or pmax < 0:
+            return None
+        # the same rounding as the validators of PowerPlantIn
+        pmin = from_units(to_units(pmin, "ceil"))
+        if pmax < pmin:
+            return None
+        pmax = from_units(to_units(pmax, "floor"))
+        plants.append((name, plant_type, efficiency, pmin, pmax))
+
+    return ProductionPlanData(load, FuelsIn.model_construct(**fuels), plants)
+
+
+def validate_production_plan(data: Any) -> ProductionPlanData:
+    """Validate a decoded ProductionPlanIn request body.
+
+    Args:
+        data: The decoded request body
+
+    Returns:
+        The validated values of the input
+
+    Raises:
+        ValidationError: The errors of ProductionPlanIn if the input is invalid
+    """
+    plan_data = _validate(data)
+    if plan_data is None:
+        # from_attributes like FastAPI validates request bodies, for the same errors
+        plan_data = ProductionPlanData.from_model(
+            ProductionPlanIn.model_validate(data, from_attributes=True)
+        )
+    return plan_data
@@ -0,0 +1,30 @@
+"""Schemas for fleets of power plants."""
+
+from typing import List
+
+from pydantic import BaseModel, Field
+
+from app.schemas.powerplant import PowerPlantIn
+
+
+class FleetIn(BaseModel):
+    """Input schema to register a fleet of power plants."""
+
+    powerplants: List[PowerPlantIn]
+
+
+class FleetOut(BaseModel):
+    """Output schema of a registered fleet of power plants."""
+
+    fleet_id: str = Field(
+        examples=["5f0c6a8e2b7d4f3a9c1e6b2d8a4f7c90"],
+        description="The id to refer to the fleet in later production plan requests",
+    )
+    version: int = Field(
+        examples=[1],
+        description="The version of the fleet, every update of the power plants adds a version",
+    )
+    size: int = Field(
+        examples=[6],
+        description="The number of power plants in the fleet",
+    )
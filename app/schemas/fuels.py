@@ -12,22 +12,26 @@ class FuelsIn(BaseModel):
         description="The price of gas per MWh in euros/MWh",
         examples=[13.4],
         ge=settings.MIN_FUEL_PRICE,
+        allow_inf_nan=False,
     )
     kerosine_price: float = Field(
         description="The price of kerosine per MWh in euros/MWh",
         examples=[50.8],
         ge=settings.MIN_FUEL_PRICE,
+        allow_inf_nan=False,
     )
     co2_price: float = Field(
         description="The price of CO2 emission certificates in euros/ton",
         examples=[20],
         ge=settings.MIN_FUEL_PRICE,
+        allow_inf_nan=False,
     )
     wind_percentage: float = Field(
         description="The percentage of wind turbine capacity that is available",
         examples=[60],
         ge=settings.MIN_WIND_PERCENTAGE,
         le=settings.MAX_WIND_PERCENTAGE,
+        allow_inf_nan=False,
     )
 
     @classmethod
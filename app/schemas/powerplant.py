@@ -1,12 +1,16 @@
 """Schemas for power plants."""
 
-import math
 from enum import Enum
+from typing import Optional
 
 from pydantic import BaseModel, Field, ValidationInfo, field_validator
 
 from app.core.config import settings
 from app.core.exceptions import PmaxLessThanPminError
+from app.core.units import from_units, to_units
+
+# fields of PowerPlantIn that only constrain consecutive intervals, other routes ignore them
+HORIZON_FIELDS = ("ramp_up", "ramp_down", "min_up", "min_down")
 
 
 class PowerPlantIn(BaseModel):
@@ -37,15 +41,49 @@ class PowerPlantIn(BaseModel):
     pmin: float = Field(
         examples=[40.2],
         ge=0,
+        allow_inf_nan=False,
         description="The minimum amount of power the powerplant generates when switched on.",
         title="Minimum power",
     )
     pmax: float = Field(
         examples=[210.4],
         ge=0,
+        allow_inf_nan=False,
         title="Maximum power",
         description="the maximum amount of power the powerplant can generate",
     )
+    ramp_up: Optional[float] = Field(
+        None,
+        examples=[50.0],
+        ge=0,
+        allow_inf_nan=False,
+        description="The maximum increase of the power from one interval to the next, unlimited "
+        "when not given. A power plant that switches on can reach max(pmin, ramp_up). Only used "
+        "by the horizon planning and ignored for wind-turbines.",
+    )
+    ramp_down: Optional[float] = Field(
+        None,
+        examples=[50.0],
+        ge=0,
+        allow_inf_nan=False,
+        description="The maximum decrease of the power from one interval to the next, unlimited "
+        "when not given. A power plant can switch off from max(pmin, ramp_down). Only used by "
+        "the horizon planning and ignored for wind-turbines.",
+    )
+    min_up: Optional[int] = Field(
+        None,
+        examples=[4],
+        ge=1,
+        description="The minimum number of intervals the powerplant runs once switched on. Only "
+        "used by the horizon planning and ignored for wind-turbines.",
+    )
+    min_down: Optional[int] = Field(
+        None,
+        examples=[2],
+        ge=1,
+        description="The minimum number of intervals the powerplant stays off once switched off. "
+        "Only used by the horizon planning and ignored for wind-turbines.",
+    )
 
     @field_validator("pmax")
     @classmethod
@@ -53,15 +91,57 @@ class PowerPlantIn(BaseModel):
         """Make sure pmax is bigger than pmin and convert pmax to a multiple of settings.PRECISION and le than pmax."""
         if "pmin" in info.data and v < info.data["pmin"]:
             raise PmaxLessThanPminError(v, info.data["pmin"], info.data.get("name"))
-        precision_factor = 1 / settings.PRECISION
-        return v * precision_factor // 1 / precision_factor
+        return from_units(to_units(v, "floor"))
 
     @field_validator("pmin")
     @classmethod
     def pmin_decimals(cls, v: float) -> float:
         """Make sure that pmin is a multiple of settings.PRECISION and ge pmin."""
-        precision_factor = 1 / settings.PRECISION
-        return math.ceil(v * precision_factor) / precision_factor
+        return from_units(to_units(v, "ceil"))
+
+    @field_validator("ramp_up", "ramp_down")
+    @classmethod
+    def ramp_decimals(cls, v: Optional[float]) -> Optional[float]:
+        """Round a ramp rate down to a multiple of settings.PRECISION."""
+        return None if v is None else from_units(to_units(v, "floor"))
+
+
+class PowerPlantStateIn(BaseModel):
+    """This is the input schema for the state of a power plant before the first horizon interval."""
+
+    name: str = Field(
+        examples=["gasfiredbig2"],
+        description="The name of the power plant",
+    )
+    p: float = Field(
+        examples=[200],
+        ge=0,
+        allow_inf_nan=False,
+        description="The power the power plant generates",
+    )
+    on: Optional[bool] = Field(
+        None,
+        examples=[True],
+        description="Whether the power plant is switched on, defaults to p > 0",
+    )
+    intervals: Optional[int] = Field(
+        None,
+        examples=[3],
+        ge=1,
+        description="The number of intervals the power plant has been switched on or off, when not "
+        "given its minimum up or down time is served",
+    )
+
+    @field_validator("p")
+    @classmethod
+    def p_decimals(cls, v: float) -> float:
+        """Round the power to a multiple of settings.PRECISION."""
+        return from_units(to_units(v))
+
+    @property
+    def running(self) -> bool:
+        """Return whether the power plant is switched on."""
+        return self.p > 0 if self.on is None else self.on
 
 
 class PowerPlantOut(BaseModel):
@@ -80,4 +160,4 @@ class PowerPlantOut(BaseModel):
     @classmethod
     def decimal(cls, v: float) -> float:
         """Fix the output to precision defined in settings."""
-        return float(f"{{:0.{settings.MIN_POWER_DECIMAL_PLACES}f}}".format(v))
+        return round(v, settings.MIN_POWER_DECIMAL_PLACES)
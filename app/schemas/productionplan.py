@@ -1,35 +1,274 @@
 """Schemas for production plan."""
+import hashlib
+import json
 import logging
-from typing import List
+import time
+from typing import Any, Dict, List, Optional, Union
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, ModelWrapValidatorHandler, field_validator, model_validator
 
 from app.core.config import settings
 from app.core.exceptions import InvalidLoadError
+from app.core.metrics import STAGE_DURATION
+from app.core.units import is_multiple
 from app.schemas import FuelsIn, PowerPlantIn
+from app.schemas.powerplant import HORIZON_FIELDS, PowerPlantStateIn
 
 logger = logging.getLogger(__name__)
 
 
-class ProductionPlanIn(BaseModel):
-    """Input schema for production plan calculation."""
+def check_load(v: float) -> float:
+    """Make sure that a load is a multiple of settings.PRECISION."""
+    if not is_multiple(v):
+        logger.warning("Load %s is not a multiple of %s, will be rejected", v, settings.PRECISION)
+        raise InvalidLoadError(v)
+    return v
+
+
+def canonical_hash(data: Dict[str, Any]) -> str:
+    """Return a hash of validated production plan input that does not depend on key or plant order.
+
+    Args:
+        data: The validated input as JSON data, e.g. ProductionPlanIn.model_dump(mode="json")
+
+    Returns:
+        The sha256 hex digest of the canonical JSON of the input
+    """
+    data = dict(data)
+    if "powerplants" in data:
+        data["powerplants"] = sorted(
+            json.dumps(pp, sort_keys=True, separators=(",", ":")) for pp in data["powerplants"]
+        )
+    canonical = json.dumps(data, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class ScenarioIn(BaseModel):
+    """Input schema for the load and fuels of a single scenario."""
 
     load: float = Field(
         ...,
         description="The load is the amount of energy (MWh) that need to be generated",
         examples=[400.1],
         ge=0,
+        allow_inf_nan=False,
     )
     fuels: FuelsIn
-    powerplants: List[PowerPlantIn]
 
     @field_validator("load")
     @classmethod
     def load_decimals(cls, v: float) -> float:
         """Make sure that load is a multiple of settings.PRECISION."""
-        # Check if the value is already a multiple of settings.PRECISION
-        precision_factor = 1 / settings.PRECISION
-        if round(v * precision_factor) != v * precision_factor:
-            logger.warning(f"Load {v} is not a multiple of {settings.PRECISION}, will be rejected")
-            raise InvalidLoadError(v)
+        return check_load(v)
+
+
+class ProductionPlanIn(ScenarioIn):
+    """Input schema for production plan calculation.
+
+    The power plants are either part of the input or a registered fleet referred to by its id.
+    """
+
+    powerplants: Optional[List[PowerPlantIn]] = None
+    fleet_id: Optional[str] = Field(
+        None,
+        examples=["5f0c6a8e2b7d4f3a9c1e6b2d8a4f7c90"],
+        description="The id of a registered fleet, instead of the powerplants",
+    )
+    fleet_version: Optional[int] = Field(
+        None,
+        examples=[1],
+        ge=1,
+        description="The version of the registered fleet, defaults to the newest version",
+    )
+
+    @model_validator(mode="after")
+    def powerplants_or_fleet(self) -> "ProductionPlanIn":
+        """Make sure that the input has either powerplants or a fleet_id."""
+        if (self.powerplants is None) == (self.fleet_id is None):
+            raise ValueError("Either powerplants or fleet_id is required, not both")
+        if self.fleet_version is not None and self.fleet_id is None:
+            raise ValueError("fleet_version requires a fleet_id")
+        return self
+
+    @model_validator(mode="wrap")
+    @classmethod
+    def timed_validation(
+        cls, data: Any, handler: ModelWrapValidatorHandler["ProductionPlanIn"]
+    ) -> "ProductionPlanIn":
+        """Record the time spent validating the input as the "validation" stage."""
+        start = time.perf_counter()
+        try:
+            return handler(data)
+        finally:
+            STAGE_DURATION.observe(time.perf_counter() - start, stage="validation")
+
+    def canonical_hash(self) -> str:
+        """Return a hash of the validated input that does not depend on field or plant order.
+
+        The horizon fields of the power plants do not change the production plan, so they are
+        left out of the hash.
+        """
+        exclude = {"powerplants": {"__all__": set(HORIZON_FIELDS)}}
+        return canonical_hash(self.model_dump(mode="json", exclude_none=True, exclude=exclude))
+
+
+class ProductionPlanBatchIn(BaseModel):
+    """Input schema for the production plans of many scenarios for one fleet of power plants."""
+
+    powerplants: List[PowerPlantIn]
+    scenarios: List[ScenarioIn] = Field(
+        ...,
+        description="The loads and fuels for which a production plan has to be calculated",
+        min_length=1,
+    )
+
+
+class LoadCurveIn(BaseModel):
+    """Input schema for the production plans of a series of loads, e.g. the intervals of a day."""
+
+    loads: List[float] = Field(
+        ...,
+        description="The load (MWh) of every interval",
+        examples=[[400.1, 420.0, 450.5]],
+        min_length=1,
+    )
+    fuels: Optional[FuelsIn] = Field(
+        None,
+        description="The fuels of all intervals, instead of interval_fuels",
+    )
+    interval_fuels: Optional[List[FuelsIn]] = Field(
+        None,
+        description="The fuels of every interval, instead of fuels",
+    )
+    interval_wind_percentages: Optional[List[float]] = Field(
+        None,
+        description="Optional wind percentage of every interval, it replaces the wind of the fuels",
+    )
+    powerplants: List[PowerPlantIn]
+
+    @field_validator("loads")
+    @classmethod
+    def loads_decimals(cls, v: List[float]) -> List[float]:
+        """Make sure that every load is positive and a multiple of settings.PRECISION."""
+        for load in v:
+            if load < 0:
+                raise ValueError(f"Load must be greater than or equal to 0, got {load}")
+            check_load(load)
+        return v
+
+    @field_validator("interval_wind_percentages")
+    @classmethod
+    def wind_percentages_range(cls, v: Optional[List[float]]) -> Optional[List[float]]:
+        """Make sure that every wind percentage is within the allowed range."""
+        for wind_percentage in v or []:
+            FuelsIn.validate_wind_percentage(wind_percentage)
         return v
+
+    @model_validator(mode="after")
+    def intervals_length(self) -> "LoadCurveIn":
+        """Make sure that there are either fuels or interval_fuels and a value for every load."""
+        if (self.fuels is None) == (self.interval_fuels is None):
+            raise ValueError("Either fuels or interval_fuels is required, not both")
+        for name in ("interval_fuels", "interval_wind_percentages"):
+            series = getattr(self, name)
+            if series is not None and len(series) != len(self.loads):
+                raise ValueError(f"{name} must have {len(self.loads)} values, got {len(series)}")
+        return self
+
+    def fuels_of_interval(self, interval: int) -> FuelsIn:
+        """Return the fuels of an interval."""
+        fuels = self.fuels if self.interval_fuels is None else self.interval_fuels[interval]
+        if fuels is None:
+            raise ValueError("Either fuels or interval_fuels is required")
+        if self.interval_wind_percentages is not None:
+            wind_percentage = self.interval_wind_percentages[interval]
+            if wind_percentage != fuels.wind_percentage:
+                fuels = fuels.model_copy(update={"wind_percentage": wind_percentage})
+        return fuels
+
+
+class LoadCurveOut(BaseModel):
+    """Output schema of the production plans of a series of loads as a plant × interval matrix."""
+
+    names: List[str] = Field(
+        examples=[["gasfiredbig1", "windpark1"]],
+        description="The names of the power plants, in the order of the input",
+    )
+    loads: List[float] = Field(
+        examples=[[400.1, 420.0]],
+        description="The load of every interval",
+    )
+    p: List[List[float]] = Field(
+        examples=[[[310.1, 330.0], [90.0, 90.0]]],
+        description="The power of every power plant (rows) in every interval (columns)",
+    )
+
+
+class HorizonIn(LoadCurveIn):
+    """Input schema for the production plans of intervals that have to run one after the other.
+
+    The ramp rates and minimum up and down times of the power plants constrain every interval by
+    the ones before it, starting from the initial state of the power plants.
+    """
+
+    initial_state: Optional[List[PowerPlantStateIn]] = Field(
+        None,
+        description="The state of the power plants before the first interval, power plants that "
+        "are not in it are free in the first interval",
+    )
+    window: int = Field(
+        settings.HORIZON_WINDOW,
+        examples=[16],
+        ge=1,
+        description="The number of latest intervals whose decisions the rolling horizon may change "
+        "when the next interval can not be met, the intervals before them are final",
+    )
+
+    @model_validator(mode="after")
+    def initial_state_plants(self) -> "HorizonIn":
+        """Make sure that every initial state is of a power plant of the input and can run."""
+        powerplants = {pp.name: pp for pp in self.powerplants}
+        names = set()
+        for state in self.initial_state or []:
+            pp = powerplants.get(state.name)
+            if pp is None:
+                raise ValueError(f"Initial state of unknown power plant {state.name}")
+            if state.name in names:
+                raise ValueError(f"Duplicate initial state of power plant {state.name}")
+            names.add(state.name)
+            if not state.running and state.p > 0:
+                raise ValueError(f"Power plant {state.name} is switched off but has p {state.p}")
+            if state.running and not pp.pmin <= state.p <= pp.pmax:
+                raise ValueError(
+                    f"Power plant {state.name} is switched on, p must be between {pp.pmin} and "
+                    f"{pp.pmax}, got {state.p}"
+                )
+        return self
+
+
+class HorizonOut(LoadCurveOut):
+    """Output schema of the production plans of consecutive intervals with their costs."""
+
+    costs: List[float] = Field(
+        examples=[[4030.4, 4290.0]],
+        description="The cost of every interval in euros",
+    )
+    total_cost: float = Field(examples=[8320.4], description="The cost of the horizon in euros")
+
+
+class ProductionPlanCostsOut(BaseModel):
+    """Output schema of a production plan with its costs."""
+
+    plan: List[Dict[str, Union[str, float]]] = Field(
+        examples=[[{"name": "gasfiredbig1", "p": 310.1, "cost": 4030.4}]],
+        description="The power and the cost in euros of every power plant",
+    )
+    total_cost: float = Field(examples=[4030.4], description="The cost of the plan in euros")
+    marginal_plant: Optional[str] = Field(
+        examples=["gasfiredbig1"],
+        description="The most expensive power plant that runs, null when no power plant runs",
+    )
+    marginal_price: Optional[float] = Field(
+        examples=[13.0],
+        description="The cost per MWh of the marginal plant in euros/MWh",
+    )
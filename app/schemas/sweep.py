@@ -0,0 +1,181 @@
+"""Schemas for sweeps of production plan costs over grids of fuels and loads."""
+
+from itertools import product
+from typing import Dict, List, Optional, Union
+
+from pydantic import BaseModel, Field, FiniteFloat, field_validator, model_validator
+
+from app.core.config import settings
+from app.core.units import from_units, to_units
+from app.schemas.fuels import FuelsIn
+from app.schemas.powerplant import PowerPlantIn
+from app.schemas.productionplan import check_load
+
+FUEL_FIELDS = ("gas_price", "kerosine_price", "co2_price", "wind_percentage")
+
+
+class RangeIn(BaseModel):
+    """Input schema for evenly spaced values from start to stop, both included."""
+
+    start: float = Field(..., examples=[10.0], allow_inf_nan=False, description="The first value")
+    stop: float = Field(..., examples=[40.0], allow_inf_nan=False, description="The last value")
+    num: int = Field(
+        ..., examples=[100], ge=1, le=settings.SWEEP_MAX_POINTS, description="The number of values"
+    )
+
+    def values(self) -> List[float]:
+        """Return the values of the range."""
+        if self.num == 1:
+            return [self.start]
+        step = (self.stop - self.start) / (self.num - 1)
+        return [self.start + step * index for index in range(self.num)]
+
+
+# A single finite value or a range of values
+Axis = Union[FiniteFloat, RangeIn]
+
+
+def axis_values(axis: Axis) -> List[float]:
+    """Return the values of a single value or a range."""
+    return axis.values() if isinstance(axis, RangeIn) else [axis]
+
+
+def axis_ends(axis: Axis) -> List[float]:
+    """Return the first and the last value of a single value or a range."""
+    return [axis.start, axis.stop] if isinstance(axis, RangeIn) else [axis]
+
+
+def axis_size(axis: Axis) -> int:
+    """Return the number of values of a single value or a range."""
+    return axis.num if isinstance(axis, RangeIn) else 1
+
+
+class FuelsSweepIn(BaseModel):
+    """Input schema for fuels whose fields are a single value or a range of values."""
+
+    gas_price: Axis = Field(
+        description="The price of gas per MWh in euros/MWh",
+        examples=[{"start": 10.0, "stop": 40.0, "num": 100}],
+    )
+    kerosine_price: Axis = Field(
+        description="The price of kerosine per MWh in euros/MWh",
+        examples=[50.8],
+    )
+    co2_price: Axis = Field(
+        description="The price of CO2 emission certificates in euros/ton",
+        examples=[20],
+    )
+    wind_percentage: Axis = Field(
+        description="The percentage of wind turbine capacity that is available",
+        examples=[{"start": 0.0, "stop": 100.0, "num": 100}],
+    )
+
+    @field_validator("gas_price", "kerosine_price", "co2_price")
+    @classmethod
+    def prices_minimum(cls, v: Axis) -> Axis:
+        """Make sure that every price is at least settings.MIN_FUEL_PRICE."""
+        for price in axis_ends(v):
+            if price < settings.MIN_FUEL_PRICE:
+                raise ValueError(
+                    f"Price must be greater than or equal to {settings.MIN_FUEL_PRICE}, got {price}"
+                )
+        return v
+
+    @field_validator("wind_percentage")
+    @classmethod
+    def wind_percentages_range(cls, v: Axis) -> Axis:
+        """Make sure that every wind percentage is within the allowed range."""
+        for wind_percentage in axis_ends(v):
+            FuelsIn.validate_wind_percentage(wind_percentage)
+        return v
+
+
+class SweepIn(BaseModel):
+    """Input schema for the production plan costs of a fleet over a grid of fuels and loads."""
+
+    load: Axis = Field(
+        ...,
+        description="The load (MWh) or a range of loads, the loads of a range are rounded to "
+        "multiples of the precision",
+        examples=[{"start": 100.0, "stop": 500.0, "num": 50}],
+    )
+    fuels: FuelsSweepIn
+    powerplants: List[PowerPlantIn]
+
+    @field_validator("load")
+    @classmethod
+    def load_decimals(cls, v: Axis) -> Axis:
+        """Make sure that the loads are positive and that a single load is a multiple of
+        settings.PRECISION."""
+        for load in axis_ends(v):
+            if load < 0:
+                raise ValueError(f"Load must be greater than or equal to 0, got {load}")
+        if not isinstance(v, RangeIn):
+            check_load(v)
+        return v
+
+    @model_validator(mode="after")
+    def points_limit(self) -> "SweepIn":
+        """Make sure that the grid has at most settings.SWEEP_MAX_POINTS points."""
+        points = axis_size(self.load)
+        for field in FUEL_FIELDS:
+            points *= axis_size(getattr(self.fuels, field))
+        if points > settings.SWEEP_MAX_POINTS:
+            raise ValueError(
+                f"The sweep has {points} points, at most {settings.SWEEP_MAX_POINTS} are allowed"
+            )
+        return self
+
+    def axes(self) -> Dict[str, List[float]]:
+        """Return the values of the fuel fields and of the load, in the order of the grid."""
+        axes = {field: axis_values(getattr(self.fuels, field)) for field in FUEL_FIELDS}
+        axes["load"] = self.loads()
+        return axes
+
+    def swept_axes(self) -> Dict[str, List[float]]:
+        """Return the axes that are a range, in the order of the grid."""
+        swept = {field: getattr(self.fuels, field) for field in FUEL_FIELDS}
+        swept["load"] = self.load
+        return {
+            name: values for name, values in self.axes().items() if isinstance(swept[name], RangeIn)
+        }
+
+    def loads(self) -> List[float]:
+        """Return the loads, rounded to multiples of settings.PRECISION."""
+        return [from_units(to_units(load)) for load in axis_values(self.load)]
+
+    def fuel_points(self) -> List[FuelsIn]:
+        """Return the fuels of every point of the fuel axes, the last axis changes fastest."""
+        values = [axis_values(getattr(self.fuels, field)) for field in FUEL_FIELDS]
+        return [
+            FuelsIn.model_construct(**dict(zip(FUEL_FIELDS, point))) for point in product(*values)
+        ]
+
+
+class SweepAxisOut(BaseModel):
+    """Output schema of an axis of a sweep."""
+
+    name: str = Field(examples=["gas_price"], description="The fuel field or load")
+    values: List[float] = Field(examples=[[10.0, 25.0, 40.0]], description="The values")
+
+
+class SweepOut(BaseModel):
+    """Output schema of the production plan costs of a sweep."""
+
+    axes: List[SweepAxisOut] = Field(
+        description="The axes that are a range, in the order gas_price, kerosine_price, "
+        "co2_price, wind_percentage and load"
+    )
+    cost: List[Optional[float]] = Field(
+        description="The total cost in euros of the merit order plan at every point of the axes, "
+        "row-major with the last axis changing fastest. Null where the load can not be met",
+    )
+    names: List[str] = Field(
+        examples=[["gasfiredbig1", "windpark1"]],
+        description="The names of the power plants, in the order of the input",
+    )
+    switch_loads: List[Optional[float]] = Field(
+        description="For every point of the fuel axes and every power plant, row-major with the "
+        "power plants changing fastest: the load above which the power plant runs in the merit "
+        "order plan. Null when it never runs",
+    )
@@ -0,0 +1,21 @@
+"""Gunicorn worker of the production server, see gunicorn.conf.py."""
+
+from typing import Any, Dict
+
+from uvicorn_worker import UvicornWorker as BaseUvicornWorker
+
+from app.core.config import settings
+
+
+class UvicornWorker(BaseUvicornWorker):
+    """Uvicorn worker that runs on uvloop and httptools when they are installed.
+
+    On shutdown the worker stops accepting connections and gives the in-flight requests
+    settings.SERVER_GRACEFUL_TIMEOUT seconds to finish before the lifespan shutdown runs.
+    """
+
+    CONFIG_KWARGS: Dict[str, Any] = {
+        "loop": "auto",
+        "http": "auto",
+        "timeout_graceful_shutdown": settings.SERVER_GRACEFUL_TIMEOUT,
+    }
@@ -0,0 +1,72 @@
+"""Test the production plans of a batch of scenarios."""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.executor import solver_executor
+
+FUELS = {"gas_price": 13.4, "kerosine_price": 50.8, "co2_price": 20, "wind_percentage": 60}
+POWERPLANTS = [
+    {"name": "gasfiredbig1", "type": "gasfired", "efficiency": 0.53, "pmin": 100, "pmax": 460},
+    {"name": "tj1", "type": "turbojet", "efficiency": 0.3, "pmin": 0, "pmax": 16},
+    {"name": "windpark1", "type": "windturbine", "efficiency": 1, "pmin": 0, "pmax": 150},
+]
+
+
+@pytest.mark.parametrize("mode", ["inline", "thread"])  # type: ignore
+def test_batch_is_solved_by_the_solver_executor(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch, mode: str
+) -> None:
+    monkeypatch.setattr(solver_executor, "mode", mode)
+    monkeypatch.setattr(solver_executor, "threshold", 1)
+    inline, offloaded = solver_executor.inline, solver_executor.offloaded
+    scenarios = [{"load": load, "fuels": FUELS} for load in (200, 300, 400)]
+    response = client.post(
+        "/api/v1/productionplan/batch", json={"powerplants": POWERPLANTS, "scenarios": scenarios}
+    )
+    assert response.status_code == 200
+    assert [sum(pp["p"] for pp in plan) for plan in response.json()] == [200, 300, 400]
+    # one run per batch, not one per scenario
+    assert solver_executor.offloaded - offloaded == (1 if mode == "thread" else 0)
+    assert solver_executor.inline - inline == (1 if mode == "inline" else 0)
+
+
+def test_batch_matches_single_requests(client: TestClient) -> None:
+    # the fuels change between scenarios, so the batch reprices its plants in between
+    calm = {**FUELS, "wind_percentage": 0}
+    expensive_gas = {**FUELS, "gas_price": 200.0}
+    scenarios = [
+        {"load": 480, "fuels": FUELS},
+        {"load": 470, "fuels": calm},
+        {"load": 300, "fuels": calm},
+        {"load": 150, "fuels": expensive_gas},
+        {"load": 0, "fuels": FUELS},
+    ]
+    response = client.post(
+        "/api/v1/productionplan/batch", json={"powerplants": POWERPLANTS, "scenarios": scenarios}
+    )
+    assert response.status_code == 200
+    plans = response.json()
+    assert len(plans) == len(scenarios)
+    for scenario, plan in zip(scenarios, plans):
+        single = client.post(
+            "/api/v1/productionplan/", json={**scenario, "powerplants": POWERPLANTS}
+        )
+        assert single.status_code == 200
+        assert plan == single.json()
+
+
+def test_batch_with_an_infeasible_scenario(client: TestClient) -> None:
+    scenarios = [
+        {"load": 200, "fuels": FUELS},
+        {"load": 300, "fuels": FUELS},
+        {"load": 9999, "fuels": FUELS},
+        {"load": 400, "fuels": FUELS},
+    ]
+    response = client.post(
+        "/api/v1/productionplan/batch", json={"powerplants": POWERPLANTS, "scenarios": scenarios}
+    )
+    assert response.status_code == 422
+    assert response.json()["detail"].startswith(
+        "Scenario 2: No feasible production plan for a load of 9999"
+    )
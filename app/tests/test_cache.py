@@ -0,0 +1,90 @@
+"""Test the plan cache and its canonical request hash."""
+
+from typing import Any, Dict
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import cache
+from app.core.cache import PlanCache
+from app.schemas import ProductionPlanIn
+
+FUELS = {"gas_price": 13.4, "kerosine_price": 50.8, "co2_price": 20, "wind_percentage": 60}
+POWERPLANTS = [
+    {"name": "gasfiredbig1", "type": "gasfired", "efficiency": 0.53, "pmin": 100, "pmax": 460},
+    {"name": "tj1", "type": "turbojet", "efficiency": 0.3, "pmin": 0, "pmax": 16},
+    {"name": "windpark1", "type": "windturbine", "efficiency": 1, "pmin": 0, "pmax": 150},
+]
+
+
+def payload(load: float) -> Dict[str, Any]:
+    """Return a production plan request for the load."""
+    return {"load": load, "fuels": FUELS, "powerplants": POWERPLANTS}
+
+
+def reordered(load: float) -> Dict[str, Any]:
+    """Return the request of payload(load) with its keys and power plants in another order."""
+    return {
+        "powerplants": [dict(reversed(list(pp.items()))) for pp in reversed(POWERPLANTS)],
+        "fuels": dict(reversed(list(FUELS.items()))),
+        "load": load,
+    }
+
+
+def test_canonical_hash_ignores_key_and_plant_order() -> None:
+    def key(data: Dict[str, Any]) -> str:
+        return ProductionPlanIn.model_validate(data).canonical_hash()
+
+    assert key(payload(480)) == key(reordered(480))
+    assert key(payload(480)) != key(payload(480.1))
+    assert key(payload(480)) != key({**payload(480), "fuels": {**FUELS, "gas_price": 13.5}})
+
+
+def test_identical_requests_hit_the_cache(client: TestClient) -> None:
+    first = client.post("/api/v1/productionplan/", json=payload(321.4))
+    assert first.status_code == 200
+    assert first.headers["X-Cache"] == "MISS"
+
+    second = client.post("/api/v1/productionplan/", json=reordered(321.4))
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.json() == first.json()
+
+    # the engine is part of the key, another engine solves again
+    third = client.post("/api/v1/productionplan/?engine=greedy", json=payload(321.4))
+    assert third.headers["X-Cache"] == "MISS"
+
+
+def test_infeasible_requests_are_not_cached(client: TestClient) -> None:
+    for _ in range(2):
+        response = client.post("/api/v1/productionplan/", json=payload(9999))
+        assert response.status_code == 422
+        assert "X-Cache" not in response.headers
+
+
+def test_least_recently_used_entries_are_evicted() -> None:
+    plans = PlanCache(max_size=2, ttl=0)
+    plans.set("a", 1)
+    plans.set("b", 2)
+    assert plans.get("a") == 1
+    plans.set("c", 3)
+    assert plans.get("b") is None
+    assert (plans.get("a"), plans.get("c")) == (1, 3)
+    assert plans.evictions == 1
+
+
+def test_entries_expire_after_the_ttl(monkeypatch: pytest.MonkeyPatch) -> None:
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    plans = PlanCache(max_size=10, ttl=60)
+    plans.set("a", 1)
+    now[0] += 59
+    assert plans.get("a") == 1
+    now[0] += 2
+    assert plans.get("a") is None
+
+
+def test_max_size_zero_disables_the_cache() -> None:
+    plans = PlanCache(max_size=0, ttl=60)
+    plans.set("a", 1)
+    assert plans.get("a") is None
+    assert len(plans) == 0
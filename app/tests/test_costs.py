@@ -0,0 +1,73 @@
+"""Test the production plans with their costs."""
+
+import math
+
+import pytest
+from fastapi.testclient import TestClient
+
+FUELS = {"gas_price": 13.4, "kerosine_price": 50.8, "co2_price": 20, "wind_percentage": 60}
+POWERPLANTS = [
+    {"name": "gasfiredbig1", "type": "gasfired", "efficiency": 0.53, "pmin": 100, "pmax": 460},
+    {"name": "tj1", "type": "turbojet", "efficiency": 0.3, "pmin": 0, "pmax": 16},
+    {"name": "windpark1", "type": "windturbine", "efficiency": 1, "pmin": 0, "pmax": 150},
+]
+URLS = ["/api/v1/productionplan/", "/api/v1/productionplan/fast"]
+
+# gas costs its price over the efficiency plus 0.3 tons of CO2 per MWh, kerosine emits none
+GAS_PRICE = 13.4 / 0.53 + 0.3 * 20
+KEROSINE_PRICE = 50.8 / 0.3
+
+
+@pytest.mark.parametrize("url", URLS)  # type: ignore
+def test_costs_of_a_plan(client: TestClient, url: str) -> None:
+    # the wind park runs at 60% of 150, the gas plant at its pmax and the turbo jet covers the rest
+    response = client.post(
+        url,
+        params={"include_costs": "true"},
+        json={"load": 560, "fuels": FUELS, "powerplants": POWERPLANTS},
+    )
+    assert response.status_code == 200
+    result = response.json()
+    costs = {pp["name"]: (pp["p"], pp["cost"]) for pp in result["plan"]}
+    assert costs["windpark1"] == (90.0, 0.0)
+    assert costs["gasfiredbig1"][0] == 460.0
+    assert costs["gasfiredbig1"][1] == pytest.approx(460 * GAS_PRICE)
+    assert costs["tj1"][0] == 10.0
+    assert costs["tj1"][1] == pytest.approx(10 * KEROSINE_PRICE)
+    assert result["total_cost"] == pytest.approx(460 * GAS_PRICE + 10 * KEROSINE_PRICE)
+    assert result["marginal_plant"] == "tj1"
+    assert result["marginal_price"] == pytest.approx(KEROSINE_PRICE)
+    assert all(math.isfinite(pp["cost"]) for pp in result["plan"])
+
+
+@pytest.mark.parametrize("url", URLS)  # type: ignore
+def test_costs_of_a_plan_without_fuel(client: TestClient, url: str) -> None:
+    response = client.post(
+        url,
+        params={"include_costs": "true"},
+        json={"load": 80, "fuels": FUELS, "powerplants": POWERPLANTS},
+    )
+    assert response.status_code == 200
+    result = response.json()
+    assert {pp["name"]: pp["cost"] for pp in result["plan"]} == {
+        "windpark1": 0.0,
+        "gasfiredbig1": 0.0,
+        "tj1": 0.0,
+    }
+    assert result["total_cost"] == 0.0
+    assert result["marginal_plant"] == "windpark1"
+    assert result["marginal_price"] == 0.0
+
+
+@pytest.mark.parametrize("url", URLS)  # type: ignore
+def test_costs_of_an_empty_plan(client: TestClient, url: str) -> None:
+    response = client.post(
+        url,
+        params={"include_costs": "true"},
+        json={"load": 0, "fuels": FUELS, "powerplants": POWERPLANTS},
+    )
+    assert response.status_code == 200
+    result = response.json()
+    assert result["total_cost"] == 0.0
+    assert result["marginal_plant"] is None
+    assert result["marginal_price"] is None
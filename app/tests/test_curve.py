@@ -0,0 +1,65 @@
+"""Test the production plans of a load curve."""
+
+from typing import Any, Dict
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.executor import solver_executor
+
+FUELS = {"gas_price": 13.4, "kerosine_price": 50.8, "co2_price": 20, "wind_percentage": 60}
+CALM = {**FUELS, "wind_percentage": 0}
+POWERPLANTS = [
+    {"name": "gasfiredbig1", "type": "gasfired", "efficiency": 0.53, "pmin": 100, "pmax": 460},
+    {"name": "windpark1", "type": "windturbine", "efficiency": 1, "pmin": 0, "pmax": 150},
+]
+
+
+def payload(**fuels: Any) -> Dict[str, Any]:
+    """Return a load curve request with the given fuels fields."""
+    return {"loads": [300, 300], "powerplants": POWERPLANTS, **fuels}
+
+
+def test_curve_with_fuels(client: TestClient) -> None:
+    response = client.post("/api/v1/productionplan/curve", json=payload(fuels=FUELS))
+    assert response.status_code == 200
+    assert response.json()["p"] == [[210.0, 210.0], [90.0, 90.0]]
+
+
+def test_curve_with_only_interval_fuels(client: TestClient) -> None:
+    response = client.post(
+        "/api/v1/productionplan/curve", json=payload(interval_fuels=[FUELS, CALM])
+    )
+    assert response.status_code == 200
+    assert response.json()["p"] == [[210.0, 300.0], [90.0, 0.0]]
+
+
+@pytest.mark.parametrize(  # type: ignore
+    "fuels",
+    [{}, {"fuels": FUELS, "interval_fuels": [FUELS, CALM]}, {"interval_fuels": [FUELS]}],
+)
+def test_curve_requires_fuels_for_every_interval(client: TestClient, fuels: Dict[str, Any]) -> None:
+    response = client.post("/api/v1/productionplan/curve", json=payload(**fuels))
+    assert response.status_code == 422
+
+
+@pytest.mark.parametrize("mode", ["inline", "thread"])  # type: ignore
+def test_curve_is_solved_by_the_solver_executor(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch, mode: str
+) -> None:
+    monkeypatch.setattr(solver_executor, "mode", mode)
+    monkeypatch.setattr(solver_executor, "threshold", 1)
+    inline, offloaded = solver_executor.inline, solver_executor.offloaded
+    response = client.post("/api/v1/productionplan/curve", json=payload(fuels=FUELS))
+    assert response.status_code == 200
+    assert response.json()["p"] == [[210.0, 210.0], [90.0, 90.0]]
+
+    response = client.post(
+        "/api/v1/productionplan/curve",
+        json={"loads": [300, 9999], "powerplants": POWERPLANTS, "fuels": FUELS},
+    )
+    assert response.status_code == 422
+    assert response.json()["detail"].startswith("Interval 1: No feasible production plan")
+    # one run per curve, not one per interval
+    assert solver_executor.offloaded - offloaded == (2 if mode == "thread" else 0)
+    assert solver_executor.inline - inline == (2 if mode == "inline" else 0)
@@ -0,0 +1,110 @@
+"""Test the versions of registered fleets and their store."""
+
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.models import fleetstore
+from app.models.fleetstore import FleetStore
+from app.schemas import PowerPlantIn
+
+FUELS = {"gas_price": 13.4, "kerosine_price": 50.8, "co2_price": 20, "wind_percentage": 60}
+POWERPLANTS: List[Dict[str, Any]] = [
+    {"name": "gasfiredbig1", "type": "gasfired", "efficiency": 0.53, "pmin": 100, "pmax": 460},
+    {"name": "tj1", "type": "turbojet", "efficiency": 0.3, "pmin": 0, "pmax": 16},
+]
+UNKNOWN_FLEET = "0" * 32
+
+
+def powerplants(count: int) -> List[PowerPlantIn]:
+    """Return the first count power plants as validated input schemas."""
+    return [PowerPlantIn.model_validate(pp) for pp in POWERPLANTS[:count]]
+
+
+def test_fleet_versions(client: TestClient) -> None:
+    response = client.post("/api/v1/fleets/", json={"powerplants": POWERPLANTS[:1]})
+    assert response.status_code == 201
+    fleet_id = response.json()["fleet_id"]
+    assert response.json()["version"] == 1
+
+    response = client.put(f"/api/v1/fleets/{fleet_id}", json={"powerplants": POWERPLANTS})
+    assert response.json() == {"fleet_id": fleet_id, "version": 2, "size": 2}
+    assert client.get(f"/api/v1/fleets/{fleet_id}").json()["version"] == 2
+    assert client.get(f"/api/v1/fleets/{fleet_id}?version=1").json()["size"] == 1
+
+    # the newest version is used unless the request names one
+    plan = {"load": 476, "fuels": FUELS, "fleet_id": fleet_id}
+    response = client.post("/api/v1/productionplan/", json=plan)
+    assert {pp["name"]: pp["p"] for pp in response.json()} == {"gasfiredbig1": 460, "tj1": 16}
+    response = client.post("/api/v1/productionplan/", json={**plan, "fleet_version": 1})
+    assert response.status_code == 422
+
+    response = client.post(
+        f"/api/v1/fleets/{fleet_id}/productionplan?version=1", json={"load": 300, "fuels": FUELS}
+    )
+    assert response.json() == [{"name": "gasfiredbig1", "p": 300.0}]
+
+
+def test_unknown_fleets_and_versions_are_404(client: TestClient) -> None:
+    fleet_id = client.post("/api/v1/fleets/", json={"powerplants": POWERPLANTS}).json()["fleet_id"]
+    scenario = {"load": 300, "fuels": FUELS}
+    for url in [f"/api/v1/fleets/{UNKNOWN_FLEET}", f"/api/v1/fleets/{fleet_id}?version=2"]:
+        assert client.get(url).status_code == 404
+    assert (
+        client.put(f"/api/v1/fleets/{UNKNOWN_FLEET}", json={"powerplants": POWERPLANTS}).status_code
+        == 404
+    )
+    assert (
+        client.post(f"/api/v1/fleets/{UNKNOWN_FLEET}/productionplan", json=scenario).status_code
+        == 404
+    )
+    plan = {**scenario, "fleet_id": fleet_id, "fleet_version": 2}
+    assert client.post("/api/v1/productionplan/", json=plan).status_code == 404
+
+    assert client.delete(f"/api/v1/fleets/{fleet_id}").status_code == 204
+    assert client.get(f"/api/v1/fleets/{fleet_id}").status_code == 404
+    assert client.delete(f"/api/v1/fleets/{fleet_id}").status_code == 404
+    plan = {**scenario, "fleet_id": fleet_id}
+    assert client.post("/api/v1/productionplan/", json=plan).status_code == 404
+
+
+def test_store_sees_the_versions_of_other_processes(tmp_path: Path) -> None:
+    store, other = FleetStore(str(tmp_path), 10), FleetStore(str(tmp_path), 10)
+    fleet_id = "a" * 32
+    assert store.save(fleet_id, powerplants(1)) == 1
+    assert store.versions(fleet_id) == [1]
+    assert other.save(fleet_id, powerplants(2)) == 2
+    assert store.versions(fleet_id) == [1, 2]
+    stored = store.load(fleet_id)
+    assert stored is not None and (stored.version, len(stored)) == (2, 2)
+    assert store.load(fleet_id, 3) is None
+    assert other.delete(fleet_id)
+    assert store.versions(fleet_id) == [] and store.load(fleet_id) is None
+
+
+def test_store_lists_an_unchanged_fleet_once(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    store = FleetStore(str(tmp_path), 10)
+    fleet_id = "b" * 32
+    store.save(fleet_id, powerplants(2))
+    # the directory counts as changed long ago, so its listing is cached
+    monkeypatch.setattr(fleetstore.time, "time_ns", lambda: 2**62)
+    listings = []
+    listdir = fleetstore.os.listdir
+
+    def counted_listdir(path: str) -> List[str]:
+        listings.append(path)
+        return listdir(path)
+
+    monkeypatch.setattr(fleetstore.os, "listdir", counted_listdir)
+    for _ in range(3):
+        assert store.versions(fleet_id) == [1]
+    assert len(listings) == 1
+
+    stored = store.load(fleet_id)
+    assert stored is not None
+    assert stored.plant_values() is stored.plant_values()
+    assert stored.plant_values()[0] == ("gasfiredbig1", "gasfired", 0.53, 100.0, 460.0)
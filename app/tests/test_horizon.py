@@ -0,0 +1,187 @@
+"""Test that the horizon planning respects ramp rates and minimum up and down times."""
+
+import random
+from typing import Any, Dict, List, Optional
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.exceptions import InfeasibleLoadError
+from app.models.horizon import plan_horizon
+from app.schemas import HorizonIn
+
+FUELS = {"gas_price": 13.4, "kerosine_price": 50.8, "co2_price": 20, "wind_percentage": 60}
+
+
+def check_plan(horizon: HorizonIn, p: List[List[float]]) -> None:
+    """Assert that the plan meets every load and constraint, a plant runs when its power is > 0.
+
+    A plant without initial state is free in the first interval, when it runs in it it was
+    started in it.
+    """
+    states = {state.name: state for state in horizon.initial_state or []}
+    for interval, load in enumerate(horizon.loads):
+        assert sum(row[interval] for row in p) == pytest.approx(load, abs=1e-6)
+    for pp, row in zip(horizon.powerplants, p):
+        state = states.get(pp.name)
+        prev_p = 0.0 if state is None else state.p
+        prev_on = state is not None and state.running
+        # intervals in the previous state, None when it is not known or served
+        since: Optional[int] = None if state is None else state.intervals
+        for interval, power in enumerate(row):
+            on = power > 0
+            if on:
+                assert pp.pmin - 1e-9 <= power <= pp.pmax + 1e-9
+            ramp_up = pp.ramp_up if pp.ramp_up is not None else float("inf")
+            ramp_down = pp.ramp_down if pp.ramp_down is not None else float("inf")
+            if on and prev_on:
+                assert prev_p - ramp_down - 1e-9 <= power <= prev_p + ramp_up + 1e-9
+            elif on and (state is not None or interval > 0):
+                assert power <= max(pp.pmin, ramp_up) + 1e-9
+                assert since is None or since >= (pp.min_down or 1)
+            elif prev_on:
+                assert prev_p <= max(pp.pmin, ramp_down) + 1e-9
+                assert since is None or since >= (pp.min_up or 1)
+            since = (
+                since + 1 if on == prev_on and since is not None else (1 if on != prev_on else None)
+            )
+            prev_p, prev_on = power, on
+
+
+def horizon_input(
+    powerplants: List[Dict[str, Any]],
+    loads: List[float],
+    initial_state: Optional[List[Dict[str, Any]]] = None,
+) -> HorizonIn:
+    """Return a validated horizon input."""
+    data = {"loads": loads, "fuels": FUELS, "powerplants": powerplants}
+    if initial_state is not None:
+        data["initial_state"] = initial_state
+    return HorizonIn.model_validate(data)
+
+
+def test_a_plant_started_in_the_first_interval_serves_its_minimum_up_time() -> None:
+    powerplants = [
+        {
+            "name": "cheap",
+            "type": "gasfired",
+            "efficiency": 0.53,
+            "pmin": 50,
+            "pmax": 200,
+            "min_up": 3,
+        },
+        {"name": "peaker", "type": "turbojet", "efficiency": 0.3, "pmin": 0, "pmax": 200},
+    ]
+    horizon = horizon_input(powerplants, [150, 60, 60, 20])
+    plan = plan_horizon(horizon)
+    check_plan(horizon, plan.p)
+    assert plan.p[0][:3] == [150.0, 60.0, 60.0]
+    assert plan.p[0][3] == 0.0
+
+
+def test_a_plant_that_can_not_stay_on_long_enough_is_not_started() -> None:
+    powerplants = [
+        {
+            "name": "cheap",
+            "type": "gasfired",
+            "efficiency": 0.53,
+            "pmin": 50,
+            "pmax": 200,
+            "min_up": 3,
+        },
+        {"name": "peaker", "type": "turbojet", "efficiency": 0.3, "pmin": 0, "pmax": 200},
+    ]
+    horizon = horizon_input(powerplants, [150, 30, 30])
+    plan = plan_horizon(horizon)
+    check_plan(horizon, plan.p)
+    assert plan.p == [[0.0, 0.0, 0.0], [150.0, 30.0, 30.0]]
+    assert plan.repairs >= 1
+
+
+def test_ramps_and_minimum_down_time_from_the_initial_state() -> None:
+    powerplants = [
+        {
+            "name": "big",
+            "type": "gasfired",
+            "efficiency": 0.53,
+            "pmin": 100,
+            "pmax": 460,
+            "ramp_up": 100,
+            "ramp_down": 100,
+            "min_down": 2,
+        },
+        {"name": "peaker", "type": "turbojet", "efficiency": 0.3, "pmin": 0, "pmax": 500},
+    ]
+    initial_state = [{"name": "big", "p": 0, "on": False, "intervals": 1}]
+    horizon = horizon_input(powerplants, [300, 300, 300, 300, 100], initial_state)
+    plan = plan_horizon(horizon)
+    check_plan(horizon, plan.p)
+    # still in its minimum down time, then ramping up from its start at max(pmin, ramp_up) and
+    # held at 200 so that it can ramp down to the last load
+    assert plan.p[0] == [0.0, 100.0, 200.0, 200.0, 100.0]
+
+
+def test_infeasible_ramp_is_rejected(client: TestClient) -> None:
+    powerplants = [
+        {
+            "name": "big",
+            "type": "gasfired",
+            "efficiency": 0.53,
+            "pmin": 100,
+            "pmax": 460,
+            "ramp_up": 50,
+        }
+    ]
+    data = {"loads": [100, 300], "fuels": FUELS, "powerplants": powerplants}
+    with pytest.raises(InfeasibleLoadError):
+        plan_horizon(HorizonIn.model_validate(data))
+    response = client.post("/api/v1/productionplan/horizon", json=data)
+    assert response.status_code == 422
+
+
+def random_horizon(seed: int) -> HorizonIn:
+    """Return random power plants with constraints, loads and initial state."""
+    rng = random.Random(seed)
+    powerplants, initial_state = [], []
+    for index in range(rng.randint(1, 4)):
+        pmax = float(rng.randrange(50, 300, 10))
+        pp: Dict[str, Any] = {
+            "name": f"gas{index}",
+            "type": rng.choice(["gasfired", "turbojet"]),
+            "efficiency": rng.choice([0.3, 0.37, 0.53]),
+            "pmin": float(rng.randrange(10, int(pmax) + 1, 10)),
+            "pmax": pmax,
+        }
+        for field in ("ramp_up", "ramp_down"):
+            if rng.random() < 0.6:
+                pp[field] = float(rng.randrange(10, 150, 10))
+        for field in ("min_up", "min_down"):
+            if rng.random() < 0.6:
+                pp[field] = rng.randint(1, 4)
+        powerplants.append(pp)
+        if rng.random() < 0.5:
+            running = rng.random() < 0.5
+            initial_state.append(
+                {
+                    "name": pp["name"],
+                    "p": pp["pmin"] if running else 0.0,
+                    "on": running,
+                    "intervals": rng.randint(1, 4),
+                }
+            )
+    powerplants.append(
+        {"name": "wind", "type": "windturbine", "efficiency": 1, "pmin": 0, "pmax": 50}
+    )
+    capacity = sum(pp["pmax"] for pp in powerplants)
+    loads = [float(rng.randrange(30, int(capacity * 0.8), 10)) for _ in range(rng.randint(2, 10))]
+    return horizon_input(powerplants, loads, initial_state)
+
+
+@pytest.mark.parametrize("seed", range(200))  # type: ignore
+def test_random_plans_respect_the_constraints(seed: int) -> None:
+    horizon = random_horizon(seed)
+    try:
+        plan = plan_horizon(horizon)
+    except InfeasibleLoadError:
+        return
+    check_plan(horizon, plan.p)
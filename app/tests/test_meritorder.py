@@ -0,0 +1,115 @@
+"""Test that the merit order engines and the cost curve give the same production plans."""
+
+import random
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pytest
+
+from app.core.exceptions import InfeasibleLoadError
+from app.models.meritorder import MeritOrder
+from app.models.powerplants import PowerPlant, create_power_plant
+from app.schemas import FuelsIn
+
+FUELS = FuelsIn(gas_price=13.4, kerosine_price=50.8, co2_price=20, wind_percentage=60)
+
+
+def random_power_plants(seed: int) -> List[PowerPlant]:
+    """Return a random fleet, with ties in cost and plants whose pmin needs a back-off."""
+    rng = random.Random(seed)
+    power_plants = []
+    for index in range(rng.randint(1, 12)):
+        plant_type = rng.choice(["gasfired", "turbojet", "windturbine"])
+        pmax = round(rng.uniform(5, 300), 1)
+        pmin = 0.0 if plant_type == "windturbine" else round(rng.uniform(0, pmax), 1)
+        efficiency = 1.0 if plant_type == "windturbine" else rng.choice([0.3, 0.37, 0.53])
+        power_plants.append(
+            create_power_plant(plant_type, f"{plant_type}{index}", efficiency, pmin, pmax, FUELS)
+        )
+    return power_plants
+
+
+def greedy_plan(power_plants: List[PowerPlant], load: float, engine: str) -> Optional[Dict]:
+    """Return the power of every plant by name, None when the engine finds the load infeasible."""
+    try:
+        MeritOrder(power_plants, load, engine=engine).set_loads()
+    except InfeasibleLoadError:
+        return None
+    return {pp.name: pp.p for pp in power_plants}
+
+
+@pytest.mark.parametrize("seed", range(100))  # type: ignore
+def test_numpy_engine_matches_object_engine(seed: int) -> None:
+    power_plants = random_power_plants(seed)
+    capacity = sum(pp.real_pmax for pp in power_plants)
+    for load in np.round(np.linspace(0, capacity * 1.1, 25), 1).tolist():
+        expected = greedy_plan(power_plants, load, "object")
+        assert greedy_plan(power_plants, load, "numpy") == expected, load
+
+
+@pytest.mark.parametrize("seed", range(20))  # type: ignore
+def test_solve_many_matches_set_loads(seed: int) -> None:
+    power_plants = random_power_plants(seed)
+    capacity = sum(pp.real_pmax for pp in power_plants)
+    loads = np.round(np.linspace(0, capacity * 1.1, 40), 1).tolist()
+    solver = MeritOrder(power_plants, 0)
+    outputs, feasible = solver.solve_many(loads)
+    for load, row, ok in zip(loads, outputs.tolist(), feasible.tolist()):
+        expected = greedy_plan(list(solver.power_plants), load, "object")
+        assert ok == (expected is not None), load
+        if ok:
+            assert dict(zip([pp.name for pp in solver.power_plants], row)) == expected
+
+
+def merit_order_costs(power_plants: List[PowerPlant], load: float) -> Optional[Tuple[float, float]]:
+    """Return the total cost and the marginal cost of the greedy plan, None when it is infeasible."""
+    solver = MeritOrder(power_plants, load, engine="object", presorted=True)
+    try:
+        solver.set_loads()
+    except InfeasibleLoadError:
+        return None
+    marginal = solver.marginal_plant
+    total = sum(pp.cost(pp.p) for pp in power_plants)
+    return total, marginal.cost_per_mw if marginal else 0.0
+
+
+@pytest.mark.parametrize("seed", range(50))  # type: ignore
+def test_cost_curve_matches_set_loads(seed: int) -> None:
+    power_plants = random_power_plants(seed)
+    curve = MeritOrder(power_plants, 0).cost_curve()
+    names = [pp.name for pp in power_plants]
+    capacity = sum(pp.real_pmax for pp in power_plants)
+    loads = np.round(np.linspace(0, capacity * 1.1, 40), 1).tolist()
+    totals, marginals, feasible = curve.evaluate(np.array(loads))
+    for load, total, marginal, ok in zip(loads, totals, marginals, feasible):
+        expected = greedy_plan(list(power_plants), load, "object")
+        costs = merit_order_costs(list(power_plants), load)
+        assert ok == (expected is not None) == (costs is not None), load
+        if expected is None or costs is None:
+            with pytest.raises(InfeasibleLoadError):
+                curve.plan(load)
+            assert np.isnan(total) and np.isnan(marginal)
+            continue
+        assert dict(zip(names, curve.plan(load))) == expected, load
+        assert curve.total_cost(load) == pytest.approx(costs[0]), load
+        assert curve.marginal_cost(load) == pytest.approx(costs[1]), load
+        assert total == pytest.approx(costs[0]), load
+        assert marginal == pytest.approx(costs[1]), load
+
+
+def test_cost_curve_backs_off_the_previous_plant() -> None:
+    # 120 MW leaves 20 MW for gas2, below its pmin of 50, so gas1 is backed off to 70 MW
+    power_plants = [
+        create_power_plant("gasfired", "gas1", 0.53, 0, 100, FUELS),
+        create_power_plant("gasfired", "gas2", 0.5, 50, 200, FUELS),
+    ]
+    curve = MeritOrder(power_plants, 0).cost_curve()
+    assert curve.plan(120) == [70.0, 50.0]
+    assert greedy_plan(list(power_plants), 120, "object") == {"gas1": 70.0, "gas2": 50.0}
+    gas1, gas2 = (pp.cost_per_mw for pp in power_plants)
+    assert curve.total_cost(120) == pytest.approx(70 * gas1 + 50 * gas2)
+    assert curve.marginal_cost(120) == gas2
+    totals, marginals, feasible = curve.evaluate(np.array([120.0]))
+    assert feasible.tolist() == [True]
+    assert totals[0] == pytest.approx(70 * gas1 + 50 * gas2)
+    assert marginals[0] == gas2
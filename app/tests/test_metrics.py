@@ -0,0 +1,70 @@
+"""Test the metrics of the production plan requests in the Prometheus text format."""
+
+from typing import Dict
+
+from fastapi.testclient import TestClient
+
+from app.core.cache import plan_cache
+
+FUELS = {"gas_price": 13.4, "kerosine_price": 50.8, "co2_price": 20, "wind_percentage": 60}
+POWERPLANTS = [
+    {"name": "gasfiredbig1", "type": "gasfired", "efficiency": 0.53, "pmin": 100, "pmax": 460},
+    {"name": "tj1", "type": "turbojet", "efficiency": 0.3, "pmin": 0, "pmax": 16},
+]
+URL = "/api/v1/productionplan/"
+
+
+def samples(client: TestClient) -> Dict[str, float]:
+    """Return the value of every series of /metrics by its name and labels."""
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    series = {}
+    for line in response.text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            series[name] = float(value)
+    return series
+
+
+def test_metrics_of_production_plan_requests(client: TestClient) -> None:
+    plan_cache.clear()
+    before = samples(client)
+    payload = {"load": 333.3, "fuels": FUELS, "powerplants": POWERPLANTS}
+    assert client.post(URL, json=payload).status_code == 200
+    assert client.post(URL, json=payload).headers["X-Cache"] == "HIT"
+    assert client.post(URL, json={**payload, "load": 9999}).status_code == 422
+    after = samples(client)
+
+    def delta(series: str) -> float:
+        return after.get(series, 0.0) - before.get(series, 0.0)
+
+    text = client.get("/metrics").text
+    for name, kind in [
+        ("productionplan_stage_duration_seconds", "histogram"),
+        ("productionplan_solver_outcomes_total", "counter"),
+        ("productionplan_cache_lookups_total", "counter"),
+        ("productionplan_solver_duration_seconds", "histogram"),
+        ("http_request_duration_seconds", "histogram"),
+    ]:
+        assert f"# TYPE {name} {kind}" in text
+
+    # the validation of every request, the other stages of the one solve and the two responses
+    stage = "productionplan_stage_duration_seconds"
+    assert delta(f'{stage}_count{{stage="validation"}}') == 3
+    for name in ("factory", "sort", "dispatch"):
+        assert delta(f'{stage}_count{{stage="{name}"}}') == 1
+        assert delta(f'{stage}_bucket{{stage="{name}",le="+Inf"}}') == 1
+        assert delta(f'{stage}_sum{{stage="{name}"}}') >= 0
+    assert delta(f'{stage}_count{{stage="serialization"}}') == 2
+
+    assert delta('productionplan_solver_outcomes_total{outcome="success"}') == 1
+    assert delta('productionplan_solver_outcomes_total{outcome="infeasible"}') == 1
+    assert delta('productionplan_solver_duration_seconds_count{engine="exact"}') == 1
+    assert delta("productionplan_fleet_size_count") == 2
+
+    assert delta('productionplan_cache_lookups_total{result="hit"}') == 1
+    assert delta('productionplan_cache_lookups_total{result="miss"}') == 2
+
+    route = f'method="POST",route="{URL}"'
+    assert delta(f'http_request_duration_seconds_count{{{route},status="200"}}') == 2
+    assert delta(f'http_request_duration_seconds_count{{{route},status="422"}}') == 1
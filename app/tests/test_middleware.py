@@ -0,0 +1,71 @@
+"""Test the request ids and the sampled logging of the request logging middleware."""
+
+import uuid
+from typing import Optional
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.middleware import RequestLoggingMiddleware
+
+
+def create_client(sample_rate: Optional[int] = None) -> TestClient:
+    """Return a client of an app that returns the request id it sees, behind the middleware."""
+    app = FastAPI()
+
+    @app.get("/id")  # type: ignore
+    def request_id(request: Request) -> str:
+        return str(request.state.request_id)
+
+    @app.get("/fail")  # type: ignore
+    def fail() -> None:
+        raise RuntimeError("boom")
+
+    app.add_middleware(RequestLoggingMiddleware, sample_rate=sample_rate)
+    return TestClient(app, raise_server_exceptions=False)
+
+
+def test_request_id_is_passed_through() -> None:
+    response = create_client().get("/id", headers={"X-Request-ID": "trace-42"})
+    assert response.json() == "trace-42"
+    assert response.headers["X-Request-ID"] == "trace-42"
+
+
+@pytest.mark.parametrize("length, kept", [(128, True), (129, False)])  # type: ignore
+def test_request_id_is_at_most_128_bytes(length: int, kept: bool) -> None:
+    sent = "a" * length
+    response = create_client().get("/id", headers={"X-Request-ID": sent})
+    assert (response.headers["X-Request-ID"] == sent) is kept
+    assert response.json() == response.headers["X-Request-ID"]
+
+
+def test_request_id_is_generated_when_none_is_sent() -> None:
+    client = create_client()
+    first = client.get("/id").headers["X-Request-ID"]
+    second = client.get("/id").headers["X-Request-ID"]
+    assert uuid.UUID(first) and uuid.UUID(second)
+    assert first != second
+
+
+def test_every_nth_request_is_logged(
+    monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+) -> None:
+    monkeypatch.setattr(settings, "LOG_SAMPLE_RATE", 3)
+    client = create_client()
+    with caplog.at_level("INFO", logger="app.middleware"):
+        request_ids = [client.get("/id").headers["X-Request-ID"] for _ in range(6)]
+    messages = [r.getMessage() for r in caplog.records if r.name == "app.middleware"]
+    assert messages[0::2] == [f"Request {request_ids[i]} started: GET /id" for i in (2, 5)]
+    assert all(f"Request {request_ids[i]} completed" in messages[j] for i, j in ((2, 1), (5, 3)))
+    assert len(messages) == 4
+
+
+def test_failed_requests_are_always_logged(caplog: pytest.LogCaptureFixture) -> None:
+    client = create_client(sample_rate=100)
+    with caplog.at_level("INFO", logger="app.middleware"):
+        assert client.get("/fail").status_code == 500
+    records = [record for record in caplog.records if record.name == "app.middleware"]
+    assert [record.levelname for record in records] == ["ERROR"]
+    assert "failed: GET /fail" in records[0].getMessage()
@@ -0,0 +1,53 @@
+"""Test the power plant objects and their shared fuel prices."""
+
+import pytest
+
+from app.core.config import settings
+from app.models.fleet import Fleet
+from app.models.planner import create_power_plants
+from app.models.powerplants import GasFired, create_power_plant, fuel_prices
+from app.schemas import FuelsIn, PowerPlantIn
+
+FUELS = FuelsIn(gas_price=13.4, kerosine_price=50.8, co2_price=20, wind_percentage=60)
+POWERPLANTS = [
+    PowerPlantIn(name="gas1", type="gasfired", efficiency=0.5, pmin=10, pmax=100),
+    PowerPlantIn(name="gas2", type="gasfired", efficiency=0.4, pmin=10, pmax=100),
+    PowerPlantIn(name="jet", type="turbojet", efficiency=0.3, pmin=0, pmax=16),
+    PowerPlantIn(name="wind", type="windturbine", efficiency=1, pmin=0, pmax=100),
+]
+
+
+def test_plants_of_a_type_share_their_prices() -> None:
+    gas1, gas2, jet, _ = create_power_plants(POWERPLANTS, FUELS)
+    assert gas1.prices is gas2.prices
+    assert jet.prices is not gas1.prices
+    assert not hasattr(gas1, "__dict__")
+
+    emission_cost = settings.GAS_CO2_EMISSION * 20
+    assert (gas1.fuelcost, gas1.emission_cost) == (13.4, emission_cost)
+    assert gas2.cost_per_mw == pytest.approx(13.4 / 0.4 + emission_cost)
+    assert jet.cost_per_mw == pytest.approx(50.8 / 0.3 + settings.KEROSINE_CO2_EMISSION * 20)
+
+
+def test_prices_are_passed_and_not_cached_on_the_class() -> None:
+    prices = fuel_prices(FUELS)
+    gas = create_power_plant("gasfired", "gas", 0.5, 10, 100, FUELS, prices["gasfired"])
+    assert gas.prices is prices["gasfired"]
+    # without prices every plant calculates its own, no class attribute keeps them
+    other = create_power_plant("gasfired", "other", 0.5, 10, 100, FUELS)
+    assert other.prices == gas.prices and other.prices is not gas.prices
+    assert "_last_prices" not in vars(GasFired)
+
+
+def test_repricing_a_fleet_updates_the_shared_prices() -> None:
+    fleet = Fleet("test", POWERPLANTS)
+    fleet.update_fuels(FUELS)
+    gas1, gas2, jet, wind = fleet.power_plants
+    fuels = FUELS.model_copy(update={"gas_price": 20.0, "co2_price": 0, "wind_percentage": 25})
+    fleet.update_fuels(fuels)
+    assert gas1.cost_per_mw == 40.0
+    assert gas1.prices is gas2.prices
+    assert jet.cost_per_mw == pytest.approx(50.8 / 0.3)
+    assert (wind.cost_per_mw, wind.real_pmin, wind.real_pmax, wind.pmax_units) == (0, 0, 25, 250)
+    # plants created for the earlier fuels keep their prices
+    assert create_power_plant("gasfired", "gas", 0.5, 10, 100, FUELS).fuelcost == 13.4
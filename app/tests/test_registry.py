@@ -0,0 +1,113 @@
+"""Test the solver registry, its automatic selection and the solver engine of a request."""
+
+from typing import List, Tuple
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.cache import plan_cache
+from app.core.config import settings
+from app.core.exceptions import InfeasibleLoadError
+from app.models.meritorder import MeritOrder
+from app.models.planner import timed_plan_production
+from app.models.powerplants import PowerPlant, create_power_plant
+from app.models.registry import SolverRegistry, solver_registry
+from app.models.unitcommitment import UnitCommitment
+from app.schemas import FuelsIn
+
+FUELS = FuelsIn(gas_price=13.4, kerosine_price=50.8, co2_price=20, wind_percentage=60)
+# the greedy merit order meets 140 MW but not 180 MW, the exact search meets both
+FLEET: List[Tuple[str, str, float, float, float]] = [
+    ("gasfired", "gas0", 0.45, 70.0, 160.0),
+    ("gasfired", "gas1", 0.53, 30.0, 50.0),
+    ("gasfired", "gas2", 0.5, 80.0, 90.0),
+]
+POWERPLANTS = [
+    {"name": name, "type": plant_type, "efficiency": efficiency, "pmin": pmin, "pmax": pmax}
+    for plant_type, name, efficiency, pmin, pmax in FLEET
+]
+
+
+def create() -> List[PowerPlant]:
+    """Create the power plant objects of FLEET."""
+    return [create_power_plant(*values, FUELS) for values in FLEET]
+
+
+def test_select_on_both_sides_of_the_latency_budget(monkeypatch: pytest.MonkeyPatch) -> None:
+    estimate = solver_registry.estimate_exact_ms(create())
+    assert estimate > 0
+    monkeypatch.setattr(solver_registry, "latency_budget_ms", estimate)
+    assert solver_registry.select(create(), 180) == "exact"
+    monkeypatch.setattr(solver_registry, "latency_budget_ms", estimate * 0.99)
+    assert solver_registry.select(create(), 180) == "anytime"
+    # the deadline of a request replaces the budget of the registry
+    assert solver_registry.select(create(), 180, deadline_ms=estimate) == "exact"
+    monkeypatch.setattr(solver_registry, "latency_budget_ms", estimate)
+    assert solver_registry.select(create(), 180, deadline_ms=estimate * 0.99) == "anytime"
+
+
+def test_select_greedy_without_anything_to_commit() -> None:
+    assert solver_registry.select(create(), 0) == "greedy"
+    wind = [create_power_plant("windturbine", "wind", 1, 0, 100, FUELS)]
+    assert solver_registry.select(wind, 50) == "greedy"
+
+
+def test_registered_names() -> None:
+    assert solver_registry.names() == ["greedy", "exact", "anytime", "vectorized"]
+    with pytest.raises(ValueError, match="reserved"):
+        SolverRegistry(1.0, 1.0, 1).register(
+            "auto", lambda power_plants, load, presorted, deadline: MeritOrder(power_plants, load)
+        )
+
+
+def test_forced_engine() -> None:
+    engine, solver = solver_registry.solve(create(), 140, engine="vectorized")
+    assert engine == "vectorized"
+    assert type(solver) is MeritOrder and solver.engine == "numpy"
+    engine, solver = solver_registry.solve(create(), 140, engine="anytime")
+    assert engine == "anytime"
+    assert isinstance(solver, UnitCommitment) and solver.deadline is not None
+    with pytest.raises(ValueError, match="Unknown solver engine: fastest"):
+        solver_registry.solve(create(), 140, engine="fastest")
+
+
+def test_exact_search_falls_back_to_the_greedy_plan(monkeypatch: pytest.MonkeyPatch) -> None:
+    with pytest.raises(InfeasibleLoadError):
+        timed_plan_production(create(), 180, engine="greedy")
+    optimal = timed_plan_production(create(), 180, engine="exact", include_costs=True)
+    assert (optimal.outcome, optimal.gap) == ("success", 0.0)
+
+    monkeypatch.setattr(settings, "EXACT_SOLVER_MAX_NODES", 1)
+    fallback = timed_plan_production(create(), 180, engine="exact", include_costs=True)
+    assert (fallback.engine, fallback.outcome) == ("exact", "fallback")
+    assert fallback.gap is not None and fallback.gap > 0
+    assert sum(pp["p"] for pp in fallback.plan) == 180
+    assert optimal.total_cost <= fallback.total_cost
+
+
+@pytest.mark.parametrize("url", ["/api/v1/productionplan/", "/api/v1/productionplan/fast"])  # type: ignore
+@pytest.mark.parametrize("engine", ["exact", "anytime", None])  # type: ignore
+def test_engine_query_and_solver_headers(client: TestClient, url: str, engine: str) -> None:
+    plan_cache.clear()
+    params = {} if engine is None else {"engine": engine}
+    payload = {"load": 180, "fuels": FUELS.model_dump()}
+    response = client.post(url, params=params, json={**payload, "powerplants": POWERPLANTS})
+    assert response.status_code == 200
+    assert response.headers["X-Cache"] == "MISS"
+    assert response.headers["X-Solver-Engine"] == (engine or "exact")
+    assert float(response.headers["X-Solver-Time-Ms"]) >= 0
+    assert float(response.headers["X-Optimality-Gap"]) == 0
+
+
+@pytest.mark.parametrize("url", ["/api/v1/productionplan/", "/api/v1/productionplan/fast"])  # type: ignore
+def test_greedy_engine_query(client: TestClient, url: str) -> None:
+    plan_cache.clear()
+    payload = {"load": 140, "fuels": FUELS.model_dump(), "powerplants": POWERPLANTS}
+    response = client.post(url, params={"engine": "greedy"}, json=payload)
+    assert response.status_code == 200
+    assert response.headers["X-Solver-Engine"] == "greedy"
+    assert "X-Optimality-Gap" not in response.headers
+
+    response = client.post(url, params={"engine": "fastest"}, json=payload)
+    assert response.status_code == 422
+    assert "Unknown solver engine: fastest" in response.json()["detail"]
@@ -0,0 +1,99 @@
+"""Test the coalescing of identical in-flight production plan requests."""
+
+import asyncio
+from typing import Any, Callable, List
+
+import httpx
+import pytest
+
+from app.api.routes.v1 import productionplan
+from app.core.singleflight import SingleFlight
+from app.main import app
+
+FUELS = {"gas_price": 13.4, "kerosine_price": 50.8, "co2_price": 20, "wind_percentage": 60}
+POWERPLANTS = [
+    {"name": "gasfiredbig1", "type": "gasfired", "efficiency": 0.53, "pmin": 100, "pmax": 460},
+    {"name": "tj1", "type": "turbojet", "efficiency": 0.3, "pmin": 0, "pmax": 16},
+]
+
+
+def test_concurrent_calls_share_one_calculation() -> None:
+    flights = SingleFlight()
+    calls = []
+
+    async def calculate() -> int:
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return len(calls)
+
+    async def main() -> List[Any]:
+        results = await asyncio.gather(*(flights.do("key", calculate) for _ in range(3)))
+        assert len(flights) == 0
+        # the key is free again once the calculation is done
+        return [*results, await flights.do("key", calculate)]
+
+    assert asyncio.run(main()) == [(1, False), (1, True), (1, True), (2, False)]
+    assert flights.stats() == {"in_flight": 0, "leaders": 2, "coalesced": 2}
+
+
+def test_a_failed_calculation_fails_every_caller() -> None:
+    flights = SingleFlight()
+
+    async def fail() -> None:
+        await asyncio.sleep(0.01)
+        raise ValueError("failed")
+
+    async def main() -> List[Any]:
+        return await asyncio.gather(
+            *(flights.do("key", fail) for _ in range(2)), return_exceptions=True
+        )
+
+    assert [str(result) for result in asyncio.run(main())] == ["failed", "failed"]
+
+
+def test_a_cancelled_caller_does_not_cancel_the_others() -> None:
+    flights = SingleFlight()
+
+    async def calculate() -> str:
+        await asyncio.sleep(0.02)
+        return "plan"
+
+    async def main() -> Any:
+        first = asyncio.ensure_future(flights.do("key", calculate))
+        second = asyncio.ensure_future(flights.do("key", calculate))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(main()) == ("plan", True)
+
+
+def test_identical_requests_share_a_solve(monkeypatch: pytest.MonkeyPatch) -> None:
+    solves = []
+    run = productionplan.solver_executor.run
+
+    async def slow_run(func: Callable[..., Any], *args: Any, size: int) -> Any:
+        solves.append(func)
+        # wait for the other requests to arrive
+        await asyncio.sleep(0.05)
+        return await run(func, *args, size=size)
+
+    monkeypatch.setattr(productionplan.solver_executor, "run", slow_run)
+    payload = {"load": 333.3, "fuels": FUELS, "powerplants": POWERPLANTS}
+
+    async def main() -> List[httpx.Response]:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(
+                *(client.post("/api/v1/productionplan/", json=payload) for _ in range(3))
+            )
+
+    responses = asyncio.run(main())
+    assert len(solves) == 1
+    assert all(response.status_code == 200 for response in responses)
+    assert all(response.json() == responses[0].json() for response in responses)
+    assert sorted(response.headers.get("X-Coalesced", "") for response in responses) == [
+        "",
+        "true",
+        "true",
+    ]
@@ -0,0 +1,40 @@
+"""Test the newline-delimited JSON production plan stream."""
+
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.executor import solver_executor
+
+FUELS = {"gas_price": 13.4, "kerosine_price": 50.8, "co2_price": 20, "wind_percentage": 60}
+POWERPLANTS = [
+    {"name": "gasfiredbig1", "type": "gasfired", "efficiency": 0.53, "pmin": 100, "pmax": 460},
+    {"name": "tj1", "type": "turbojet", "efficiency": 0.3, "pmin": 0, "pmax": 16},
+]
+
+
+@pytest.mark.parametrize("mode", ["inline", "thread"])  # type: ignore
+def test_stream_solves_every_line(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch, mode: str
+) -> None:
+    monkeypatch.setattr(solver_executor, "mode", mode)
+    monkeypatch.setattr(solver_executor, "threshold", 1)
+    lines = [
+        json.dumps({"load": 200, "fuels": FUELS, "powerplants": POWERPLANTS}),
+        "",
+        json.dumps({"load": 9999, "fuels": FUELS, "powerplants": POWERPLANTS}),
+        json.dumps({"load": 200, "fuels": FUELS}),
+        json.dumps({"load": 470, "fuels": FUELS, "powerplants": POWERPLANTS}),
+    ]
+    offloaded = solver_executor.offloaded
+    response = client.post("/api/v1/productionplan/stream", content="\n".join(lines))
+    assert response.status_code == 200
+    results = [json.loads(line) for line in response.text.splitlines()]
+
+    assert [result["line"] for result in results] == [1, 3, 4, 5]
+    assert {pp["name"]: pp["p"] for pp in results[0]["plan"]}["gasfiredbig1"] == 200
+    assert results[1]["error"].startswith("No feasible production plan for a load of 9999")
+    assert isinstance(results[2]["error"], list)
+    assert sum(pp["p"] for pp in results[3]["plan"]) == 470
+    assert solver_executor.offloaded - offloaded == (3 if mode == "thread" else 0)
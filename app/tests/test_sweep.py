@@ -0,0 +1,101 @@
+"""Test the sweeps of production plan costs over grids of fuels and loads."""
+
+from itertools import product
+from typing import Any, Dict, Optional
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.executor import solver_executor
+
+FUELS = {"gas_price": 13.4, "kerosine_price": 50.8, "co2_price": 20, "wind_percentage": 60}
+POWERPLANTS = [
+    {"name": "gasfiredbig1", "type": "gasfired", "efficiency": 0.53, "pmin": 100, "pmax": 460},
+    {
+        "name": "gasfiredsomewhatsmaller",
+        "type": "gasfired",
+        "efficiency": 0.37,
+        "pmin": 40,
+        "pmax": 210,
+    },
+    {"name": "tj1", "type": "turbojet", "efficiency": 0.3, "pmin": 0, "pmax": 16},
+    {"name": "windpark1", "type": "windturbine", "efficiency": 1, "pmin": 0, "pmax": 150},
+]
+GRID = {
+    "load": {"start": 0, "stop": 900, "num": 10},
+    "fuels": {
+        **FUELS,
+        "gas_price": {"start": 10, "stop": 130, "num": 3},
+        "wind_percentage": {"start": 0, "stop": 100, "num": 3},
+    },
+    "powerplants": POWERPLANTS,
+}
+
+
+def single_cost(client: TestClient, load: float, fuels: Dict[str, Any]) -> Optional[float]:
+    """Return the cost of the greedy plan of one request, None when the load can not be met."""
+    response = client.post(
+        "/api/v1/productionplan/",
+        params={"engine": "greedy", "include_costs": "true"},
+        json={"load": load, "fuels": fuels, "powerplants": POWERPLANTS},
+    )
+    if response.status_code == 422:
+        return None
+    assert response.status_code == 200
+    return response.json()["total_cost"]
+
+
+def test_sweep_matches_single_requests(client: TestClient) -> None:
+    response = client.post("/api/v1/productionplan/sweep", json=GRID)
+    assert response.status_code == 200
+    result = response.json()
+    axes = {axis["name"]: axis["values"] for axis in result["axes"]}
+    assert list(axes) == ["gas_price", "wind_percentage", "load"]
+    points = list(product(axes["gas_price"], axes["wind_percentage"], axes["load"]))
+    assert len(result["cost"]) == len(points)
+    for (gas_price, wind_percentage, load), cost in zip(points, result["cost"]):
+        fuels = {**FUELS, "gas_price": gas_price, "wind_percentage": wind_percentage}
+        expected = single_cost(client, load, fuels)
+        if expected is None:
+            assert cost is None, (gas_price, wind_percentage, load)
+        else:
+            assert cost == pytest.approx(expected), (gas_price, wind_percentage, load)
+
+
+def test_sweep_switch_loads_up_to_every_plant_running(client: TestClient) -> None:
+    # merit order: the wind park (90 MW), gasfiredbig1 (460 MW), the smaller gas plant and tj1
+    capacity = 90 + 460 + 210 + 16
+    sweep = {
+        "load": {"start": capacity - 1, "stop": capacity + 1, "num": 3},
+        "fuels": FUELS,
+        "powerplants": POWERPLANTS,
+    }
+    response = client.post("/api/v1/productionplan/sweep", json=sweep)
+    assert response.status_code == 200
+    result = response.json()
+    assert result["switch_loads"] == [90.0, 550.0, 760.0, 0.0]
+    costs = result["cost"]
+    assert costs[0] is not None and costs[1] is not None and costs[2] is None
+    assert costs[1] == pytest.approx(single_cost(client, capacity, FUELS))
+
+    # every plant runs above its switch load, all of them at the capacity of the fleet
+    response = client.post(
+        "/api/v1/productionplan/",
+        params={"engine": "greedy"},
+        json={"load": capacity, "fuels": FUELS, "powerplants": POWERPLANTS},
+    )
+    assert all(pp["p"] > 0 for pp in response.json())
+
+
+def test_sweep_in_chunks_matches_inline(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    inline = client.post("/api/v1/productionplan/sweep", json=GRID).json()
+    monkeypatch.setattr(solver_executor, "mode", "thread")
+    monkeypatch.setattr(solver_executor, "threshold", 1)
+    monkeypatch.setattr(solver_executor, "max_workers", 4)
+    offloaded = solver_executor.offloaded
+    chunked = client.post("/api/v1/productionplan/sweep", json=GRID).json()
+    # the 9 fuel points are swept in 4 chunks
+    assert solver_executor.offloaded - offloaded == 4
+    assert chunked == inline
@@ -0,0 +1,169 @@
+"""Test the exact unit commitment solver."""
+
+import itertools
+import math
+import random
+from typing import List, Optional, Tuple
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.exceptions import CostOverflowError, InfeasibleLoadError, SearchLimitError
+from app.core.units import UNITS_PER_MW, to_units
+from app.models.powerplants import PowerPlant, create_power_plant
+from app.models.unitcommitment import UnitCommitment
+from app.schemas import FuelsIn
+
+FUELS = FuelsIn(gas_price=13.4, kerosine_price=50.8, co2_price=20, wind_percentage=60)
+
+
+def random_fleet(rng: random.Random, size: int) -> List[Tuple[str, str, float, float, float]]:
+    """Return the type, name, efficiency, pmin and pmax of random power plants."""
+    fleet = []
+    for index in range(size):
+        plant_type = rng.choice(["gasfired", "gasfired", "turbojet", "windturbine"])
+        pmax = float(rng.randrange(10, 200, 10))
+        pmin = 0.0 if plant_type == "windturbine" else float(rng.randrange(0, int(pmax) + 1, 10))
+        efficiency = 1.0 if plant_type == "windturbine" else rng.choice([0.3, 0.37, 0.53])
+        fleet.append((plant_type, f"{plant_type}{index}", efficiency, pmin, pmax))
+    return fleet
+
+
+def create(fleet: List[Tuple[str, str, float, float, float]]) -> List[PowerPlant]:
+    """Create the power plant objects of a fleet."""
+    return [create_power_plant(*values, FUELS) for values in fleet]
+
+
+def brute_force(power_plants: List[PowerPlant], load: float) -> Optional[float]:
+    """Return the cost of the cheapest plan over every set of running plants, None if none fits.
+
+    The running plants start at their pmin and the rest of the load is filled cheapest first,
+    which is the cheapest plan of a fixed set of running plants.
+    """
+    target = to_units(load)
+    best = None
+    for running in itertools.product([False, True], repeat=len(power_plants)):
+        on = [pp for pp, run in zip(power_plants, running) if run]
+        if any(pp.pmax_units < pp.pmin_units for pp in on):
+            continue
+        low = sum(pp.pmin_units for pp in on)
+        if not low <= target <= sum(pp.pmax_units for pp in on):
+            continue
+        cost = sum(pp.pmin_units * pp.cost_per_mw for pp in on)
+        remaining = target - low
+        for pp in sorted(on, key=lambda pp: pp.cost_per_mw):
+            take = min(pp.pmax_units - pp.pmin_units, remaining)
+            cost += take * pp.cost_per_mw
+            remaining -= take
+        if best is None or cost < best:
+            best = cost
+    return None if best is None else best / UNITS_PER_MW
+
+
+@pytest.mark.parametrize("seed", range(150))  # type: ignore
+def test_exact_solver_matches_brute_force(seed: int) -> None:
+    rng = random.Random(seed)
+    fleet = random_fleet(rng, rng.randint(1, 7))
+    load = float(rng.randrange(0, 600, 10))
+    power_plants = create(fleet)
+    expected = brute_force(create(fleet), load)
+
+    solver = UnitCommitment(power_plants, load)
+    if expected is None:
+        with pytest.raises(InfeasibleLoadError):
+            solver.set_loads()
+        return
+    solver.set_loads()
+    assert solver.optimal
+    assert math.isclose(solver.total_cost, expected, rel_tol=1e-9, abs_tol=1e-6)
+    assert math.isclose(sum(pp.p for pp in power_plants), load, abs_tol=1e-6)
+    for pp in power_plants:
+        assert pp.p == 0 or pp.pmin <= pp.p <= pp.pmax
+
+
+def fixed_output_fleet() -> List[Tuple[str, str, float, float, float]]:
+    """Return plants that can only run at one output, the greedy plans miss a load of 90."""
+    return [
+        ("gasfired", "gas1", 0.53, 60.0, 60.0),
+        ("gasfired", "gas2", 0.5, 50.0, 50.0),
+        ("gasfired", "gas3", 0.45, 40.0, 40.0),
+    ]
+
+
+def test_exact_solver_gives_up_without_claiming_infeasible(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(settings, "EXACT_SOLVER_MAX_NODES", 1)
+    with pytest.raises(SearchLimitError):
+        UnitCommitment(create(fixed_output_fleet()), 90.0).set_loads()
+
+    monkeypatch.setattr(settings, "EXACT_SOLVER_MAX_NODES", 1000)
+    power_plants = create(fixed_output_fleet())
+    UnitCommitment(power_plants, 90.0).set_loads()
+    assert {pp.name: pp.p for pp in power_plants} == {"gas1": 0.0, "gas2": 50.0, "gas3": 40.0}
+
+
+def test_search_limit_is_not_a_422(client: TestClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "EXACT_SOLVER_MAX_NODES", 1)
+    payload = {
+        "load": 90,
+        "fuels": {
+            "gas_price": 13.4,
+            "kerosine_price": 50.8,
+            "co2_price": 21,
+            "wind_percentage": 60,
+        },
+        "powerplants": [
+            {"name": name, "type": plant_type, "efficiency": efficiency, "pmin": pmin, "pmax": pmax}
+            for plant_type, name, efficiency, pmin, pmax in fixed_output_fleet()
+        ],
+    }
+    response = client.post("/api/v1/productionplan/?engine=exact", json=payload)
+    assert response.status_code == 503
+    assert "may still be feasible" in response.json()["detail"]
+
+
+def test_greedy_incumbent_does_not_log_warnings(caplog: pytest.LogCaptureFixture) -> None:
+    # the greedy merit order can not back off gas1 for gas2, the exact solver still finds a plan
+    power_plants = create(fixed_output_fleet())
+    with caplog.at_level("DEBUG", logger="app.models"):
+        UnitCommitment(power_plants, 90.0).set_loads()
+    assert not [record for record in caplog.records if record.levelname in ("WARNING", "ERROR")]
+
+
+def test_high_finite_prices_do_not_prune_every_plan() -> None:
+    fuels = FuelsIn(gas_price=1e300, kerosine_price=50.8, co2_price=20, wind_percentage=60)
+    power_plants = [create_power_plant(*values, fuels) for values in fixed_output_fleet()]
+    UnitCommitment(power_plants, 90.0).set_loads()
+    assert {pp.name: pp.p for pp in power_plants} == {"gas1": 0.0, "gas2": 50.0, "gas3": 40.0}
+
+
+def test_overflowing_costs_are_rejected() -> None:
+    fuels = FuelsIn(gas_price=1e308, kerosine_price=50.8, co2_price=20, wind_percentage=60)
+    power_plants = [
+        create_power_plant("gasfired", "gas1", 0.1, 10.0, 100.0, fuels),
+        create_power_plant("turbojet", "tj1", 0.3, 0.0, 16.0, fuels),
+    ]
+    with pytest.raises(CostOverflowError, match="plant gas1"):
+        UnitCommitment(power_plants, 50.0).set_loads()
+
+
+@pytest.mark.parametrize("url", ["/api/v1/productionplan/", "/api/v1/productionplan/fast"])  # type: ignore
+def test_overflowing_costs_are_a_422(client: TestClient, url: str) -> None:
+    payload = {
+        "load": 50,
+        "fuels": {
+            "gas_price": 1e308,
+            "kerosine_price": 50.8,
+            "co2_price": 20,
+            "wind_percentage": 60,
+        },
+        "powerplants": [
+            {"name": "gas1", "type": "gasfired", "efficiency": 0.1, "pmin": 10, "pmax": 100},
+            {"name": "tj1", "type": "turbojet", "efficiency": 0.3, "pmin": 0, "pmax": 16},
+        ],
+    }
+    response = client.post(url, params={"include_costs": "true"}, json=payload)
+    assert response.status_code == 422
+    assert "overflows" in response.json()["detail"]
@@ -0,0 +1,59 @@
+"""Test the conversion of power values to integer units of settings.PRECISION."""
+
+import math
+
+import pytest
+
+from app.core.units import from_units, is_multiple, to_units
+from app.schemas import PowerPlantIn
+
+
+@pytest.mark.parametrize(  # type: ignore
+    "value, rounding, units",
+    [
+        (453.1, "nearest", 4531),
+        (453.14, "nearest", 4531),
+        (453.16, "nearest", 4532),
+        (0.3, "floor", 3),
+        (0.1 + 0.2, "floor", 3),
+        (0.39, "floor", 3),
+        (0.3, "ceil", 3),
+        (0.1 + 0.2, "ceil", 3),
+        (0.31, "ceil", 4),
+        (0.0, "floor", 0),
+    ],
+)
+def test_to_units(value: float, rounding: str, units: int) -> None:
+    assert to_units(value, rounding) == units
+
+
+@pytest.mark.parametrize("units", [0, 1, 3, 4531, 10**7 + 1])  # type: ignore
+def test_from_units_round_trips(units: int) -> None:
+    value = from_units(units)
+    assert to_units(value) == units
+    assert is_multiple(value)
+    assert str(value) == f"{units / 10:.1f}"
+
+
+def test_is_multiple() -> None:
+    assert is_multiple(480.0)
+    assert is_multiple(0.1 * 3) is False
+    assert is_multiple(480.05) is False
+
+
+@pytest.mark.parametrize("value", [math.inf, -math.inf, math.nan])  # type: ignore
+def test_to_units_rejects_non_finite_values(value: float) -> None:
+    with pytest.raises(ValueError):
+        to_units(value)
+
+
+def test_powerplant_is_rounded_into_its_range() -> None:
+    pp = PowerPlantIn(
+        name="gas",
+        type=PowerPlantIn.Type.gasfired,
+        efficiency=0.5,
+        pmin=10.04,
+        pmax=99.99,
+        ramp_up=20.05,
+    )
+    assert (pp.pmin, pp.pmax, pp.ramp_up) == (10.1, 99.9, 20.0)
@@ -0,0 +1,81 @@
+"""Test that invalid production plan input is rejected with a 422."""
+
+import copy
+import json
+from typing import Any, Dict, List
+
+import pytest
+from fastapi.testclient import TestClient
+
+FUELS = {"gas_price": 13.4, "kerosine_price": 50.8, "co2_price": 20, "wind_percentage": 60}
+POWERPLANTS = [
+    {"name": "gasfiredbig1", "type": "gasfired", "efficiency": 0.53, "pmin": 100, "pmax": 460},
+    {"name": "tj1", "type": "turbojet", "efficiency": 0.3, "pmin": 0, "pmax": 16},
+]
+
+
+def non_finite_body(path: List[Any], value: str) -> str:
+    """Return a production plan request with the JSON literal value at the path."""
+    data: Dict[str, Any] = {
+        "load": 200,
+        "fuels": FUELS,
+        "powerplants": copy.deepcopy(POWERPLANTS),
+    }
+    target: Any = data
+    for key in path[:-1]:
+        target = target[key]
+    target[path[-1]] = "__value__"
+    return json.dumps(data).replace('"__value__"', value)
+
+
+NON_FINITE = [
+    (["load"], "Infinity"),
+    (["load"], "NaN"),
+    (["powerplants", 0, "pmax"], "Infinity"),
+    (["powerplants", 0, "pmax"], "NaN"),
+    (["powerplants", 0, "pmin"], "NaN"),
+    (["powerplants", 0, "ramp_up"], "Infinity"),
+    (["fuels", "gas_price"], "Infinity"),
+    (["fuels", "gas_price"], "1e999"),
+    (["fuels", "kerosine_price"], "NaN"),
+    (["fuels", "co2_price"], "1e999"),
+    (["fuels", "wind_percentage"], "NaN"),
+]
+
+
+@pytest.mark.parametrize("url", ["/api/v1/productionplan/", "/api/v1/productionplan/fast"])  # type: ignore
+@pytest.mark.parametrize("path, value", NON_FINITE)  # type: ignore
+def test_non_finite_numbers_are_rejected(
+    client: TestClient, url: str, path: List[Any], value: str
+) -> None:
+    response = client.post(
+        url,
+        content=non_finite_body(path, value),
+        headers={"Content-Type": "application/json"},
+    )
+    assert response.status_code == 422
+    assert any(error["loc"][-1] == path[-1] for error in response.json()["detail"])
+
+
+@pytest.mark.parametrize("url", ["/api/v1/productionplan/", "/api/v1/productionplan/fast"])  # type: ignore
+def test_out_of_range_fuel_is_rejected_with_costs(client: TestClient, url: str) -> None:
+    response = client.post(
+        url,
+        params={"include_costs": "true"},
+        content=non_finite_body(["fuels", "gas_price"], "1e999"),
+        headers={"Content-Type": "application/json"},
+    )
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"][-2:] == ["fuels", "gas_price"]
+
+
+@pytest.mark.parametrize("field", ["gas_price", "wind_percentage"])  # type: ignore
+def test_non_finite_sweep_axis_is_rejected(client: TestClient, field: str) -> None:
+    data: Dict[str, Any] = {"load": 200, "fuels": FUELS, "powerplants": POWERPLANTS}
+    content = json.dumps(data).replace(f'"{field}": {FUELS[field]}', f'"{field}": 1e999')
+    response = client.post(
+        "/api/v1/productionplan/sweep",
+        content=content,
+        headers={"Content-Type": "application/json"},
+    )
+    assert response.status_code == 422
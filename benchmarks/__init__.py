@@ -0,0 +1 @@
+"""Benchmarks for the power plant production planning API."""
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Micro-benchmark of the memory and creation time of power plant objects.
+
+Compares the slotted power plants that create_power_plants creates for a fleet, sharing one
+FuelPrices per type, with a replica of the previous layout: a plain class with an instance
+__dict__ that keeps the same data, its own fuel and emission costs included, and logs a debug
+f-string for every plant.
+
+Usage:
+    python -m benchmarks.bench_powerplants [--plants 10000] [--repeat 5]
+"""
+
+import argparse
+import gc
+import logging
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from app.core.config import settings
+from app.core.units import to_units
+from app.models.planner import create_power_plants
+from app.schemas import FuelsIn, PowerPlantIn
+
+logger = logging.getLogger(__name__)
+
+
+class DictPowerPlant:
+    """Replica of the power plant layout before __slots__, used as the baseline."""
+
+    def __init__(
+        self,
+        name: str,
+        energy_effciency: float,
+        pmin: float,
+        pmax: float,
+        fuelcost: float,
+        emission_cost: float,
+    ) -> None:
+        """Initialize the power plant like the previous PowerPlant.__init__."""
+        self.name = name
+        self.energy_effciency = energy_effciency
+        self.fuelcost = fuelcost
+        self.emission_cost = emission_cost
+        self.cost_per_mw = fuelcost / energy_effciency + emission_cost
+        self.pmin = pmin
+        self.pmax = pmax
+        self.real_pmin = pmin
+        self.real_pmax = pmax
+        self.pmin_units = to_units(pmin, "ceil")
+        self.pmax_units = to_units(pmax, "floor")
+        self.p = 0.0
+        logger.debug(
+            f"Created {self.__class__.__name__} '{name}' with efficiency {energy_effciency}, pmin {pmin}, pmax {pmax}"
+        )
+
+
+def dict_power_plant_factory(pp: PowerPlantIn, fuels: FuelsIn) -> DictPowerPlant:
+    """Create a baseline power plant with the per plant logging of the previous factory."""
+    logger.debug(f"Creating power plant of type {pp.type}: {pp.name}")
+    if pp.type == PowerPlantIn.Type.gasfired:
+        fuelcost, emission = fuels.gas_price, settings.GAS_CO2_EMISSION
+    else:
+        fuelcost, emission = fuels.kerosine_price, settings.KEROSINE_CO2_EMISSION
+    emission_cost = emission * fuels.co2_price
+    return DictPowerPlant(pp.name, pp.efficiency, pp.pmin, pp.pmax, fuelcost, emission_cost)
+
+
+def create_dict_power_plants(fleet: List[PowerPlantIn], fuels: FuelsIn) -> List[DictPowerPlant]:
+    """Create the baseline power plants of a fleet one by one, like the previous factory."""
+    return [dict_power_plant_factory(pp, fuels) for pp in fleet]
+
+
+def make_fleet(count: int) -> List[PowerPlantIn]:
+    """Return count gas fired power plant schemas."""
+    return [
+        PowerPlantIn(
+            name=f"gasfired{i}",
+            type="gasfired",
+            efficiency=0.5,
+            pmin=10 + i % 50,
+            pmax=100 + i % 300,
+        )
+        for i in range(count)
+    ]
+
+
+def measure(
+    create: Callable[[List[PowerPlantIn], FuelsIn], List[Any]],
+    fleet: List[PowerPlantIn],
+    fuels: FuelsIn,
+    repeat: int,
+) -> Dict[str, float]:
+    """Return the bytes per plant and the best creation time per plant of a fleet factory."""
+    gc.collect()
+    tracemalloc.start()
+    plants = create(fleet, fuels)
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del plants
+
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        plants = create(fleet, fuels)
+        best = min(best, time.perf_counter() - start)
+        del plants
+    return {"bytes_per_plant": allocated / len(fleet), "us_per_plant": best / len(fleet) * 1e6}
+
+
+def main() -> None:
+    """Run the benchmark and print the baseline, the slotted plants and their ratio."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--plants", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    fleet = make_fleet(args.plants)
+    fuels = FuelsIn(gas_price=13.4, kerosine_price=50.8, co2_price=20, wind_percentage=60)
+    baseline = measure(create_dict_power_plants, fleet, fuels, args.repeat)
+    slotted = measure(create_power_plants, fleet, fuels, args.repeat)
+
+    print(f"{'':<10}{'bytes/plant':>14}{'us/plant':>12}")
+    print(f"{'__dict__':<10}{baseline['bytes_per_plant']:>14.1f}{baseline['us_per_plant']:>12.3f}")
+    print(f"{'__slots__':<10}{slotted['bytes_per_plant']:>14.1f}{slotted['us_per_plant']:>12.3f}")
+    print(
+        f"{'ratio':<10}{slotted['bytes_per_plant'] / baseline['bytes_per_plant']:>14.2f}"
+        f"{slotted['us_per_plant'] / baseline['us_per_plant']:>12.2f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
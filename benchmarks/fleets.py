@@ -0,0 +1,71 @@
+"""Seeded fleet and payload generation for the benchmarks."""
+
+import json
+import os
+import random
+from typing import Any, Dict, List
+
+PAYLOADS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "example_payloads")
+
+# keys of the example payloads and the FuelsIn fields they map to
+FUEL_KEYS = {
+    "gas(euro/MWh)": "gas_price",
+    "kerosine(euro/MWh)": "kerosine_price",
+    "co2(euro/ton)": "co2_price",
+    "wind(%)": "wind_percentage",
+}
+
+
+def load_example_payloads() -> List[Dict[str, Any]]:
+    """Return the example payloads with their fuels renamed to the FuelsIn fields."""
+    payloads = []
+    for filename in sorted(os.listdir(PAYLOADS_DIR)):
+        if not filename.endswith(".json"):
+            continue
+        with open(os.path.join(PAYLOADS_DIR, filename)) as f:
+            payload = json.load(f)
+        payload["fuels"] = {FUEL_KEYS.get(k, k): v for k, v in payload["fuels"].items()}
+        payloads.append(payload)
+    return payloads
+
+
+def generate_payload(plants: int, seed: int = 0, load_factor: float = 0.6) -> Dict[str, Any]:
+    """Generate a ProductionPlanIn payload with a fleet built from the example power plants.
+
+    Every power plant is a copy of a random example plant whose efficiency, pmin and pmax are
+    scaled by up to 10%, so the fleet has the mix of the examples without identical plants.
+
+    Args:
+        plants: The number of power plants in the fleet
+        seed: Seed of the random generator, the same seed gives the same payload
+        load_factor: The load as a share of the available pmax
+
+    Returns:
+        A ProductionPlanIn payload as a dict
+    """
+    rng = random.Random(seed)
+    examples = load_example_payloads()
+    templates = [pp for payload in examples for pp in payload["powerplants"]]
+    fleet = []
+    for index in range(plants):
+        template = rng.choice(templates)
+        pmin = round(template["pmin"] * rng.uniform(0.9, 1.1), 1)
+        pmax = max(pmin, round(template["pmax"] * rng.uniform(0.9, 1.1), 1))
+        efficiency = template["efficiency"]
+        if template["type"] != "windturbine":
+            efficiency = round(min(1.0, efficiency * rng.uniform(0.9, 1.1)), 3)
+        fleet.append(
+            {
+                "name": f"{template['name']}-{index}",
+                "type": template["type"],
+                "efficiency": efficiency,
+                "pmin": pmin,
+                "pmax": pmax,
+            }
+        )
+    fuels = dict(rng.choice(examples)["fuels"])
+    available = sum(
+        pp["pmax"] * (fuels["wind_percentage"] / 100 if pp["type"] == "windturbine" else 1)
+        for pp in fleet
+    )
+    return {"load": round(available * load_factor, 1), "fuels": fuels, "powerplants": fleet}
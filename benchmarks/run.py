@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""Benchmark suite for the solver and the HTTP path.
+
+Runs every benchmark on seeded fleets generated from example_payloads/, writes the results as
+JSON and compares the median times with a stored baseline. A benchmark whose median is more than
+the tolerance slower than its baseline is reported as a regression.
+
+Usage:
+    python -m benchmarks.run                      # run, write results, compare with the baseline
+    python -m benchmarks.run --update-baseline    # run and store the results as the new baseline
+    python -m benchmarks.run --sizes 3 100 --only set_loads http
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+from app.core.cache import plan_cache
+from app.core.exceptions import InfeasibleLoadError, SearchLimitError
+from app.main import app
+from app.models.meritorder import MeritOrder
+from app.models.powerplants import power_plant_factory
+from app.models.unitcommitment import UnitCommitment
+from app.schemas import ProductionPlanIn
+from benchmarks.fleets import generate_payload
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(BENCHMARKS_DIR, "baseline.json")
+RESULTS_PATH = os.path.join(BENCHMARKS_DIR, "results", "latest.json")
+DEFAULT_SIZES = [3, 10, 100, 1000, 10000]
+
+
+def time_callable(func: Callable[[], Any], min_time: float, max_runs: int) -> Dict[str, float]:
+    """Call func until min_time has passed or max_runs is reached and return the timings.
+
+    Args:
+        func: The function to time
+        min_time: Minimum number of seconds to keep calling func
+        max_runs: Maximum number of calls
+
+    Returns:
+        The median and minimum time in milliseconds and the number of runs
+    """
+    func()  # warm up
+    timings = []
+    deadline = time.perf_counter() + min_time
+    while len(timings) < max_runs and (len(timings) < 3 or time.perf_counter() < deadline):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {
+        "median_ms": statistics.median(timings) * 1000,
+        "min_ms": min(timings) * 1000,
+        "runs": len(timings),
+    }
+
+
+def bench_set_loads(payload: Dict[str, Any]) -> Callable[[], Any]:
+    """Return a call of the greedy MeritOrder.set_loads on an already created fleet."""
+    plan_input = ProductionPlanIn.model_validate(payload)
+    power_plants = [power_plant_factory(pp, plan_input.fuels) for pp in plan_input.powerplants]
+
+    def run() -> None:
+        try:
+            MeritOrder(power_plants, plan_input.load).set_loads()
+        except InfeasibleLoadError:
+            pass
+
+    return run
+
+
+def bench_unit_commitment(payload: Dict[str, Any]) -> Callable[[], Any]:
+    """Return a call of the exact UnitCommitment.set_loads on an already created fleet."""
+    plan_input = ProductionPlanIn.model_validate(payload)
+    power_plants = [power_plant_factory(pp, plan_input.fuels) for pp in plan_input.powerplants]
+
+    def run() -> None:
+        try:
+            UnitCommitment(power_plants, plan_input.load).set_loads()
+        except (InfeasibleLoadError, SearchLimitError):
+            pass
+
+    return run
+
+
+def bench_factory(payload: Dict[str, Any]) -> Callable[[], Any]:
+    """Return a call of power_plant_factory for every power plant of the payload."""
+    plan_input = ProductionPlanIn.model_validate(payload)
+    return lambda: [power_plant_factory(pp, plan_input.fuels) for pp in plan_input.powerplants]
+
+
+def bench_validation(payload: Dict[str, Any]) -> Callable[[], Any]:
+    """Return a validation of the payload by ProductionPlanIn."""
+    return lambda: ProductionPlanIn.model_validate(payload)
+
+
+def bench_http(
+    payload: Dict[str, Any], min_time: float, max_runs: int, path: str = "/api/v1/productionplan/"
+) -> Dict[str, float]:
+    """Post the payload to a production plan route through an in-process ASGI client.
+
+    The plan cache is disabled, every request is solved.
+
+    Returns:
+        The timings of a request and the number of requests per second
+    """
+
+    async def run() -> Dict[str, float]:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            body = json.dumps(payload)
+            headers = {"content-type": "application/json"}
+            await client.post(path, content=body, headers=headers)
+            timings = []
+            deadline = time.perf_counter() + min_time
+            while len(timings) < max_runs and (len(timings) < 3 or time.perf_counter() < deadline):
+                start = time.perf_counter()
+                await client.post(path, content=body, headers=headers)
+                timings.append(time.perf_counter() - start)
+        return {
+            "median_ms": statistics.median(timings) * 1000,
+            "min_ms": min(timings) * 1000,
+            "runs": len(timings),
+            "requests_per_second": len(timings) / sum(timings),
+        }
+
+    max_size = plan_cache.max_size
+    plan_cache.max_size = 0
+    try:
+        return asyncio.run(run())
+    finally:
+        plan_cache.max_size = max_size
+
+
+BENCHMARKS: Dict[str, Callable[[Dict[str, Any]], Callable[[], Any]]] = {
+    "set_loads": bench_set_loads,
+    "unit_commitment": bench_unit_commitment,
+    "factory": bench_factory,
+    "validation": bench_validation,
+}
+
+# HTTP benchmarks and the route they post to
+HTTP_ROUTES = {
+    "http": "/api/v1/productionplan/",
+    "http_fast": "/api/v1/productionplan/fast",
+}
+
+
+def run_benchmarks(
+    sizes: List[int], only: Optional[List[str]], min_time: float, max_runs: int, seed: int
+) -> Dict[str, Dict[str, float]]:
+    """Run the selected benchmarks for every fleet size.
+
+    Returns:
+        The timings of every benchmark by "name[size]"
+    """
+    names = only or [*BENCHMARKS, *HTTP_ROUTES]
+    results = {}
+    for size in sizes:
+        payload = generate_payload(size, seed=seed)
+        for name in names:
+            key = f"{name}[{size}]"
+            if name in HTTP_ROUTES:
+                results[key] = bench_http(payload, min_time, max_runs, HTTP_ROUTES[name])
+            else:
+                results[key] = time_callable(BENCHMARKS[name](payload), min_time, max_runs)
+            print(f"{key:<24}{results[key]['median_ms']:>12.3f} ms", file=sys.stderr)
+    return results
+
+
+def compare(
+    results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], tolerance: float
+) -> List[str]:
+    """Print the results next to the baseline and return the benchmarks that regressed."""
+    regressions = []
+    print(f"{'benchmark':<24}{'median ms':>12}{'baseline ms':>14}{'change':>10}")
+    for key, result in results.items():
+        reference = baseline.get(key)
+        if reference is None:
+            print(f"{key:<24}{result['median_ms']:>12.3f}{'-':>14}{'-':>10}")
+            continue
+        change = result["median_ms"] / reference["median_ms"] - 1
+        flag = ""
+        if change > tolerance:
+            regressions.append(key)
+            flag = "  REGRESSION"
+        print(
+            f"{key:<24}{result['median_ms']:>12.3f}{reference['median_ms']:>14.3f}"
+            f"{change:>+10.1%}{flag}"
+        )
+    return regressions
+
+
+def write_json(path: str, results: Dict[str, Dict[str, float]]) -> None:
+    """Write the results with the details of the machine they were measured on."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    document = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+        },
+        "results": results,
+    }
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2)
+        f.write("\n")
+
+
+def main() -> None:
+    """Run the benchmarks, write the results and exit with 1 on a regression."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--only", nargs="+", choices=[*BENCHMARKS, *HTTP_ROUTES])
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds per benchmark")
+    parser.add_argument("--max-runs", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=RESULTS_PATH)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    # the models log warnings for infeasible greedy plans, keep them out of the output
+    logging.getLogger().addHandler(logging.NullHandler())
+
+    results = run_benchmarks(args.sizes, args.only, args.min_time, args.max_runs, args.seed)
+    write_json(args.output, results)
+    if args.update_baseline:
+        write_json(args.baseline, results)
+        print(f"Stored baseline in {args.baseline}")
+        return
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"{len(regressions)} regressions: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Gunicorn configuration of the production server.
+
+Usage:
+    gunicorn app.main:app
+    WEB_CONCURRENCY=4 gunicorn app.main:app
+
+The app is imported once by the master process and warmed up before the workers are forked, so
+the workers share the imported modules and the warm state copy-on-write.
+"""
+
+import gc
+import os
+from typing import Any
+
+from app.core.config import settings
+from app.core.executor import solver_executor
+
+bind = os.environ.get("BIND", settings.SERVER_BIND)
+workers = int(os.environ.get("WEB_CONCURRENCY", settings.SERVER_WORKERS))
+worker_class = "app.server.UvicornWorker"
+preload_app = True
+# the workers finish their requests first, then the lifespan shutdown stops the solver pool
+graceful_timeout = settings.SERVER_GRACEFUL_TIMEOUT + 10
+keepalive = 5
+
+
+def when_ready(server: Any) -> None:
+    """Warm up the preloaded app in the master process before the workers are forked."""
+    from app.main import warm_up
+
+    warm_up()
+    # move the objects of the master out of reach of the garbage collector, collections in the
+    # workers would otherwise write to their pages and copy them
+    gc.freeze()
+    server.log.info("Warmed up the app for %d workers", server.num_workers)
+
+
+def post_fork(server: Any, worker: Any) -> None:
+    """Size the solver pool of a forked worker to its share of settings.SOLVER_WORKERS.
+
+    Every server worker starts its own solver pool, so SOLVER_WORKERS is divided by the number of
+    server workers to keep their pools together at about SOLVER_WORKERS workers.
+    """
+    solver_executor.max_workers = max(1, settings.SOLVER_WORKERS // server.num_workers)
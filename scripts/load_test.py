@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""Load test of the production server with a growing number of workers.
+
+For every worker count a gunicorn server is started with gunicorn.conf.py and loaded with
+production plan requests by client processes for a fixed time. Every request has a different load,
+so no request is served from the plan cache. The throughput and latency of every worker count
+show how the server scales across cores, the client processes run on the same machine and take
+their share of the cores.
+
+Usage:
+    python scripts/load_test.py
+    python scripts/load_test.py --workers 1 2 4 8 --duration 20 --plants 50 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+import httpx
+import orjson
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from benchmarks.fleets import generate_payload  # noqa: E402
+
+PATH = "/api/v1/productionplan/fast"
+
+
+def request_bodies(plants: int, count: int) -> List[bytes]:
+    """Return count request bodies for one fleet that only differ in their load.
+
+    Args:
+        plants: The number of power plants of the fleet
+        count: The number of bodies
+
+    Returns:
+        The JSON bodies
+    """
+    payload = generate_payload(plants)
+    rest = orjson.dumps({"fuels": payload["fuels"], "powerplants": payload["powerplants"]})
+    # loads from half to all of the load of the payload, in steps of 0.1 MW
+    low = payload["load"] / 2
+    return [
+        b'{"load":%.1f,' % (low + index % int(low * 10) / 10) + rest[1:] for index in range(count)
+    ]
+
+
+async def _load(url: str, bodies: List[bytes], concurrency: int, duration: float) -> List[float]:
+    """Send the bodies round robin from concurrency tasks and return the latencies."""
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+
+        async def task(offset: int) -> None:
+            nonlocal errors
+            index = offset
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                response = await client.post(
+                    PATH,
+                    content=bodies[index % len(bodies)],
+                    headers={"content-type": "application/json"},
+                )
+                if response.status_code == 200:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors += 1
+                index += concurrency
+
+        await asyncio.gather(*(task(offset) for offset in range(concurrency)))
+    if errors:
+        print(f"{errors} requests failed", file=sys.stderr)
+    return latencies
+
+
+def client_process(
+    url: str, plants: int, offset: int, concurrency: int, duration: float
+) -> List[float]:
+    """Load the server from one client process and return the latencies of its requests."""
+    bodies = request_bodies(plants, 100_000)
+    return asyncio.run(_load(url, bodies[offset:] + bodies[:offset], concurrency, duration))
+
+
+def wait_until_ready(url: str, timeout: float = 30.0) -> None:
+    """Wait until the health check of the server answers.
+
+    Raises:
+        RuntimeError: If the server does not answer within the timeout
+    """
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if httpx.get(f"{url}/health").status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"The server at {url} did not start within {timeout}s")
+
+
+def run(workers: int, args: argparse.Namespace) -> Dict[str, float]:
+    """Start a server with the number of workers, load it and return its throughput and latency.
+
+    Args:
+        workers: The number of server workers
+        args: The command line arguments
+
+    Returns:
+        The requests per second and the median and 99th percentile latency in milliseconds
+    """
+    url = f"http://127.0.0.1:{args.port}"
+    env = {**os.environ, "WEB_CONCURRENCY": str(workers), "BIND": f"127.0.0.1:{args.port}"}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "app.main:app"],
+        cwd=ROOT_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_until_ready(url)
+        concurrency = max(1, args.concurrency // args.clients)
+        with multiprocessing.Pool(args.clients) as pool:
+            results = pool.starmap(
+                client_process,
+                [
+                    (url, args.plants, client * 10_000, concurrency, args.duration)
+                    for client in range(args.clients)
+                ],
+            )
+    finally:
+        # SIGTERM is the graceful shutdown of gunicorn
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+
+    latencies = sorted(latency for result in results for latency in result)
+    if not latencies:
+        raise RuntimeError("No request succeeded")
+    return {
+        "rps": len(latencies) / args.duration,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000,
+    }
+
+
+def main() -> None:
+    """Load test the server for every worker count and print the scaling."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    cores = os.cpu_count() or 1
+    default_workers = sorted(
+        {1, *(2**i for i in range(1, cores.bit_length()) if 2**i < cores), cores}
+    )
+    parser.add_argument("--workers", type=int, nargs="+", default=default_workers)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per worker count")
+    parser.add_argument("--plants", type=int, default=50, help="power plants per request")
+    parser.add_argument("--concurrency", type=int, default=64, help="requests at the same time")
+    parser.add_argument("--clients", type=int, default=2, help="client processes")
+    parser.add_argument("--port", type=int, default=8900)
+    args = parser.parse_args()
+
+    print(f"{'workers':>8} {'req/s':>10} {'p50 ms':>10} {'p99 ms':>10} {'speedup':>8}")
+    base = None
+    for workers in args.workers:
+        result = run(workers, args)
+        base = base or result["rps"]
+        print(
+            f"{workers:>8} {result['rps']:>10.1f} {result['p50_ms']:>10.2f} "
+            f"{result['p99_ms']:>10.2f} {result['rps'] / base:>7.2f}x",
+            flush=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
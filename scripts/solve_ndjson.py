@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""Calculate the production plans of newline-delimited JSON payloads.
+
+Every line of the input is a ProductionPlanIn payload, every line of the output has the "line"
+number of the payload and either its "plan" or the "error" it failed with. Lines are read and
+written one at a time, so memory use does not depend on the size of the input.
+
+Usage:
+    python scripts/solve_ndjson.py [input.ndjson] > plans.ndjson
+"""
+
+import argparse
+import os
+import sys
+from typing import IO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.planner import plan_ndjson_line  # noqa: E402
+
+
+def solve_stream(source: IO[str], target: IO[str]) -> int:
+    """Write a production plan line to target for every payload line of source.
+
+    Args:
+        source: The newline-delimited ProductionPlanIn payloads
+        target: Where the newline-delimited results are written
+
+    Returns:
+        The number of payloads that were solved
+    """
+    count = 0
+    for line_number, line in enumerate(source, start=1):
+        if line.strip():
+            target.write(plan_ndjson_line(line, line_number))
+            count += 1
+    return count
+
+
+def main() -> None:
+    """Solve the payloads of the input file or stdin and write the results to stdout."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "input", nargs="?", type=argparse.FileType("r"), default=sys.stdin, help="NDJSON payloads"
+    )
+    args = parser.parse_args()
+    count = solve_stream(args.input, sys.stdout)
+    print(f"Solved {count} payloads", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()